@@ -15,6 +15,7 @@ import time
 from redcalibur.osint.network_threat_intel.shodan_integration import perform_shodan_scan
 from redcalibur.osint.user_identity.username_lookup import lookup_username
 from redcalibur.osint.virustotal_integration import scan_url_full
+from redcalibur.osint.virustotal_batch import scan_urls_async
 from redcalibur.osint.url_health_check import basic_url_health
 from redcalibur.osint.ai_enhanced.recon_summarizer import summarize_recon_data
 from redcalibur.osint.ai_enhanced.risk_scoring import calculate_risk_score
@@ -58,6 +59,11 @@ class URLScanRequest(BaseModel):
     url: str
 
 
+class URLBatchScanRequest(BaseModel):
+    urls: List[str]
+    max_wait: float = 60.0
+
+
 @app.get("/health")
 def health() -> Dict[str, Any]:
     return {"status": "ok", "time": datetime.now().isoformat()}
@@ -207,6 +213,20 @@ def urlscan(req: URLScanRequest):
         return {"error": str(e)}
 
 
+@app.post("/urlscan/batch")
+async def urlscan_batch(req: URLBatchScanRequest):
+    # Runs on the event loop; waiting on quota and analyses does not tie up a worker thread
+    if not config.VIRUSTOTAL_API_KEY:
+        return {"error": "VIRUSTOTAL_API_KEY not configured"}
+    try:
+        results = [r async for r in scan_urls_async(config.VIRUSTOTAL_API_KEY, req.urls,
+                                                     max_wait=req.max_wait, poll_interval=5.0)]
+        return {"timestamp": datetime.now().isoformat(), "total_urls": len(results), "results": results}
+    except Exception as e:
+        logger.error(f"Batch URL scan failed: {e}")
+        return {"error": str(e)}
+
+
 class SummarizeRequest(BaseModel):
     payload: Dict[str, Any]
 
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+import asyncio
 import subprocess
 import json
 from typing import Optional
@@ -306,7 +307,18 @@ Check for:
 async def phishing_detect(request: ToolRequest):
     """Phishing URL analysis"""
     try:
+        output = ""
+        # Trained detector saved by `main.py phishing --train`, loaded once and reused
+        from redcalibur.phishing_detection.model_artifacts import get_default_detector
+        detector = get_default_detector()
+        if detector:
+            result = await asyncio.to_thread(detector.predict_url, request.target)
+            verdict = "PHISHING" if result['final_prediction']['is_phishing'] else "LEGITIMATE"
+            output = f"Model verdict: {verdict} (confidence {result['final_prediction']['confidence']:.2f})"
+        
         if not model:
+            if output:
+                return {"success": True, "output": output}
             return {"success": False, "output": "AI model not configured"}
         
         prompt = f"""Analyze this URL for phishing indicators: {request.target}
@@ -319,7 +331,9 @@ Check for:
 5. Recommendations"""
         
         response = model.generate_content(prompt)
-        return {"success": True, "output": response.text}
+        if output:
+            output += "\n\n--- AI Analysis ---\n"
+        return {"success": True, "output": output + response.text}
     except Exception as e:
         return {"success": False, "output": f"Error: {str(e)}"}
 
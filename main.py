@@ -7,7 +7,30 @@ Command-line interface for the AI-powered red teaming toolkit.
 """
 
 import argparse
+from redcalibur.config import Config
 from redcalibur.phishing_detection import AIPhishingDetector, create_sample_dataset
+from redcalibur.phishing_detection.model_artifacts import ModelArtifactError, artifact_exists
+
+
+def load_detector(model_path, retrain=False):
+    """Load the saved detector, training and saving one on the sample data if needed"""
+    if not retrain and artifact_exists(model_path):
+        print(f"📦 Loading trained model from {model_path}...")
+        try:
+            return AIPhishingDetector.load(model_path)
+        except ModelArtifactError as e:
+            print(f"⚠️  Saved model is unusable ({e}); retraining and replacing it...")
+    
+    detector = AIPhishingDetector()
+    print("📊 Creating sample dataset...")
+    urls, labels = create_sample_dataset()
+    
+    print("🎯 Training neural networks...")
+    detector.train_neural_network(urls, labels, epochs=50)
+    detector.save(model_path)
+    print(f"💾 Model saved to {model_path}")
+    return detector
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -20,25 +43,21 @@ def main():
     # Phishing detection module
     phishing_parser = subparsers.add_parser('phishing', help='Phishing detection tools')
     phishing_parser.add_argument('--url', type=str, help='URL to analyze')
-    phishing_parser.add_argument('--train', action='store_true', help='Train models with sample data')
+    phishing_parser.add_argument('--train', action='store_true', help='Train models with sample data and save them')
+    phishing_parser.add_argument('--model', type=str, default=Config.PHISHING_MODEL_PATH,
+                                 help='Saved model directory (default: %(default)s)')
     phishing_parser.add_argument('--demo', action='store_true', help='Run demonstration')
     
     args = parser.parse_args()
     
     if args.module == 'phishing':
-        detector = AIPhishingDetector()
-        
         if args.train or args.demo:
-            print("🧠 Initializing AI models...")
-            detector.initialize_transformer()
-            
-            print("📊 Creating sample dataset...")
-            urls, labels = create_sample_dataset()
-            
-            print("🎯 Training neural networks...")
-            detector.train_neural_network(urls, labels, epochs=50)
+            detector = load_detector(args.model, retrain=args.train)
             
             if args.demo:
+                print("🧠 Initializing AI models...")
+                detector.initialize_transformer()
+                
                 test_urls = [
                     "https://www.google.com",
                     "http://suspicious-bank-login.com/verify",
@@ -46,13 +65,14 @@ def main():
                 ]
                 
                 print("\n🔍 Analyzing test URLs...")
-                for url in test_urls:
-                    result = detector.predict_url(url)
+                for result in detector.predict_urls(test_urls):
+                    url = result['url']
                     status = "🚨 PHISHING" if result['final_prediction']['is_phishing'] else "✅ LEGITIMATE"
                     confidence = result['final_prediction']['confidence']
                     print(f"{status} - {url} (Confidence: {confidence:.2f})")
         
         elif args.url:
+            detector = load_detector(args.model)
             print(f"🔍 Analyzing: {args.url}")
             result = detector.predict_url(args.url)
             
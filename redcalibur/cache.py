@@ -0,0 +1,207 @@
+"""
+Persistent response cache for RedCalibur
+
+A small SQLite-backed key/value store with per-namespace TTLs and HTTP
+validators (ETag / Last-Modified), plus in-flight request coalescing so
+concurrent callers asking for the same key share one lookup.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    stored_at REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with its age and HTTP validators"""
+    value: Any
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fresh: bool = True
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers for revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PersistentCache:
+    """
+    SQLite-backed cache for JSON-serializable values
+
+    Entries older than the TTL are still returned (with fresh=False) so they
+    can be revalidated with conditional requests instead of refetched.
+    """
+
+    def __init__(self, db_path: str = None, namespace: str = "default", ttl: float = 86400):
+        self.db_path = db_path or Config.CACHE_DB_PATH
+        self.namespace = namespace
+        self.ttl = ttl
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def get(self, key: str, ttl: float = None) -> Optional[CacheEntry]:
+        """
+        Look up a cached entry
+
+        Args:
+            key: Cache key
+            ttl: Override the cache's TTL for this lookup
+
+        Returns:
+            CacheEntry (possibly stale) or None
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value, stored_at, etag, last_modified FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        if row is None:
+            return None
+
+        ttl = self.ttl if ttl is None else ttl
+        return CacheEntry(
+            value=json.loads(row[0]),
+            stored_at=row[1],
+            etag=row[2],
+            last_modified=row[3],
+            fresh=(time.time() - row[1]) < ttl
+        )
+
+    def set(self, key: str, value: Any, etag: str = None, last_modified: str = None):
+        """Store a value, replacing any previous entry"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO cache (namespace, key, value, stored_at, etag, last_modified)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(namespace, key) DO UPDATE SET
+                    value = excluded.value,
+                    stored_at = excluded.stored_at,
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified
+                """,
+                (self.namespace, key, json.dumps(value, default=str), time.time(), etag, last_modified)
+            )
+
+    def touch(self, key: str):
+        """Mark an entry as fresh again (e.g., after a 304 Not Modified)"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE cache SET stored_at = ? WHERE namespace = ? AND key = ?",
+                (time.time(), self.namespace, key)
+            )
+
+    def delete(self, key: str):
+        """Remove one entry"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def clear(self):
+        """Remove every entry in this namespace"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def purge_expired(self, max_age: float = None) -> int:
+        """
+        Delete entries older than max_age (defaults to the TTL)
+
+        Returns:
+            Number of entries removed
+        """
+        cutoff = time.time() - (self.ttl if max_age is None else max_age)
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND stored_at < ?", (self.namespace, cutoff)
+            )
+        return cur.rowcount
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self.conn.close()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key
+
+    The first caller runs the function; callers arriving while it is in
+    flight wait and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, Tuple[threading.Event, Dict[str, Any]]] = {}
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = (threading.Event(), {})
+
+        event, outcome = call
+        if not leader:
+            event.wait()
+        else:
+            try:
+                outcome["value"] = fn()
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                event.set()
+
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["value"]
+
+
+_caches: Dict[Tuple[str, str], PersistentCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, ttl: float) -> PersistentCache:
+    """Shared cache for a namespace at Config.CACHE_DB_PATH"""
+    key = (Config.CACHE_DB_PATH, namespace)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = PersistentCache(Config.CACHE_DB_PATH, namespace, ttl)
+        cache.ttl = ttl
+        return cache
@@ -9,14 +9,18 @@ from .osint.domain_infrastructure.subdomain_discovery import discover_subdomains
 from .osint.domain_infrastructure.port_scanning import perform_port_scan
 from .osint.domain_infrastructure.ssl_tls_details import get_ssl_details
 from .osint.network_threat_intel.shodan_integration import perform_shodan_scan
-from .osint.user_identity.username_lookup import lookup_username
+from .osint.shodan_integration import search_to_ndjson
+from .osint.user_identity.username_lookup import lookup_username, lookup_usernames
 from .osint.ai_enhanced.recon_summarizer import summarize_recon_data
 from .osint.ai_enhanced.risk_scoring import calculate_risk_score
 from .osint.ai_enhanced.report_generator import generate_pdf_report, generate_markdown_report
 from .osint.virustotal_integration import scan_url
-from .osint.search_engine_data_mining.google_dorking import perform_google_dorking
+from .osint.virustotal_batch import scan_urls
+from .osint.search_engine_data_mining.dork_engine import run_dorks
 from .osint.image_file_osint.document_metadata_extraction import extract_document_metadata
 from .osint.image_file_osint.exif_metadata_extraction import extract_exif_metadata
+from .osint.image_file_osint.bulk_file_osint import bulk_file_osint, write_ndjson
+from .osint.image_file_osint.image_index import get_default_index
 
 # New imports for enumeration and vulnerability scanning
 from .enumeration.service_detector import detect_services, fingerprint_service
@@ -24,6 +28,10 @@ from .enumeration.banner_grabber import grab_banner
 from .enumeration.directory_enumeration import enumerate_directories, quick_scan
 from .vulnerability_scanning.cve_scanner import scan_for_cves
 from .vulnerability_scanning.service_vuln_check import check_service_vulnerabilities, batch_check_services
+from .vulnerability_scanning.cve_store import CVEStore
+from .vulnerability_scanning.nvd_sync import sync_nvd
+from .vulnerability_scanning.exploit_index import ExploitIndex
+from .vulnerability_scanning.prioritizer import prioritize_findings, summarize_risk
 
 class RedCaliburCLI:
     """Professional CLI interface for RedCalibur"""
@@ -43,6 +51,7 @@ Examples:
   redcalibur domain --target example.com --all
   redcalibur scan --target 192.168.1.1 --ports 80,443,22
   redcalibur username --target johndoe --platforms twitter,linkedin
+  redcalibur username --file employees.txt --platforms github,medium
   
   # Enumeration
   redcalibur enumerate --target 192.168.1.1 --banner
@@ -52,6 +61,11 @@ Examples:
   redcalibur vuln-scan --software apache --version 2.4.41
   redcalibur vuln-scan --target 192.168.1.1 --ports 80,443,22
   redcalibur vuln-scan --cve-id CVE-2021-44228
+  redcalibur urlscan --file urls.txt
+  redcalibur cve-import --feed nvdcve-2.0-2024.json.gz nvdcve-2.0-2025.json.gz
+  redcalibur cve-sync
+  redcalibur exploit-import --source ./exploitdb
+  redcalibur epss-import --file epss_scores-current.csv.gz
   
   # Automated Pentest
   redcalibur auto-pentest --target 192.168.1.1 --domain example.com
@@ -59,7 +73,9 @@ Examples:
   # Reports & Utilities
   redcalibur report --input data.json --format pdf
   redcalibur urlscan --url http://example.com
+  redcalibur shodan-search --query "apache country:DE" --output apache.ndjson
   redcalibur file-osint extract-doc-meta --path /path/to/document.pdf
+  redcalibur file-osint bulk --path ./evidence --output evidence.ndjson
   redcalibur auto-recon
             """
         )
@@ -83,7 +99,9 @@ Examples:
         
         # Username lookup
         username_parser = subparsers.add_parser('username', help='Username reconnaissance')
-        username_parser.add_argument('--target', required=True, help='Target username')
+        username_target = username_parser.add_mutually_exclusive_group(required=True)
+        username_target.add_argument('--target', help='Target username')
+        username_target.add_argument('--file', help='File with one username per line to check in bulk')
         username_parser.add_argument('--platforms', help='Comma-separated platforms to check')
         
         # Report generation
@@ -107,7 +125,9 @@ Examples:
         
         # URL scanning
         urlscan_parser = subparsers.add_parser('urlscan', help='Scan a URL using VirusTotal API')
-        urlscan_parser.add_argument('--url', required=True, help='URL to scan')
+        urlscan_target = urlscan_parser.add_mutually_exclusive_group(required=True)
+        urlscan_target.add_argument('--url', help='URL to scan')
+        urlscan_target.add_argument('--file', help='File with one URL per line to scan as a batch')
 
         # Automated Reconnaissance
         subparsers.add_parser('auto-recon', help='Run a fully automated, interactive OSINT process')
@@ -122,6 +142,22 @@ Examples:
         exif_parser = file_osint_subparsers.add_parser('extract-exif', help='Extract EXIF data from images')
         exif_parser.add_argument('--path', required=True, help='Path to the image file')
 
+        bulk_parser = file_osint_subparsers.add_parser('bulk', help='Extract metadata from every document and image in a tree or archive')
+        bulk_parser.add_argument('--path', required=True, help='Directory, file or archive (.zip, .tar[.gz])')
+        bulk_parser.add_argument('--output', help='NDJSON output file (default: output directory)')
+        bulk_parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+        bulk_parser.add_argument('--no-cache', action='store_true', help='Re-extract every file instead of reusing cached results')
+
+        index_parser = file_osint_subparsers.add_parser('index-images', help='Add images to the local reverse image search index')
+        index_parser.add_argument('--path', required=True, help='Directory, image or archive to index')
+        index_parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+
+        reverse_parser = file_osint_subparsers.add_parser('reverse-search', help='Find indexed images similar to an image')
+        reverse_parser.add_argument('--path', required=True, help='Path to the query image')
+        reverse_parser.add_argument('--max-distance', type=int, default=10, help='Largest Hamming distance out of 64 bits (default: 10)')
+        reverse_parser.add_argument('--hash', choices=['phash', 'dhash', 'ahash'], default='phash', help='Hash used for matching (default: phash)')
+        reverse_parser.add_argument('--limit', type=int, default=20, help='Maximum number of matches (default: 20)')
+
         # Enumeration commands
         enum_parser = subparsers.add_parser('enumerate', help='Service enumeration and fingerprinting')
         enum_parser.add_argument('--target', required=True, help='Target IP or hostname')
@@ -136,6 +172,32 @@ Examples:
         vuln_parser.add_argument('--target', help='Target to scan services and check vulnerabilities')
         vuln_parser.add_argument('--ports', help='Ports to scan on target (comma-separated)')
         vuln_parser.add_argument('--cve-id', help='Look up specific CVE by ID')
+
+        # Local CVE database
+        cve_import_parser = subparsers.add_parser('cve-import', help='Import NVD JSON feeds into the local CVE database')
+        cve_import_parser.add_argument('--feed', required=True, nargs='+', help='NVD JSON 2.0 feed files (.json, .json.gz, .json.zip)')
+        cve_import_parser.add_argument('--db', help='Path to the local CVE database (default: Config.CVE_DB_PATH)')
+
+        cve_sync_parser = subparsers.add_parser('cve-sync', help='Incrementally sync the local CVE database with the NVD API')
+        cve_sync_parser.add_argument('--since', help='ISO timestamp to sync from (default: last sync)')
+        cve_sync_parser.add_argument('--full', action='store_true', help='Download the full NVD dataset if the database is empty')
+        cve_sync_parser.add_argument('--page-size', type=int, default=2000, help='Results per NVD API page (max 2000)')
+        cve_sync_parser.add_argument('--base-url', help='Alternative NVD CVE API endpoint (e.g., a local mirror)')
+        cve_sync_parser.add_argument('--db', help='Path to the local CVE database (default: Config.CVE_DB_PATH)')
+
+        exploit_import_parser = subparsers.add_parser('exploit-import', help='Import an Exploit-DB checkout into the local exploit index')
+        exploit_import_parser.add_argument('--source', required=True, help='Exploit-DB repository checkout or files_exploits.csv')
+        exploit_import_parser.add_argument('--db', help='Path to the local exploit index (default: Config.EXPLOIT_DB_PATH)')
+
+        epss_import_parser = subparsers.add_parser('epss-import', help='Import EPSS scores into the local CVE database')
+        epss_import_parser.add_argument('--file', required=True, help='EPSS scores CSV from FIRST (.csv or .csv.gz)')
+        epss_import_parser.add_argument('--db', help='Path to the local CVE database (default: Config.CVE_DB_PATH)')
+
+        shodan_search_parser = subparsers.add_parser('shodan-search', help='Export Shodan search matches to NDJSON')
+        shodan_search_parser.add_argument('--query', required=True, help='Shodan search query')
+        shodan_search_parser.add_argument('--output', required=True, help='NDJSON file to write (resumed if a cursor exists)')
+        shodan_search_parser.add_argument('--max-pages', type=int, help='Pages of 100 matches to fetch in this run')
+        shodan_search_parser.add_argument('--restart', action='store_true', help='Ignore any saved cursor and start from page 1')
         
         # Automated pentest command
         pentest_parser = subparsers.add_parser('auto-pentest', help='Automated penetration testing workflow')
@@ -214,7 +276,7 @@ Examples:
     
     def run_username_lookup(self, args):
         """Run username reconnaissance"""
-        results = {"target": args.target, "timestamp": datetime.now().isoformat()}
+        results = {"target": args.target or getattr(args, 'file', None), "timestamp": datetime.now().isoformat()}
         
         try:
             if args.platforms:
@@ -222,8 +284,15 @@ Examples:
             else:
                 platforms = ["twitter", "linkedin", "github", "instagram"]
                 
-            self.logger.info(f"Looking up username {args.target} on platforms: {platforms}")
-            results["username_lookup"] = lookup_username(args.target, platforms)
+            if getattr(args, 'file', None):
+                with open(args.file) as f:
+                    usernames = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+                self.logger.info(f"Looking up {len(usernames)} usernames on platforms: {platforms}")
+                results["username_lookup"] = lookup_usernames(usernames, platforms)
+                results["total_usernames"] = len(usernames)
+            else:
+                self.logger.info(f"Looking up username {args.target} on platforms: {platforms}")
+                results["username_lookup"] = lookup_username(args.target, platforms)
             
         except Exception as e:
             self.logger.error(f"Error in username lookup: {str(e)}")
@@ -275,6 +344,7 @@ Examples:
         config_info = {
             "SHODAN_API_KEY": "Set" if self.config.SHODAN_API_KEY else "Not set",
             "GEMINI_API_KEY": "Set" if self.config.GEMINI_API_KEY else "Not set",
+            "NVD_API_KEY": "Set" if self.config.NVD_API_KEY else "Not set",
             "OUTPUT_DIR": self.config.OUTPUT_DIR,
             "REPORT_FORMAT": self.config.REPORT_FORMAT,
             "DEFAULT_PORTS": self.config.DEFAULT_PORTS
@@ -325,6 +395,9 @@ Examples:
     
     def run_url_scan(self, args):
         """Scan a URL using VirusTotal API"""
+        if args.file:
+            return self.run_url_batch_scan(args)
+
         results = {"url": args.url, "timestamp": datetime.now().isoformat()}
 
         try:
@@ -341,6 +414,27 @@ Examples:
         print(json.dumps(results, indent=2, default=str))
         return results
     
+    def run_url_batch_scan(self, args):
+        """Scan every URL in a file with VirusTotal, within the key's quotas"""
+        if not self.config.VIRUSTOTAL_API_KEY:
+            self.logger.error("VirusTotal API key not configured")
+            return {"error": "VIRUSTOTAL_API_KEY not configured"}
+
+        results = {"file": args.file, "timestamp": datetime.now().isoformat()}
+
+        try:
+            with open(args.file) as f:
+                urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+            self.logger.info(f"Scanning {len(urls)} URLs")
+            results["results"] = scan_urls(self.config.VIRUSTOTAL_API_KEY, urls)
+            results["total_urls"] = len(urls)
+        except Exception as e:
+            self.logger.error(f"Error scanning URLs: {str(e)}")
+            results["error"] = str(e)
+
+        print(json.dumps(results, indent=2, default=str))
+        return results
+
     def get_targets_interactively(self):
         """Get target information from the user interactively"""
         print("Starting fully automated OSINT process...")
@@ -370,9 +464,9 @@ Examples:
                 f'site:{target_domain} filetype:pdf',
                 f'site:{target_domain} inurl:login'
             ]
-            results["google_dorking"] = {}
-            for query in dork_queries:
-                results["google_dorking"][query] = perform_google_dorking(query)
+            # Engines run concurrently; each is paced by its own rate limit.
+            # Shape: {query: {engine: [urls] or {"error": message}}}
+            results["google_dorking"] = run_dorks(dork_queries, engines=("google", "duckduckgo"))
         except Exception as e:
             self.logger.error(f"Error during Google Dorking: {str(e)}")
             results["google_dorking_error"] = str(e)
@@ -402,6 +496,11 @@ Examples:
     
     def run_file_osint(self, args):
         """Run file-based OSINT"""
+        if args.file_command == 'bulk':
+            return self.run_bulk_file_osint(args)
+        if args.file_command in ('index-images', 'reverse-search'):
+            return self.run_image_index(args)
+
         results = {}
         if args.file_command == 'extract-doc-meta':
             self.logger.info(f"Extracting metadata from {args.path}")
@@ -417,6 +516,34 @@ Examples:
         print(json.dumps(results, indent=2, default=str))
         self.logger.info(f"Results saved to {output_file}")
 
+    def run_bulk_file_osint(self, args):
+        """Stream file OSINT records for a whole tree to an NDJSON file"""
+        output_file = args.output or f"{self.config.OUTPUT_DIR}/file_osint_bulk_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"
+        self.logger.info(f"Extracting metadata from files under {args.path} to {output_file}")
+        with open(output_file, 'w') as f:
+            results = write_ndjson(bulk_file_osint(args.path, workers=args.workers, use_cache=not args.no_cache), f)
+        results["output"] = output_file
+
+        print(json.dumps(results, indent=2, default=str))
+        return results
+
+    def run_image_index(self, args):
+        """Index images for, or query, the local reverse image search"""
+        index = get_default_index()
+        if args.file_command == 'index-images':
+            self.logger.info(f"Indexing images under {args.path} into {index.db_path}")
+            results = index.index_tree(args.path, workers=args.workers)
+            results["total"] = index.count()
+        else:
+            self.logger.info(f"Searching {index.count()} indexed images for matches to {args.path}")
+            results = {
+                "query": args.path,
+                "matches": index.search(args.path, max_distance=args.max_distance, hash_type=args.hash, limit=args.limit),
+            }
+
+        print(json.dumps(results, indent=2, default=str))
+        return results
+
     def run_enumeration(self, args):
         """Run service enumeration"""
         results = {
@@ -538,6 +665,111 @@ Examples:
         
         return results
     
+    def run_cve_import(self, args):
+        """Import NVD JSON feeds into the local CVE database"""
+        results = {
+            "timestamp": datetime.now().isoformat(),
+            "feeds": {}
+        }
+
+        store = CVEStore(args.db or self.config.CVE_DB_PATH)
+        try:
+            for feed in args.feed:
+                self.logger.info(f"Importing NVD feed {feed}")
+                try:
+                    results["feeds"][feed] = store.ingest_feed(feed)
+                except Exception as e:
+                    self.logger.error(f"Error importing {feed}: {str(e)}")
+                    results["feeds"][feed] = {"error": str(e)}
+            results["database"] = store.db_path
+            results["total_cves"] = store.count()
+        finally:
+            store.close()
+
+        print(json.dumps(results, indent=2, default=str))
+        return results
+
+    def run_cve_sync(self, args):
+        """Pull CVEs changed since the last sync into the local CVE database"""
+        store = CVEStore(args.db or self.config.CVE_DB_PATH)
+        try:
+            kwargs = {}
+            if args.base_url:
+                kwargs["base_url"] = args.base_url
+            results = sync_nvd(
+                store,
+                since=args.since,
+                full=args.full,
+                page_size=args.page_size,
+                **kwargs
+            )
+            results["total_cves"] = store.count()
+        finally:
+            store.close()
+
+        if "error" in results:
+            self.logger.error(f"CVE sync error: {results['error']}")
+
+        print(json.dumps(results, indent=2, default=str))
+        return results
+
+    def run_exploit_import(self, args):
+        """Import Exploit-DB's files_exploits.csv into the local exploit index"""
+        results = {
+            "timestamp": datetime.now().isoformat(),
+            "source": args.source
+        }
+
+        index = ExploitIndex(args.db or self.config.EXPLOIT_DB_PATH)
+        try:
+            self.logger.info(f"Importing Exploit-DB data from {args.source}")
+            results["imported"] = index.import_csv(args.source)
+        except Exception as e:
+            self.logger.error(f"Error importing {args.source}: {str(e)}")
+            results["error"] = str(e)
+        finally:
+            results["database"] = index.db_path
+            results["total_exploits"] = index.count()
+            index.close()
+
+        print(json.dumps(results, indent=2, default=str))
+        return results
+
+    def run_epss_import(self, args):
+        """Import EPSS exploit-probability scores into the local CVE database"""
+        results = {
+            "timestamp": datetime.now().isoformat(),
+            "file": args.file
+        }
+
+        store = CVEStore(args.db or self.config.CVE_DB_PATH)
+        try:
+            self.logger.info(f"Importing EPSS scores from {args.file}")
+            results["imported"] = store.ingest_epss(args.file)
+        except Exception as e:
+            self.logger.error(f"Error importing {args.file}: {str(e)}")
+            results["error"] = str(e)
+        finally:
+            results["database"] = store.db_path
+            store.close()
+
+        print(json.dumps(results, indent=2, default=str))
+        return results
+
+    def run_shodan_search(self, args):
+        """Stream Shodan search matches to an NDJSON file"""
+        if not self.config.SHODAN_API_KEY:
+            self.logger.error("Shodan API key not configured")
+            return {"error": "SHODAN_API_KEY not configured"}
+
+        self.logger.info(f"Exporting Shodan matches for {args.query!r} to {args.output}")
+        results = search_to_ndjson(self.config.SHODAN_API_KEY, args.query, args.output,
+                                   max_pages=args.max_pages, resume=not args.restart)
+        results["timestamp"] = datetime.now().isoformat()
+
+        print(json.dumps(results, indent=2, default=str))
+        return results
+
     def run_automated_pentest(self, args):
         """Run automated penetration testing workflow"""
         self.logger.info(f"Starting automated pentest on {args.target}")
@@ -589,10 +821,16 @@ Examples:
             total_vulns = vuln_results.get("total_vulnerabilities", 0)
             open_ports = len([s for s in enum_results.get("services", []) if s.get("state") == "open"])
             
+            # Rank findings by CVSS, public exploit availability and EPSS
+            ranked = prioritize_findings(vuln_results.get("services", []))
+            risk = summarize_risk(ranked)
             results["risk_summary"] = {
                 "total_vulnerabilities": total_vulns,
                 "open_ports": open_ports,
-                "risk_level": "HIGH" if total_vulns > 10 else "MEDIUM" if total_vulns > 0 else "LOW"
+                "risk_level": risk["risk_level"],
+                "exploitable_findings": risk["exploitable_findings"],
+                "top_priority": risk["top_priority"],
+                "top_findings": risk["top_findings"]
             }
             
         except Exception as e:
@@ -663,6 +901,21 @@ Examples:
         elif args.command == 'vuln-scan':
             results = self.run_vulnerability_scan(args)
             return
+        elif args.command == 'cve-import':
+            self.run_cve_import(args)
+            return
+        elif args.command == 'cve-sync':
+            self.run_cve_sync(args)
+            return
+        elif args.command == 'exploit-import':
+            self.run_exploit_import(args)
+            return
+        elif args.command == 'epss-import':
+            self.run_epss_import(args)
+            return
+        elif args.command == 'shodan-search':
+            self.run_shodan_search(args)
+            return
         elif args.command == 'auto-pentest':
             results = self.run_automated_pentest(args)
             return
@@ -37,14 +37,45 @@ class Config:
     SHODAN_API_KEY = os.getenv("SHODAN_API_KEY")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     VIRUSTOTAL_API_KEY = os.getenv("VIRUSTOTAL_API_KEY")
+    NVD_API_KEY = os.getenv("NVD_API_KEY")
     
     # Rate limiting
     REQUEST_DELAY = 1  # seconds between requests
     MAX_RETRIES = 3
+    # VirusTotal public API quotas (raise for premium keys)
+    VIRUSTOTAL_REQUESTS_PER_MINUTE = int(os.getenv("VIRUSTOTAL_REQUESTS_PER_MINUTE", "4"))
+    VIRUSTOTAL_REQUESTS_PER_DAY = int(os.getenv("VIRUSTOTAL_REQUESTS_PER_DAY", "500"))
+    # Reports analysed within this window are reused instead of resubmitting the URL
+    VIRUSTOTAL_REPORT_TTL = int(os.getenv("VIRUSTOTAL_REPORT_TTL", str(24 * 3600)))
+    # Shodan allows one API request per second; host details are reused within the TTL
+    SHODAN_REQUESTS_PER_SECOND = 1
+    SHODAN_HOST_TTL = int(os.getenv("SHODAN_HOST_TTL", str(24 * 3600)))
+    # Username probe results are reused for a TTL that depends on the outcome
+    USERNAME_FOUND_TTL = int(os.getenv("USERNAME_FOUND_TTL", str(7 * 24 * 3600)))
+    USERNAME_NOT_FOUND_TTL = int(os.getenv("USERNAME_NOT_FOUND_TTL", str(24 * 3600)))
+    USERNAME_BLOCKED_TTL = int(os.getenv("USERNAME_BLOCKED_TTL", "900"))
+    # Dork results are reused for this long per (engine, normalized query)
+    DORK_CACHE_TTL = int(os.getenv("DORK_CACHE_TTL", str(24 * 3600)))
+    # Phishing SSL/redirect features are probed once per origin and reused this long
+    PHISHING_HOST_TTL = int(os.getenv("PHISHING_HOST_TTL", str(24 * 3600)))
     
     # Output settings
     OUTPUT_DIR = "reports"
     REPORT_FORMAT = "both"  # pdf, json, or both
+
+    # Local databases (offline mirrors and caches)
+    DATA_DIR = os.getenv("REDCALIBUR_DATA_DIR", "data")
+    CVE_DB_PATH = os.getenv("REDCALIBUR_CVE_DB", os.path.join(DATA_DIR, "nvd.db"))
+    CVE_LIVE_FALLBACK = os.getenv("REDCALIBUR_CVE_LIVE_FALLBACK", "1") != "0"
+    CACHE_DB_PATH = os.getenv("REDCALIBUR_CACHE_DB", os.path.join(DATA_DIR, "cache.db"))
+    CVE_CACHE_TTL = 24 * 3600  # seconds before cached NVD responses are revalidated
+    EXPLOIT_DB_PATH = os.getenv("REDCALIBUR_EXPLOIT_DB", os.path.join(DATA_DIR, "exploitdb.db"))
+    # Perceptual hashes of collected images for local reverse image search
+    IMAGE_INDEX_PATH = os.getenv("REDCALIBUR_IMAGE_INDEX", os.path.join(DATA_DIR, "image_index.db"))
+    # Trained phishing detector loaded at startup instead of retraining
+    PHISHING_MODEL_PATH = os.getenv("REDCALIBUR_PHISHING_MODEL", os.path.join(DATA_DIR, "phishing_model"))
+    # Extra or replacement username-check signatures (JSON, same format as the bundled file)
+    USERNAME_SIGNATURES_PATH = os.getenv("REDCALIBUR_USERNAME_SIGNATURES")
     
     # OSINT settings
     DEFAULT_PORTS = [
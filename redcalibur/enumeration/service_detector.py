@@ -6,6 +6,8 @@ import socket
 import logging
 from typing import Dict, List, Any, Tuple
 
+from ..versioning import extract_version
+
 logger = logging.getLogger(__name__)
 
 # Common service signatures
@@ -189,16 +191,8 @@ def extract_version_from_banner(banner: str, service: str) -> str:
     Returns:
         Version string or empty string
     """
-    import re
-    
-    # Try to find version pattern (e.g., 2.4.41, 8.0.23)
-    version_pattern = r'\d+\.\d+(?:\.\d+)?'
-    matches = re.findall(version_pattern, banner)
-    
-    if matches:
-        return matches[0]
-    
-    return ""
+    # Skips protocol versions (SSH-2.0-...) and keeps vendor suffixes (8.9p1, 1.0.2k)
+    return extract_version(banner, product=service)
 
 
 def get_service_by_port(port: int) -> str:
@@ -0,0 +1,288 @@
+"""
+Bulk file OSINT
+
+Walks directory trees and archives, dispatches documents and images to
+a process pool by type, and streams one JSON record per file. Results
+are cached by content, so duplicates and unchanged files are skipped.
+"""
+
+import io
+import json
+import logging
+import numbers
+import os
+import tarfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import AbstractSet, Any, Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+from ...config import Config
+from .document_metadata_extraction import extract_document_metadata
+from .exif_metadata_extraction import extract_exif_metadata
+from .file_result_cache import FileResultCache, file_digest, stat_signature
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_EXTENSIONS = {".pdf"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".jpe", ".tif", ".tiff", ".webp", ".png"}
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# Files handed to a worker per task (amortizes inter-process overhead)
+CHUNK_SIZE = 32
+# Archive members travel to workers as bytes, so chunks and the work in
+# flight are also bounded by member bytes, not just by file count
+CHUNK_BYTES = 16 * 1024 * 1024
+MAX_PENDING_BYTES = 128 * 1024 * 1024
+# Archive members larger than this are reported, not extracted into memory
+MAX_MEMBER_BYTES = 64 * 1024 * 1024
+ALL_KINDS = frozenset({"document", "image"})
+
+# (display path, file type, path on disk or None, archive member bytes or None)
+Task = Tuple[str, str, Optional[str], Optional[bytes]]
+
+# Per worker process; each opens its own database connection
+_worker_cache: Optional[FileResultCache] = None
+
+
+def file_type(name: str) -> Optional[str]:
+    """'document', 'image' or None for a file name"""
+    ext = os.path.splitext(name)[1].lower()
+    if ext in DOCUMENT_EXTENSIONS:
+        return "document"
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    return None
+
+
+def is_archive(name: str) -> bool:
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert extractor output (bytes, rationals, PDF objects) to JSON-safe values"""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, bytes):
+        return value.hex() if len(value) <= 64 else f"<{len(value)} bytes>"
+    if isinstance(value, str):
+        return str(value)  # plain str, not PDF string subclasses
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, numbers.Real):
+        try:
+            return float(value)  # EXIF rationals
+        except (ValueError, ZeroDivisionError):
+            return str(value)
+    return str(value)
+
+
+def _extract(kind: str, source) -> Dict[str, Any]:
+    if kind == "document":
+        return extract_document_metadata(source)
+    return extract_exif_metadata(source)
+
+
+def _init_worker(cache_db_path: Optional[str]):
+    global _worker_cache
+    _worker_cache = FileResultCache(cache_db_path) if cache_db_path else None
+
+
+def _outcome(kind: str, source) -> Dict[str, Any]:
+    metadata = _jsonable(_extract(kind, source))
+    if isinstance(metadata, dict) and set(metadata) == {"error"}:
+        return {"error": metadata["error"]}
+    return {"metadata": metadata}
+
+
+def _process_chunk(tasks: List[Task]) -> List[Dict[str, Any]]:
+    """Worker: extract metadata for a batch of files"""
+    records = []
+    for display, kind, path, data in tasks:
+        record: Dict[str, Any] = {"path": display, "type": kind}
+        try:
+            source = path if data is None else io.BytesIO(data)
+            # Stat before reading, so a file changed mid-scan is re-read next time
+            signature = stat_signature(path) if data is None else None
+            record["size"] = signature[0] if signature else len(data)
+            if _worker_cache is None:
+                record.update(_outcome(kind, source))
+            else:
+                digest = record["digest"] = file_digest(source)
+                outcome = _worker_cache.get(kind, digest)
+                if outcome is None:
+                    outcome = _outcome(kind, source)
+                    _worker_cache.put(kind, digest, outcome)
+                else:
+                    record["cached"] = True
+                record.update(outcome)
+                if signature:
+                    _worker_cache.remember_file(path, signature, digest)
+        except Exception as e:
+            record["error"] = str(e)
+        records.append(record)
+    return records
+
+
+def _iter_archive(path: str, kinds: AbstractSet[str] = ALL_KINDS) -> Iterator[Tuple[Task, Optional[str]]]:
+    """Yield (task, skip reason) for wanted archive members, read one at a time"""
+    if path.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                kind = None if info.is_dir() else file_type(info.filename)
+                if kind not in kinds:
+                    continue
+                display = f"{path}!{info.filename}"
+                if info.file_size > MAX_MEMBER_BYTES:
+                    yield (display, kind, None, None), f"member larger than {MAX_MEMBER_BYTES} bytes"
+                    continue
+                yield (display, kind, None, archive.read(info)), None
+        return
+
+    # Tar members are streamed in order, so compressed archives are read once
+    with tarfile.open(path, "r|*") as archive:
+        for member in archive:
+            kind = file_type(member.name) if member.isfile() else None
+            if kind not in kinds:
+                continue
+            display = f"{path}!{member.name}"
+            if member.size > MAX_MEMBER_BYTES:
+                yield (display, kind, None, None), f"member larger than {MAX_MEMBER_BYTES} bytes"
+                continue
+            yield (display, kind, None, archive.extractfile(member).read()), None
+
+
+def iter_tasks(root: str, kinds: AbstractSet[str] = ALL_KINDS) -> Iterator[Tuple[Task, Optional[str]]]:
+    """
+    Walk a file, directory tree or archive lazily
+
+    Args:
+        root: File, directory or archive
+        kinds: File types to yield; archive members of other types are not read
+
+    Yields:
+        (task, skip reason); the reason is None for files to process
+    """
+    if os.path.isfile(root):
+        paths = iter([root])
+    else:
+        paths = (os.path.join(d, f) for d, _, files in os.walk(root) for f in sorted(files))
+
+    for path in paths:
+        if is_archive(path):
+            try:
+                yield from _iter_archive(path, kinds)
+            except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+                yield (path, "archive", None, None), f"unreadable archive: {e}"
+            continue
+        kind = file_type(path)
+        if kind in kinds:
+            yield (path, kind, path, None), None
+
+
+class ChunkDispatcher:
+    """
+    Batch tasks onto a process pool with bounded work in flight
+
+    Chunks close at CHUNK_SIZE files or CHUNK_BYTES of archive member data.
+    Results are collected whenever more than max_pending chunks or
+    MAX_PENDING_BYTES of member data are queued.
+    """
+
+    def __init__(self, pool: ProcessPoolExecutor, fn: Callable[[List[Task]], List[Any]], max_pending: int):
+        self.pool = pool
+        self.fn = fn
+        self.max_pending = max_pending
+        self.pending: Dict[Any, int] = {}  # future -> member bytes
+        self.pending_bytes = 0
+        self.chunk: List[Task] = []
+        self.chunk_bytes = 0
+
+    def add(self, task: Task) -> Iterator[Any]:
+        """Queue a task, yielding any results collected to make room"""
+        self.chunk.append(task)
+        self.chunk_bytes += len(task[3]) if task[3] is not None else 0
+        if len(self.chunk) >= CHUNK_SIZE or self.chunk_bytes >= CHUNK_BYTES:
+            self._submit()
+            yield from self._drain(self.max_pending, MAX_PENDING_BYTES)
+
+    def finish(self) -> Iterator[Any]:
+        """Submit the last partial chunk and yield all remaining results"""
+        if self.chunk:
+            self._submit()
+        yield from self._drain(0, 0)
+
+    def _submit(self):
+        future = self.pool.submit(self.fn, self.chunk)
+        self.pending[future] = self.chunk_bytes
+        self.pending_bytes += self.chunk_bytes
+        self.chunk, self.chunk_bytes = [], 0
+
+    def _drain(self, max_chunks: int, max_bytes: int) -> Iterator[Any]:
+        while self.pending and (len(self.pending) > max_chunks or self.pending_bytes > max_bytes):
+            done, _ = wait(self.pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                self.pending_bytes -= self.pending.pop(future)
+                yield from future.result()
+
+
+def bulk_file_osint(root: str, workers: int = None, use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Extract metadata from every document and image under root
+
+    Files are batched to a process pool using all cores; at most a few
+    batches per worker, and MAX_PENDING_BYTES of archive member data, are
+    in flight, so memory stays flat however many files the tree holds.
+    With the cache, files whose size, mtime and inode are unchanged are
+    answered without being read, and files whose content was seen before
+    (duplicates, renames) are hashed but not re-extracted.
+
+    Args:
+        root: File, directory or archive (.zip / .tar[.gz|.bz2|.xz])
+        workers: Worker processes (default: os.cpu_count())
+        use_cache: Reuse and store results in the content-addressed cache
+
+    Yields:
+        One record per file, in completion order:
+        {"path", "type", "size", "metadata"} or {"path", "type", "error"};
+        with the cache, also "digest", and "cached": True for reused results
+    """
+    workers = workers or os.cpu_count() or 1
+    cache_db_path = Config.CACHE_DB_PATH if use_cache else None
+    cache = FileResultCache(cache_db_path) if use_cache else None
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_db_path,)) as pool:
+            dispatcher = ChunkDispatcher(pool, _process_chunk, workers * 4)
+            for task, skipped in iter_tasks(root):
+                if skipped:
+                    yield {"path": task[0], "type": task[1], "error": skipped}
+                    continue
+                if cache is not None and task[2] is not None:
+                    record = cache.lookup_path(task[2], task[1])
+                    if record is not None:
+                        yield record
+                        continue
+                yield from dispatcher.add(task)
+            yield from dispatcher.finish()
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def write_ndjson(records, out: IO[str]) -> Dict[str, int]:
+    """
+    Write records as NDJSON, flushing as they arrive
+
+    Returns:
+        Counts of files processed, failed and answered from the cache
+    """
+    counts = {"files": 0, "errors": 0, "cached": 0}
+    for record in records:
+        out.write(json.dumps(record, default=str) + "\n")
+        out.flush()
+        counts["files"] += 1
+        counts["errors"] += "error" in record
+        counts["cached"] += bool(record.get("cached"))
+    return counts
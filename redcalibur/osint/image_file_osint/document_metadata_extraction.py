@@ -1,22 +1,39 @@
+import logging
+
 from PyPDF2 import PdfReader
 
+from .pdf_metadata_reader import PdfStructureError, read_pdf_metadata
+
+logger = logging.getLogger(__name__)
+
+
 def extract_document_metadata(file_path):
     """
     Extract metadata from a document (e.g., PDF).
 
+    Only the trailer, Info dictionary and XMP packet are read, so the cost
+    follows the size of the metadata rather than the document. Files whose
+    structure the header reader cannot follow are loaded with PdfReader.
+
     Args:
-        file_path (str): The path to the document file.
+        file_path (str): The path to the document file (or a file-like object).
 
     Returns:
         dict: A dictionary containing document metadata.
     """
     try:
-        reader = PdfReader(file_path)
-        metadata = reader.metadata
+        try:
+            metadata = read_pdf_metadata(file_path)
+        except PdfStructureError as e:
+            logger.debug(f"Header-only read failed ({e}); loading the full document")
+            if hasattr(file_path, "seek"):
+                file_path.seek(0)
+            reader = PdfReader(file_path)
+            metadata = {key: reader.metadata[key] for key in reader.metadata or {}}
 
         if not metadata:
             return {"error": "No metadata found."}
 
-        return {key: metadata[key] for key in metadata}
+        return metadata
     except Exception as e:
         return {"error": str(e)}
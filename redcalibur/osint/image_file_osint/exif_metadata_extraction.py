@@ -1,28 +1,23 @@
-from PIL import Image
-from PIL.ExifTags import TAGS
+from .exif_reader import read_exif
 
 def extract_exif_metadata(image_path):
     """
     Extract EXIF metadata from an image.
 
+    Only the EXIF block is read from the file; the image is not decoded.
+
     Args:
-        image_path (str): The path to the image file.
+        image_path (str): The path to the image file (or a file-like object).
 
     Returns:
         dict: A dictionary containing EXIF metadata.
     """
     try:
-        image = Image.open(image_path)
-        exif_data = image._getexif()
+        metadata = read_exif(image_path)
 
-        if not exif_data:
+        if not metadata:
             return {"error": "No EXIF metadata found."}
 
-        metadata = {}
-        for tag, value in exif_data.items():
-            tag_name = TAGS.get(tag, tag)
-            metadata[tag_name] = value
-
         return metadata
     except Exception as e:
         return {"error": str(e)}
@@ -0,0 +1,183 @@
+"""
+Header-only EXIF reader
+
+Locates the EXIF block of JPEG (APP1 segment), TIFF, PNG (eXIf chunk)
+and WebP (EXIF chunk) files by walking segment and chunk headers, then
+decodes only the IFD entries that block points at. Pixel data is never
+read or decoded.
+"""
+
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+from PIL.ExifTags import GPSTAGS, TAGS
+
+from .mapped_file import mapped_bytes
+
+EXIF_IFD_POINTER = 0x8769
+GPS_IFD_POINTER = 0x8825
+INTEROP_IFD_POINTER = 0xA005
+
+# TIFF field type -> (struct code, size in bytes)
+_FIELD_TYPES = {
+    1: ("B", 1), 2: ("s", 1), 3: ("H", 2), 4: ("L", 4), 5: ("LL", 8), 6: ("b", 1),
+    7: ("s", 1), 8: ("h", 2), 9: ("l", 4), 10: ("ll", 8), 11: ("f", 4), 12: ("d", 8), 13: ("L", 4),
+}
+# Entries read per IFD at most (guards against corrupt counts)
+MAX_IFD_ENTRIES = 1024
+
+
+class ExifFormatError(ValueError):
+    """Raised when a file's container or EXIF block is malformed."""
+
+
+def _jpeg_exif(buf) -> Optional[int]:
+    """Offset of the TIFF header in a JPEG's EXIF APP1 segment"""
+    pos = 2
+    while pos + 4 <= len(buf):
+        if buf[pos] != 0xFF:
+            raise ExifFormatError(f"Bad JPEG marker at offset {pos}")
+        marker = buf[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # markers without a length
+            pos += 2
+            continue
+        if marker in (0xDA, 0xD9):  # image data starts; metadata segments come before it
+            return None
+        length = struct.unpack_from(">H", buf, pos + 2)[0]
+        if marker == 0xE1 and buf[pos + 4:pos + 10] == b"Exif\x00\x00":
+            return pos + 10
+        pos += 2 + length
+    return None
+
+
+def _png_exif(buf) -> Optional[int]:
+    pos = 8
+    while pos + 8 <= len(buf):
+        length, kind = struct.unpack_from(">I4s", buf, pos)
+        if kind == b"eXIf":
+            return pos + 8
+        if kind == b"IEND":
+            return None
+        pos += 12 + length  # length, type, data, CRC
+    return None
+
+
+def _webp_exif(buf) -> Optional[int]:
+    pos = 12
+    while pos + 8 <= len(buf):
+        kind, length = struct.unpack_from("<4sI", buf, pos)
+        if kind == b"EXIF":
+            start = pos + 8
+            return start + 6 if buf[start:start + 6] == b"Exif\x00\x00" else start
+        pos += 8 + length + (length & 1)
+    return None
+
+
+def locate_exif(buf) -> Optional[int]:
+    """
+    Offset of the TIFF header holding a file's EXIF data
+
+    Returns:
+        The offset, or None if the file has no EXIF block
+
+    Raises:
+        ExifFormatError: If the container format is not supported
+    """
+    head = bytes(buf[:12])
+    if head[:2] == b"\xff\xd8":
+        return _jpeg_exif(buf)
+    if head[:4] in (b"II*\x00", b"MM\x00*"):
+        return 0
+    if head[:8] == b"\x89PNG\r\n\x1a\n":
+        return _png_exif(buf)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return _webp_exif(buf)
+    raise ExifFormatError("Unsupported image format")
+
+
+class _TiffBlock:
+    """Decodes IFDs of a TIFF structure starting at base"""
+
+    def __init__(self, buf, base: int):
+        self.buf = buf
+        self.base = base
+        order = bytes(buf[base:base + 2])
+        if order not in (b"II", b"MM"):
+            raise ExifFormatError("Bad TIFF byte order mark")
+        self.endian = "<" if order == b"II" else ">"
+
+    def unpack(self, fmt: str, offset: int) -> Tuple:
+        position = self.base + offset
+        size = struct.calcsize(self.endian + fmt)
+        if offset < 0 or position + size > len(self.buf):
+            raise ExifFormatError(f"EXIF offset {offset} outside the file")
+        return struct.unpack_from(self.endian + fmt, self.buf, position)
+
+    def first_ifd(self) -> int:
+        return self.unpack("I", 4)[0]
+
+    def read_ifd(self, offset: int) -> Dict[int, Any]:
+        count = min(self.unpack("H", offset)[0], MAX_IFD_ENTRIES)
+        entries = {}
+        for i in range(count):
+            tag, kind, n, raw = self.unpack("HHI4s", offset + 2 + 12 * i)
+            if kind not in _FIELD_TYPES:
+                continue
+            try:
+                entries[tag] = self._value(kind, n, raw, offset + 2 + 12 * i + 8)
+            except ExifFormatError:
+                continue
+        return entries
+
+    def _value(self, kind: int, count: int, raw: bytes, inline_at: int) -> Any:
+        code, size = _FIELD_TYPES[kind]
+        total = size * count
+        at = inline_at if total <= 4 else self.unpack("I", inline_at)[0]
+        if code == "s":
+            data = self.unpack(f"{total}s", at)[0]
+            return data.rstrip(b"\x00").decode("utf-8", errors="replace") if kind == 2 else data
+        values = self.unpack(code * count, at)
+        if len(code) == 2:  # rationals
+            values = tuple(num / den if den else None for num, den in zip(values[0::2], values[1::2]))
+        return values[0] if len(values) == 1 else values
+
+
+def read_exif(source) -> Dict[str, Any]:
+    """
+    Read an image's EXIF tags without decoding the image
+
+    The primary IFD and the Exif sub-IFD are merged; GPS tags are returned
+    as a nested "GPSInfo" dictionary.
+
+    Args:
+        source: Path or file-like object
+
+    Returns:
+        Dictionary mapping tag name -> value (empty when there is no EXIF data)
+
+    Raises:
+        ExifFormatError: If the format is unsupported or the EXIF block is malformed
+    """
+    with mapped_bytes(source) as buf:
+        base = locate_exif(buf)
+        if base is None:
+            return {}
+        block = _TiffBlock(buf, base)
+        entries = block.read_ifd(block.first_ifd())
+
+        metadata: Dict[str, Any] = {}
+        exif_ifd = entries.pop(EXIF_IFD_POINTER, None)
+        gps_ifd = entries.pop(GPS_IFD_POINTER, None)
+        entries.pop(INTEROP_IFD_POINTER, None)
+        if isinstance(exif_ifd, int):
+            sub = block.read_ifd(exif_ifd)
+            sub.pop(INTEROP_IFD_POINTER, None)
+            entries.update(sub)
+        for tag, value in entries.items():
+            metadata[TAGS.get(tag, tag)] = value
+        if isinstance(gps_ifd, int):
+            metadata["GPSInfo"] = {GPSTAGS.get(tag, tag): value for tag, value in block.read_ifd(gps_ifd).items()}
+        return metadata
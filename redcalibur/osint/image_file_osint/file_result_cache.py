@@ -0,0 +1,80 @@
+"""
+Content-addressed cache for file OSINT results
+
+Extraction results are stored under a hash of the file's bytes, so
+duplicate files are only processed once. Each path also remembers the
+(size, mtime, inode) it had when hashed; while those are unchanged the
+file is not even read again, which makes re-scans of a growing evidence
+tree incremental.
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, List, Optional
+
+from ...cache import PersistentCache
+from .mapped_file import mapped_bytes
+
+# Bump when extractor output changes so stale results are not reused
+EXTRACTOR_VERSION = 2
+# Results are keyed by content, so they never go stale
+RESULT_TTL = float("inf")
+
+
+def file_digest(source) -> str:
+    """BLAKE2b digest of a file's bytes (path or file-like object)"""
+    with mapped_bytes(source) as buf:
+        return hashlib.blake2b(buf, digest_size=20).hexdigest()
+
+
+def stat_signature(path: str) -> List[int]:
+    """(size, mtime, inode) used to tell whether a file changed since it was hashed"""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+class FileResultCache:
+    """Extraction results by content digest, and digests by path"""
+
+    def __init__(self, db_path: str = None):
+        self.files = PersistentCache(db_path, namespace="file_osint_files", ttl=RESULT_TTL)
+        self.results = PersistentCache(db_path, namespace="file_osint_results", ttl=RESULT_TTL)
+
+    def known_digest(self, path: str, signature: List[int]) -> Optional[str]:
+        """Digest recorded for path, if the file is unchanged since"""
+        entry = self.files.get(os.path.abspath(path))
+        if entry is None or entry.value.get("stat") != signature:
+            return None
+        return entry.value["digest"]
+
+    def remember_file(self, path: str, signature: List[int], digest: str):
+        self.files.set(os.path.abspath(path), {"stat": signature, "digest": digest})
+
+    def get(self, kind: str, digest: str) -> Optional[Dict[str, Any]]:
+        """Cached outcome ({"metadata": ...} or {"error": ...}) for a file's content"""
+        entry = self.results.get(f"{EXTRACTOR_VERSION}:{kind}:{digest}")
+        return None if entry is None else entry.value
+
+    def put(self, kind: str, digest: str, outcome: Dict[str, Any]):
+        self.results.set(f"{EXTRACTOR_VERSION}:{kind}:{digest}", outcome)
+
+    def lookup_path(self, path: str, kind: str) -> Optional[Dict[str, Any]]:
+        """
+        Full record for an unchanged file, without reading it
+
+        Returns:
+            The record, or None if the file must be (re)processed
+        """
+        try:
+            signature = stat_signature(path)
+        except OSError:
+            return None
+        digest = self.known_digest(path, signature)
+        outcome = self.get(kind, digest) if digest else None
+        if outcome is None:
+            return None
+        return {"path": path, "type": kind, "size": signature[0], "digest": digest, **outcome, "cached": True}
+
+    def close(self):
+        self.files.close()
+        self.results.close()
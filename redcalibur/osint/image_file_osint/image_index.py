@@ -0,0 +1,280 @@
+"""
+Local reverse image search index
+
+Stores perceptual hashes of collected images in SQLite and answers
+"which collected images look like this one" with a BK-tree over the
+Hamming distance, visiting only a small part of the corpus per query.
+"""
+
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ...config import Config
+from .bulk_file_osint import ChunkDispatcher, iter_tasks
+from .perceptual_hash import HASH_TYPES, hamming_distance, image_hashes
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL UNIQUE,
+    ahash INTEGER NOT NULL,
+    dhash INTEGER NOT NULL,
+    phash INTEGER NOT NULL,
+    added_at REAL NOT NULL
+);
+"""
+
+
+def _to_signed(value: int) -> int:
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes
+
+    Children are keyed by their distance to the parent, so by the triangle
+    inequality a radius-r query only descends into children whose key is
+    within r of the query's distance to the node.
+    """
+
+    def __init__(self):
+        self.root: Optional[list] = None  # [hash, [ids], {distance: child}]
+        self.size = 0
+
+    def add(self, value: int, item: Any):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """
+        Items whose hash is within max_distance of value
+
+        Returns:
+            List of (distance, item), nearest first
+        """
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                found.extend((distance, item) for item in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for key, child in node[2].items() if low <= key <= high)
+        found.sort(key=lambda match: match[0])
+        return found
+
+
+def _hash_chunk(tasks) -> List[Tuple[str, Optional[Dict[str, int]], Optional[str]]]:
+    """Worker: (source, hashes, error) for a batch of image tasks"""
+    results = []
+    for display, _, path, data in tasks:
+        try:
+            results.append((display, image_hashes(path if data is None else io.BytesIO(data)), None))
+        except Exception as e:
+            results.append((display, None, str(e)))
+    return results
+
+
+class ImageHashIndex:
+    """
+    SQLite-backed perceptual hash index
+
+    One BK-tree per hash type is built from the table on first search and
+    kept up to date as images are added.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.IMAGE_INDEX_PATH
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._trees: Dict[str, BKTree] = {}
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self.conn.close()
+
+    def count(self) -> int:
+        """Number of indexed images"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def _tree(self, hash_type: str) -> BKTree:
+        if hash_type not in HASH_TYPES:
+            raise ValueError(f"Unknown hash type: {hash_type}")
+        tree = self._trees.get(hash_type)
+        if tree is None:
+            tree = BKTree()
+            for row_id, value in self.conn.execute(f"SELECT id, {hash_type} FROM images"):
+                tree.add(_to_unsigned(value), row_id)
+            self._trees[hash_type] = tree
+            logger.debug(f"Built {hash_type} BK-tree over {tree.size} images")
+        return tree
+
+    def add_hashes(self, entries: Iterable[Tuple[str, Dict[str, int]]]) -> int:
+        """
+        Store precomputed hashes in a single transaction
+
+        Args:
+            entries: (source, {"ahash", "dhash", "phash"}) pairs; a source
+                     already in the index is re-hashed in place
+
+        Returns:
+            Number of images written
+        """
+        written = 0
+        with self._lock, self.conn:
+            for source, hashes in entries:
+                values = [_to_signed(hashes[t]) for t in HASH_TYPES]
+                row = self.conn.execute("SELECT id FROM images WHERE source = ?", (source,)).fetchone()
+                if row is not None:
+                    self.conn.execute("UPDATE images SET ahash = ?, dhash = ?, phash = ? WHERE id = ?",
+                                      values + [row[0]])
+                    # Trees cannot drop a node; rebuild them on the next search
+                    self._trees.clear()
+                else:
+                    cur = self.conn.execute(
+                        "INSERT INTO images (source, ahash, dhash, phash, added_at) VALUES (?, ?, ?, ?, ?)",
+                        [source] + values + [time.time()]
+                    )
+                    for hash_type, tree in self._trees.items():
+                        tree.add(hashes[hash_type], cur.lastrowid)
+                written += 1
+        return written
+
+    def add_image(self, image, source: str = None) -> Dict[str, int]:
+        """
+        Hash and index one image
+
+        Args:
+            image: Path or file-like object
+            source: Where the image was collected (URL or path; defaults to the path)
+
+        Returns:
+            The image's hashes
+        """
+        hashes = image_hashes(image)
+        self.add_hashes([(source or str(image), hashes)])
+        return hashes
+
+    def index_tree(self, root: str, workers: int = None, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Hash every image in a directory tree or archive and add it to the index
+
+        Args:
+            root: File, directory or archive
+            workers: Hashing processes (default: os.cpu_count())
+            batch_size: Images written per transaction
+
+        Returns:
+            Counts of images indexed and failed
+        """
+        counts = {"indexed": 0, "errors": 0}
+        batch = []
+        for source, hashes, error in _hash_tree(root, workers):
+            if error:
+                logger.warning(f"Could not hash {source}: {error}")
+                counts["errors"] += 1
+                continue
+            batch.append((source, hashes))
+            if len(batch) >= batch_size:
+                counts["indexed"] += self.add_hashes(batch)
+                batch = []
+        if batch:
+            counts["indexed"] += self.add_hashes(batch)
+        logger.info(f"Indexed {counts['indexed']} images from {root}")
+        return counts
+
+    def search(self, image, max_distance: int = 10, hash_type: str = "phash",
+               limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Find indexed images that look like the query image
+
+        Args:
+            image: Path, file-like object, or precomputed hashes dict
+            max_distance: Largest Hamming distance (out of 64 bits) reported
+            hash_type: Hash used for matching ('ahash', 'dhash' or 'phash')
+            limit: Maximum number of matches
+
+        Returns:
+            Matches nearest first: {"source", "distance", "distances"}, where
+            "distances" holds the distance under every hash type
+        """
+        hashes = image if isinstance(image, dict) else image_hashes(image)
+        with self._lock:
+            matches = self._tree(hash_type).search(hashes[hash_type], max_distance)[:limit]
+            results = []
+            for distance, row_id in matches:
+                row = self.conn.execute(
+                    "SELECT source, ahash, dhash, phash FROM images WHERE id = ?", (row_id,)
+                ).fetchone()
+                if row is None:
+                    continue
+                results.append({
+                    "source": row[0],
+                    "distance": distance,
+                    "distances": {t: hamming_distance(hashes[t], _to_unsigned(v)) for t, v in zip(HASH_TYPES, row[1:])},
+                })
+        return results
+
+
+def _hash_tree(root: str, workers: int = None) -> Iterator[Tuple[str, Optional[Dict[str, int]], Optional[str]]]:
+    """Hash the images under root on a process pool, a bounded number of batches at a time"""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        dispatcher = ChunkDispatcher(pool, _hash_chunk, workers * 4)
+        # Documents inside archives are never read
+        for task, skipped in iter_tasks(root, kinds={"image"}):
+            if skipped:
+                yield task[0], None, skipped
+                continue
+            yield from dispatcher.add(task)
+        yield from dispatcher.finish()
+
+
+_default_index: Optional[ImageHashIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_default_index() -> ImageHashIndex:
+    """Shared index at Config.IMAGE_INDEX_PATH"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None or _default_index.db_path != Config.IMAGE_INDEX_PATH:
+            _default_index = ImageHashIndex()
+        return _default_index
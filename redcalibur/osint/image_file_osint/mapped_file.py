@@ -0,0 +1,40 @@
+"""
+Memory-mapped file access
+
+Metadata readers index into the mapping directly, so only the pages
+holding headers and metadata are ever read from disk.
+"""
+
+import mmap
+from contextlib import contextmanager
+from typing import Iterator, Union
+
+
+@contextmanager
+def mapped_bytes(source) -> Iterator[Union[bytes, mmap.mmap]]:
+    """
+    Bytes-like view of a file
+
+    Args:
+        source: Path, or a file-like object (e.g. an archive member in a BytesIO)
+
+    Yields:
+        A read-only mmap for paths, the object's bytes otherwise
+    """
+    if hasattr(source, "getvalue"):
+        yield source.getvalue()
+        return
+    if hasattr(source, "read"):
+        yield source.read()
+        return
+
+    with open(source, "rb") as fh:
+        try:
+            mapping = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            yield b""
+            return
+        try:
+            yield mapping
+        finally:
+            mapping.close()
@@ -0,0 +1,464 @@
+"""
+Header-only PDF metadata reader
+
+Reads the Info dictionary and XMP packet of a PDF without loading the
+document: the trailer is found from the startxref pointer at the end of
+the file, and only the cross-reference entries and objects leading to
+the metadata are parsed. Classic xref tables, xref streams, object
+streams and incremental updates are supported.
+"""
+
+import logging
+import re
+import zlib
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .mapped_file import mapped_bytes
+
+logger = logging.getLogger(__name__)
+
+# How far from the end of the file startxref is searched for
+TAIL_BYTES = 4096
+# Cross-reference sections followed through /Prev before giving up
+MAX_XREF_SECTIONS = 64
+
+_DELIMITERS = rb"\x00\t\n\x0c\r ()<>\[\]{}/%"
+_WHITESPACE = re.compile(rb"(?:[\x00\t\n\x0c\r ]+|%[^\r\n]*)*")
+_REF = re.compile(rb"(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+R(?![^" + _DELIMITERS + rb"])")
+_NUMBER = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_NAME = re.compile(rb"/([^" + _DELIMITERS + rb"]*)")
+_KEYWORD = re.compile(rb"[A-Za-z]+")
+_NAME_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+_STRING_SPECIAL = re.compile(rb"[\\()]")
+_OBJ_HEADER = re.compile(rb"[\x00\t\n\x0c\r ]*(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+obj")
+_STREAM_START = re.compile(rb"[\x00\t\n\x0c\r ]*stream\r?\n")
+_STARTXREF = re.compile(rb"startxref[\x00\t\n\x0c\r ]+(\d+)")
+_XREF_SUBSECTION = re.compile(rb"[\x00\t\n\x0c\r ]*(\d+)[ \t]+(\d+)[ \t]*\r?\n?")
+_XREF_ENTRY = re.compile(rb"(\d{10})[ \t](\d{5})[ \t]([nf])[\x00\t\n\x0c\r ]{0,2}")
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f",
+            b"(": b"(", b")": b")", b"\\": b"\\"}
+
+XMP_NAMESPACES = {
+    "http://purl.org/dc/elements/1.1/": "dc",
+    "http://ns.adobe.com/xap/1.0/": "xmp",
+    "http://ns.adobe.com/xap/1.0/mm/": "xmpMM",
+    "http://ns.adobe.com/pdf/1.3/": "pdf",
+    "http://ns.adobe.com/photoshop/1.0/": "photoshop",
+    "http://ns.adobe.com/xap/1.0/rights/": "xmpRights",
+}
+_RDF = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}"
+
+
+class PdfStructureError(ValueError):
+    """Raised when the file's structure cannot be followed to its metadata."""
+
+
+class Ref(NamedTuple):
+    num: int
+    gen: int
+
+
+class Name(str):
+    """A PDF name (kept distinct from text strings)"""
+
+
+class Stream(NamedTuple):
+    attrs: Dict[str, Any]
+    start: int  # offset of the raw stream data
+
+
+class _Parser:
+    """Recursive-descent parser for PDF objects in a bytes-like buffer"""
+
+    def __init__(self, buf):
+        self.buf = buf
+
+    def skip(self, pos: int) -> int:
+        return _WHITESPACE.match(self.buf, pos).end()
+
+    def parse(self, pos: int) -> Tuple[Any, int]:
+        """Parse one object at pos; returns (value, position after it)"""
+        buf = self.buf
+        pos = self.skip(pos)
+        head = buf[pos:pos + 2]
+        if head == b"<<":
+            return self._dict(pos + 2)
+        if head[:1] == b"<":
+            end = buf.find(b">", pos)
+            if end < 0:
+                raise PdfStructureError("Unterminated hex string")
+            digits = re.sub(rb"[^0-9A-Fa-f]", b"", buf[pos + 1:end])
+            return bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode()), end + 1
+        if head[:1] == b"(":
+            return self._literal(pos + 1)
+        if head[:1] == b"[":
+            items = []
+            pos = self.skip(pos + 1)
+            while buf[pos:pos + 1] != b"]":
+                if pos >= len(buf):
+                    raise PdfStructureError("Unterminated array")
+                value, pos = self.parse(pos)
+                items.append(value)
+                pos = self.skip(pos)
+            return items, pos + 1
+        if head[:1] == b"/":
+            match = _NAME.match(buf, pos)
+            return Name(_NAME_ESCAPE.sub(lambda m: bytes.fromhex(m.group(1).decode()),
+                                         match.group(1)).decode("latin-1")), match.end()
+        match = _REF.match(buf, pos)
+        if match:
+            return Ref(int(match.group(1)), int(match.group(2))), match.end()
+        match = _NUMBER.match(buf, pos)
+        if match:
+            text = match.group()
+            return (float(text) if b"." in text else int(text)), match.end()
+        match = _KEYWORD.match(buf, pos)
+        if match and match.group() in (b"true", b"false", b"null"):
+            return {b"true": True, b"false": False, b"null": None}[match.group()], match.end()
+        raise PdfStructureError(f"Unexpected token at offset {pos}")
+
+    def _dict(self, pos: int) -> Tuple[Dict[str, Any], int]:
+        buf = self.buf
+        result = {}
+        pos = self.skip(pos)
+        while buf[pos:pos + 2] != b">>":
+            key, pos = self.parse(pos)
+            if not isinstance(key, Name):
+                raise PdfStructureError(f"Dictionary key is not a name at offset {pos}")
+            result[str(key)], pos = self.parse(pos)
+            pos = self.skip(pos)
+        return result, pos + 2
+
+    def _literal(self, pos: int) -> Tuple[bytes, int]:
+        buf = self.buf
+        out = []
+        depth = 1
+        while True:
+            match = _STRING_SPECIAL.search(buf, pos)
+            if match is None:
+                raise PdfStructureError("Unterminated string")
+            out.append(buf[pos:match.start()])
+            char = match.group()
+            pos = match.end()
+            if char == b"(":
+                depth += 1
+                out.append(char)
+            elif char == b")":
+                depth -= 1
+                if depth == 0:
+                    return b"".join(out), pos
+                out.append(char)
+            else:
+                escaped = buf[pos:pos + 1]
+                if escaped in _ESCAPES:
+                    out.append(_ESCAPES[escaped])
+                    pos += 1
+                elif escaped and escaped in b"01234567":
+                    octal = re.match(rb"[0-7]{1,3}", buf[pos:pos + 3]).group()
+                    out.append(bytes([int(octal, 8) & 0xFF]))
+                    pos += len(octal)
+                elif escaped in (b"\r", b"\n"):  # line continuation
+                    pos += 2 if buf[pos:pos + 2] == b"\r\n" else 1
+                else:
+                    out.append(escaped)
+                    pos += 1
+
+
+def _png_unpredict(data: bytes, columns: int) -> bytes:
+    """Undo the PNG row predictors used by xref and object streams"""
+    row_size = columns + 1
+    rows = np.frombuffer(data, dtype=np.uint8)[:len(data) // row_size * row_size].reshape(-1, row_size)
+    if rows.size and (rows[:, 0] == 2).all():
+        # All rows use the Up predictor (the common case): a column-wise running sum mod 256
+        return np.cumsum(rows[:, 1:], axis=0, dtype=np.uint8).tobytes()
+
+    previous = bytearray(columns)
+    out = bytearray()
+    for start in range(0, len(data) - row_size + 1, row_size):
+        kind, row = data[start], bytearray(data[start + 1:start + row_size])
+        if kind == 1:
+            for i in range(1, columns):
+                row[i] = (row[i] + row[i - 1]) & 0xFF
+        elif kind == 2:
+            for i in range(columns):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif kind != 0:
+            raise PdfStructureError(f"Unsupported PNG predictor {kind}")
+        out += row
+        previous = row
+    return bytes(out)
+
+
+class PdfMetadataReader:
+    """Follows a PDF's trailer to its Info dictionary and XMP metadata"""
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.parser = _Parser(buf)
+        self.trailer: Dict[str, Any] = {}
+        self._sections: List[Tuple[str, Any]] = []  # ("table", [(first, count, offset, entry_size)]) / ("stream", ...)
+        self._objstm_cache: Dict[int, Tuple[_Parser, Dict[int, int]]] = {}
+        self._load_xref()
+
+    # Cross-reference sections
+
+    def _load_xref(self) -> None:
+        match = None
+        for match in _STARTXREF.finditer(self.buf, max(0, len(self.buf) - TAIL_BYTES)):
+            pass
+        if match is None:
+            raise PdfStructureError("No startxref pointer")
+
+        offset: Optional[int] = int(match.group(1))
+        seen = set()
+        while offset is not None and offset not in seen and len(seen) < MAX_XREF_SECTIONS:
+            seen.add(offset)
+            trailer = self._read_section(offset)
+            for key, value in trailer.items():
+                if key not in ("Prev", "XRefStm"):
+                    self.trailer.setdefault(key, value)
+            if isinstance(trailer.get("XRefStm"), int) and trailer["XRefStm"] not in seen:
+                seen.add(trailer["XRefStm"])
+                self._read_section(trailer["XRefStm"])
+            offset = trailer.get("Prev")
+
+    def _read_section(self, offset: int) -> Dict[str, Any]:
+        pos = self.parser.skip(offset)
+        if self.buf[pos:pos + 4] == b"xref":
+            return self._read_table(pos + 4)
+        obj, _ = self._object_at(offset)
+        if not isinstance(obj, Stream) or obj.attrs.get("Type") != "XRef":
+            raise PdfStructureError(f"No cross-reference section at offset {offset}")
+        self._sections.append(("stream", (obj.attrs, self._stream_data(obj))))
+        return obj.attrs
+
+    def _read_table(self, pos: int) -> Dict[str, Any]:
+        """Index the subsections of an xref table without reading their entries"""
+        subsections = []
+        while True:
+            match = _XREF_SUBSECTION.match(self.buf, pos)
+            if match is None:
+                break
+            first, count = int(match.group(1)), int(match.group(2))
+            entry = _XREF_ENTRY.match(self.buf, match.end())
+            entry_size = entry.end() - entry.start() if entry else 20
+            subsections.append((first, count, match.end(), entry_size))
+            pos = match.end() + count * entry_size
+        pos = self.parser.skip(pos)
+        if self.buf[pos:pos + 7] != b"trailer":
+            raise PdfStructureError("Missing trailer after xref table")
+        trailer, _ = self.parser.parse(pos + 7)
+        self._sections.append(("table", subsections))
+        return trailer
+
+    def _locate(self, num: int) -> Optional[Tuple[int, int]]:
+        """(1, offset) for a plain object, (2, object stream number) / index, or None"""
+        for kind, section in self._sections:
+            if kind == "table":
+                for first, count, start, entry_size in section:
+                    if first <= num < first + count:
+                        entry = _XREF_ENTRY.match(self.buf, start + (num - first) * entry_size)
+                        if entry is None:
+                            raise PdfStructureError(f"Malformed xref entry for object {num}")
+                        if entry.group(3) == b"n":
+                            return 1, int(entry.group(1))
+                        break  # free here; a hybrid file's xref stream may hold it
+            else:
+                attrs, data = section
+                widths = attrs.get("W", [1, 2, 1])
+                index = attrs.get("Index", [0, attrs.get("Size", 0)])
+                row_size = sum(widths)
+                row = 0
+                for first, count in zip(index[0::2], index[1::2]):
+                    if first <= num < first + count:
+                        at = (row + num - first) * row_size
+                        fields = []
+                        for width in widths:
+                            fields.append(int.from_bytes(data[at:at + width], "big"))
+                            at += width
+                        kind_field = fields[0] if widths[0] else 1
+                        if kind_field == 1:
+                            return 1, fields[1]
+                        if kind_field == 2:
+                            return 2, (fields[1], fields[2])
+                        break
+                    row += count
+        return None
+
+    # Objects
+
+    def _object_at(self, offset: int) -> Tuple[Any, int]:
+        header = _OBJ_HEADER.match(self.buf, offset)
+        if header is None:
+            raise PdfStructureError(f"No object at offset {offset}")
+        value, pos = self.parser.parse(header.end())
+        if isinstance(value, dict):
+            stream = _STREAM_START.match(self.buf, pos)
+            if stream:
+                return Stream(value, stream.end()), stream.end()
+        return value, pos
+
+    def resolve(self, value: Any, depth: int = 0) -> Any:
+        """Follow indirect references to the object they name"""
+        while isinstance(value, Ref):
+            if depth > 16:
+                raise PdfStructureError("Reference chain too deep")
+            depth += 1
+            location = self._locate(value.num)
+            if location is None:
+                return None
+            kind, where = location
+            if kind == 1:
+                value, _ = self._object_at(where)
+            else:
+                value = self._from_object_stream(*where)
+        return value
+
+    def _from_object_stream(self, stream_num: int, index: int) -> Any:
+        if stream_num not in self._objstm_cache:
+            stream = self.resolve(Ref(stream_num, 0))
+            if not isinstance(stream, Stream):
+                raise PdfStructureError(f"Object {stream_num} is not an object stream")
+            data = self._stream_data(stream)
+            count, first = stream.attrs.get("N", 0), stream.attrs.get("First", 0)
+            numbers = [int(n) for n in data[:first].split()[:count * 2]]
+            self._objstm_cache[stream_num] = (_Parser(data), {i: first + numbers[2 * i + 1]
+                                                              for i in range(len(numbers) // 2)})
+        parser, offsets = self._objstm_cache[stream_num]
+        if index not in offsets:
+            raise PdfStructureError(f"Object stream {stream_num} has no entry {index}")
+        return parser.parse(offsets[index])[0]
+
+    def _stream_data(self, stream: Stream) -> bytes:
+        length = self.resolve(stream.attrs.get("Length"), depth=1)
+        if not isinstance(length, int):
+            end = self.buf.find(b"endstream", stream.start)
+            length = (end if end >= 0 else len(self.buf)) - stream.start
+        data = bytes(self.buf[stream.start:stream.start + length])
+
+        filters = stream.attrs.get("Filter") or []
+        params = stream.attrs.get("DecodeParms") or {}
+        if not isinstance(filters, list):
+            filters, params = [filters], [params]
+        elif not isinstance(params, list):
+            params = [params]
+        for name, param in zip(filters, params + [{}] * len(filters)):
+            if name not in ("FlateDecode", "Fl"):
+                raise PdfStructureError(f"Unsupported stream filter {name}")
+            param = self.resolve(param) or {}
+            try:
+                data = zlib.decompressobj().decompress(data)
+                if isinstance(param, dict) and param.get("Predictor", 1) >= 10:
+                    data = _png_unpredict(data, param.get("Columns", 1))
+            except (zlib.error, ValueError, TypeError) as e:
+                raise PdfStructureError(f"Undecodable stream: {e}") from e
+        return data
+
+    # Metadata
+
+    def info(self) -> Dict[str, Any]:
+        """The document Info dictionary as {"/Key": value}"""
+        info = self.resolve(self.trailer.get("Info"))
+        if not isinstance(info, dict):
+            return {}
+        return {f"/{key}": _to_python(self.resolve(value)) for key, value in info.items()}
+
+    def xmp(self) -> Dict[str, Any]:
+        """Simple properties of the document-level XMP packet as {"prefix:Name": value}"""
+        catalog = self.resolve(self.trailer.get("Root"))
+        stream = self.resolve(catalog.get("Metadata")) if isinstance(catalog, dict) else None
+        if not isinstance(stream, Stream):
+            return {}
+        return parse_xmp(self._stream_data(stream))
+
+
+def _decode_text(value: bytes) -> str:
+    if value[:2] == b"\xfe\xff":
+        return value[2:].decode("utf-16-be", errors="replace")
+    if value[:3] == b"\xef\xbb\xbf":
+        return value[3:].decode("utf-8", errors="replace")
+    return value.decode("latin-1")
+
+
+def _to_python(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return _decode_text(value)
+    if isinstance(value, Name):
+        return f"/{value}"
+    if isinstance(value, list):
+        return [_to_python(v) for v in value]
+    if isinstance(value, (Ref, Stream, dict)):
+        return None
+    return value
+
+
+def _qualified(tag: str) -> str:
+    if tag.startswith("{"):
+        namespace, _, local = tag[1:].partition("}")
+        return f"{XMP_NAMESPACES.get(namespace, namespace)}:{local}"
+    return tag
+
+
+def parse_xmp(packet: bytes) -> Dict[str, Any]:
+    """Flatten the simple and array-valued properties of an XMP packet"""
+    start, end = packet.find(b"<x:xmpmeta"), packet.rfind(b"</x:xmpmeta>")
+    if start >= 0 and end > start:
+        packet = packet[start:end + len(b"</x:xmpmeta>")]
+    try:
+        root = ET.fromstring(packet)
+    except ET.ParseError:
+        return {}
+
+    properties: Dict[str, Any] = {}
+    for description in root.iter(f"{_RDF}Description"):
+        for attribute, value in description.attrib.items():
+            if not attribute.startswith(_RDF):
+                properties[_qualified(attribute)] = value
+        for prop in description:
+            items = [li.text or "" for li in prop.iter(f"{_RDF}li")]
+            if items:
+                properties[_qualified(prop.tag)] = items[0] if len(items) == 1 else items
+            elif len(prop) == 0:
+                properties[_qualified(prop.tag)] = (prop.text or "").strip()
+    return properties
+
+
+def read_pdf_metadata(source) -> Dict[str, Any]:
+    """
+    Read a PDF's Info dictionary and XMP metadata
+
+    Args:
+        source: Path or file-like object
+
+    Returns:
+        {"/Key": value} from the Info dictionary, plus "xmp" when the
+        document carries an XMP packet
+
+    Raises:
+        PdfStructureError: If the trailer or metadata objects cannot be
+            located or decoded
+    """
+    with mapped_bytes(source) as buf:
+        if buf[:1024].find(b"%PDF-") < 0:
+            raise PdfStructureError("Not a PDF file")
+        try:
+            reader = PdfMetadataReader(buf)
+            if "Encrypt" in reader.trailer:
+                raise PdfStructureError("Document is encrypted")
+            metadata = reader.info()
+        except PdfStructureError:
+            raise
+        except (ValueError, TypeError, IndexError, KeyError, AttributeError, RecursionError) as e:
+            # Malformed objects the parser walked into; let callers fall back to a full parse
+            raise PdfStructureError(f"Malformed PDF structure: {e}") from e
+        try:
+            xmp = reader.xmp()
+        except (ValueError, TypeError, IndexError, KeyError, AttributeError) as e:
+            logger.debug(f"Skipping unreadable XMP packet: {e}")
+            xmp = {}
+        if xmp:
+            metadata["xmp"] = xmp
+        return metadata
@@ -0,0 +1,91 @@
+"""
+Perceptual image hashes
+
+64-bit average (aHash), difference (dHash) and DCT (pHash) hashes.
+Visually similar images get hashes a small Hamming distance apart, so
+resized, recompressed or lightly edited copies can be matched.
+"""
+
+from typing import Dict
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8  # hashes are HASH_SIZE * HASH_SIZE bits
+PHASH_SIZE = 32  # pHash takes the DCT of a 32x32 thumbnail
+HASH_TYPES = ("ahash", "dhash", "phash")
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so dct(x) = M @ x @ M.T"""
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT = _dct_matrix(PHASH_SIZE)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(bool).ravel()).tobytes(), "big")
+
+
+def _grayscale(image: Image.Image, size) -> np.ndarray:
+    return np.asarray(image.convert("L").resize(size, Image.LANCZOS), dtype=np.float64)
+
+
+def _open(image) -> Image.Image:
+    """Open a path or file-like object, letting JPEGs decode at reduced size"""
+    if isinstance(image, Image.Image):
+        return image
+    opened = Image.open(image)
+    # Thumbnails this small only need a 1/8-scale JPEG decode
+    opened.draft("L", (PHASH_SIZE * 2, PHASH_SIZE * 2))
+    return opened
+
+
+def average_hash(image: Image.Image) -> int:
+    pixels = _grayscale(image, (HASH_SIZE, HASH_SIZE))
+    return _bits_to_int(pixels > pixels.mean())
+
+
+def difference_hash(image: Image.Image) -> int:
+    pixels = _grayscale(image, (HASH_SIZE + 1, HASH_SIZE))
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    pixels = _grayscale(image, (PHASH_SIZE, PHASH_SIZE))
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE]
+    # The DC term only reflects overall brightness
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+def image_hashes(image) -> Dict[str, int]:
+    """
+    Compute all hash types from one decode of the image
+
+    Args:
+        image: Path, file-like object or PIL image
+
+    Returns:
+        {"ahash": int, "dhash": int, "phash": int}
+    """
+    opened = _open(image)
+    try:
+        gray = opened.convert("L")
+        # Cheap box pre-shrink so the resampling filter runs on a small image
+        gray.thumbnail((PHASH_SIZE * 4, PHASH_SIZE * 4), Image.BOX)
+        return {
+            "ahash": average_hash(gray),
+            "dhash": difference_hash(gray),
+            "phash": perceptual_hash(gray),
+        }
+    finally:
+        if opened is not image:
+            opened.close()
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
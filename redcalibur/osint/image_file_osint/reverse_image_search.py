@@ -1,12 +1,19 @@
-def perform_reverse_image_search(image_path):
+from .image_index import get_default_index
+
+def perform_reverse_image_search(image_path, max_distance=10, limit=20):
     """
-    Perform a reverse image search using online services.
+    Perform a reverse image search against the local perceptual-hash index.
+
+    Images are added to the index with 'redcalibur file-osint index-images';
+    no network access is needed to search it.
 
     Args:
         image_path (str): The path to the image file.
+        max_distance (int): Largest pHash Hamming distance (of 64 bits) counted as a match.
+        limit (int): Maximum number of matches.
 
     Returns:
-        list: A list of URLs where the image appears.
+        list: Sources (URLs or paths) of matching indexed images, most similar first.
     """
-    # Placeholder implementation
-    return ["https://example.com/image1", "https://example.com/image2"]
+    matches = get_default_index().search(image_path, max_distance=max_distance, limit=limit)
+    return [match["source"] for match in matches]
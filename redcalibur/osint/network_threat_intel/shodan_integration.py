@@ -1,5 +1,7 @@
 import shodan
 
+from ..shodan_integration import get_client
+
 def perform_shodan_scan(api_key, target):
     """
     Perform a Shodan scan for the given target.
@@ -12,8 +14,7 @@ def perform_shodan_scan(api_key, target):
         dict: A dictionary containing Shodan scan results.
     """
     try:
-        api = shodan.Shodan(api_key)
-        result = api.host(target)
+        result = get_client(api_key).host(target)
         return result
     except shodan.APIError as e:
         return {"error": str(e)}
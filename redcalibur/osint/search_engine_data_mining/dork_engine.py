@@ -0,0 +1,253 @@
+"""
+Dork execution engine
+
+Runs search-engine dork queries paced by per-engine rate limits, caches
+result links by normalized query, and extracts links from result pages
+with precompiled patterns instead of building a parse tree.
+"""
+
+import base64
+import html
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Pattern
+from urllib.parse import parse_qs, quote_plus, urlparse
+
+import requests
+
+from ...cache import get_cache
+from ...config import Config
+from ...ratelimit import SlidingWindowLimiter, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"
+)
+DEFAULT_TIMEOUT = 10.0
+RETRY_STATUSES = {429, 503}
+
+
+class DorkError(Exception):
+    """Raised when a search engine refuses or fails a query."""
+
+
+@dataclass(frozen=True)
+class SearchEngine:
+    """How to query one search engine and pull result links out of its HTML"""
+    name: str
+    search_url: str  # template with {query} (URL-encoded) and {num}
+    link_pattern: Pattern  # group "href" is a result link
+    requests_per_minute: int
+    exclude_hosts: Pattern  # the engine's own links
+    block_pattern: Optional[Pattern] = None  # captcha / "unusual traffic" pages
+    redirect_param: Optional[str] = None  # query parameter carrying the real URL of a redirect link
+    redirect_prefix: Optional[str] = None  # marks a base64-encoded redirect target
+
+
+ENGINES: Dict[str, SearchEngine] = {
+    "google": SearchEngine(
+        name="google",
+        search_url="https://www.google.com/search?q={query}&num={num}&hl=en",
+        link_pattern=re.compile(r'<a\b[^>]*?\bhref="(?P<href>/url\?[^"]+|https?://[^"]+)"'),
+        requests_per_minute=10,
+        exclude_hosts=re.compile(r"(?:^|\.)(?:google|gstatic|googleusercontent|googleadservices)\.", re.I),
+        block_pattern=re.compile(r"/sorry/|unusual traffic from your computer", re.I),
+        redirect_param="q",
+    ),
+    "bing": SearchEngine(
+        name="bing",
+        search_url="https://www.bing.com/search?q={query}&count={num}",
+        link_pattern=re.compile(r'<h2[^>]*>\s*<a\b[^>]*?\bhref="(?P<href>https?://[^"]+)"'),
+        requests_per_minute=20,
+        exclude_hosts=re.compile(r"(?:^|\.)(?:bing|microsoft|msn)\.com$", re.I),
+        block_pattern=re.compile(r'id="b_captcha"|/turing/captcha', re.I),
+        redirect_param="u",
+        redirect_prefix="a1",
+    ),
+    "duckduckgo": SearchEngine(
+        name="duckduckgo",
+        search_url="https://html.duckduckgo.com/html/?q={query}",
+        link_pattern=re.compile(r'<a\b[^>]*?\bclass="result__a"[^>]*?\bhref="(?P<href>[^"]+)"'),
+        requests_per_minute=20,
+        exclude_hosts=re.compile(r"(?:^|\.)duckduckgo\.com$", re.I),
+        block_pattern=re.compile(r"anomaly-modal|Unfortunately, bots use DuckDuckGo", re.I),
+        redirect_param="uddg",
+    ),
+}
+
+_OPERATORS = {"OR", "AND"}
+
+_limiters: Dict[str, SlidingWindowLimiter] = {}
+_limiters_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def engine_limiter(engine: SearchEngine) -> SlidingWindowLimiter:
+    """Process-wide limiter for one engine"""
+    with _limiters_lock:
+        limiter = _limiters.get(engine.name)
+        if limiter is None or limiter.max_calls != engine.requests_per_minute:
+            limiter = _limiters[engine.name] = SlidingWindowLimiter(engine.requests_per_minute, 60)
+        return limiter
+
+
+def _get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.8"})
+        return _session
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a dork used as the cache key
+
+    Whitespace is collapsed and everything is lowercased except the
+    boolean operators OR / AND, whose case matters to search engines.
+    """
+    return " ".join(token if token in _OPERATORS else token.lower() for token in (query or "").split())
+
+
+def _decode_href(engine: SearchEngine, href: str) -> Optional[str]:
+    """Resolve an engine redirect link to its target URL"""
+    href = html.unescape(href)
+    if href.startswith("//"):
+        href = "https:" + href
+    parsed = urlparse(href)
+    if engine.redirect_param and (not parsed.netloc or engine.exclude_hosts.search(parsed.hostname or "")):
+        target = parse_qs(parsed.query).get(engine.redirect_param, [None])[0]
+        if target and engine.redirect_prefix and target.startswith(engine.redirect_prefix):
+            encoded = target[len(engine.redirect_prefix):]
+            try:
+                target = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode()
+            except (ValueError, UnicodeDecodeError):
+                return None
+        if target:
+            href = target
+    return href if href.startswith(("http://", "https://")) else None
+
+
+def parse_results(engine: SearchEngine, page: str, limit: int = 10) -> List[str]:
+    """
+    Extract result links from a search results page
+
+    Args:
+        engine: Engine the page came from
+        page: Results page HTML
+        limit: Maximum number of links
+
+    Returns:
+        Unique result URLs in page order, excluding the engine's own links
+    """
+    results: List[str] = []
+    seen = set()
+    for match in engine.link_pattern.finditer(page):
+        url = _decode_href(engine, match.group("href"))
+        if not url or url in seen or engine.exclude_hosts.search(urlparse(url).hostname or ""):
+            continue
+        seen.add(url)
+        results.append(url)
+        if len(results) >= limit:
+            break
+    return results
+
+
+def search(query: str, engine: str = "google", num_results: int = 10, use_cache: bool = True) -> List[str]:
+    """
+    Run one dork query against one engine
+
+    Args:
+        query: Dork query (e.g., 'site:example.com filetype:pdf')
+        engine: Key of ENGINES
+        num_results: Number of result links wanted
+        use_cache: Reuse results cached within Config.DORK_CACHE_TTL
+
+    Returns:
+        List of result URLs
+
+    Raises:
+        DorkError: Unknown engine, request failure, or the engine blocked the query
+    """
+    spec = ENGINES.get(engine)
+    if spec is None:
+        raise DorkError(f"Unsupported search engine: {engine}")
+
+    cache = get_cache("dork_results", Config.DORK_CACHE_TTL)
+    key = f"{spec.name}:{num_results}:{normalize_query(query)}"
+    if use_cache:
+        entry = cache.get(key)
+        if entry is not None and entry.fresh:
+            return entry.value
+
+    url = spec.search_url.format(query=quote_plus(query), num=num_results)
+    for attempt in range(Config.MAX_RETRIES + 1):
+        engine_limiter(spec).acquire()
+        try:
+            response = _get_session().get(url, timeout=DEFAULT_TIMEOUT)
+        except requests.RequestException as e:
+            if attempt < Config.MAX_RETRIES:
+                time.sleep(backoff_delay(attempt, base=Config.REQUEST_DELAY))
+                continue
+            raise DorkError(f"{spec.name} request failed: {e}")
+        if response.status_code in RETRY_STATUSES and attempt < Config.MAX_RETRIES:
+            time.sleep(backoff_delay(attempt, base=Config.REQUEST_DELAY,
+                                     retry_after=response.headers.get("Retry-After")))
+            continue
+        break
+
+    if response.status_code != 200:
+        raise DorkError(f"{spec.name} returned HTTP {response.status_code}")
+    if spec.block_pattern is not None and spec.block_pattern.search(response.text):
+        raise DorkError(f"{spec.name} blocked the query (captcha)")
+
+    results = parse_results(spec, response.text, num_results)
+    cache.set(key, results)
+    return results
+
+
+def run_dorks(queries: Iterable[str], engines: Iterable[str] = ("google",), num_results: int = 10,
+              use_cache: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Run many dork queries across engines
+
+    Engines are queried concurrently; queries to the same engine are paced
+    by its rate limit.
+
+    Args:
+        queries: Dork queries
+        engines: Keys of ENGINES to query
+        num_results: Number of result links wanted per query
+        use_cache: Reuse results cached within Config.DORK_CACHE_TTL
+
+    Returns:
+        {query: {engine: [urls] or {"error": message}}}
+    """
+    queries = list(dict.fromkeys(queries))
+    engines = list(dict.fromkeys(engines))
+    results: Dict[str, Dict[str, Any]] = {query: {} for query in queries}
+
+    def run_engine(engine):
+        answers = {}
+        for query in queries:
+            try:
+                answers[query] = search(query, engine, num_results, use_cache)
+            except DorkError as e:
+                logger.warning(f"Dork {query!r} on {engine} failed: {e}")
+                answers[query] = {"error": str(e)}
+        return engine, answers
+
+    if engines:
+        with ThreadPoolExecutor(max_workers=len(engines)) as pool:
+            for engine, answers in pool.map(run_engine, engines):
+                for query, answer in answers.items():
+                    results[query][engine] = answer
+    return results
@@ -1,31 +1,21 @@
-import requests
-from bs4 import BeautifulSoup
+from .dork_engine import search
 
 def perform_google_dorking(query, num_results=10):
     """
     Perform Google Dorking for the given query.
 
+    Requests are paced by the shared Google rate limit and results are
+    cached by normalized query (see dork_engine).
+
     Args:
         query (str): The Google Dorking query.
         num_results (int): Number of results to fetch.
 
     Returns:
-        list: A list of URLs matching the query.
+        list: A list of URLs matching the query, or {"error": message} if
+        the search failed for any reason.
     """
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        url = f"https://www.google.com/search?q={query}&num={num_results}"
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        results = []
-        for link in soup.find_all('a'):
-            href = link.get('href')
-            if href and "http" in href:
-                results.append(href)
-
-        return results[:num_results]
+        return search(query, "google", num_results)
     except Exception as e:
         return {"error": str(e)}
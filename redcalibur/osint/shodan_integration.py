@@ -1,5 +1,124 @@
+import ipaddress
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Tuple
+
 import shodan
 
+from ..cache import SingleFlight, get_cache
+from ..config import Config
+from ..ratelimit import SlidingWindowLimiter, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Shodan's answer for IPs it has never seen; cached like a result so bulk
+# enrichment does not ask again within the TTL
+NOT_FOUND_MESSAGE = "No information available for that IP."
+
+# Matches per page of search results (each page costs one query credit)
+RESULTS_PER_PAGE = 100
+
+
+class ShodanClient:
+    """
+    Shodan API client shared by every caller using the same API key.
+
+    Requests are paced to Config.SHODAN_REQUESTS_PER_SECOND and host
+    details are kept in the persistent cache for Config.SHODAN_HOST_TTL
+    seconds.
+    """
+
+    def __init__(self, api_key: str):
+        self.api = shodan.Shodan(api_key)
+        self.limiter = SlidingWindowLimiter(Config.SHODAN_REQUESTS_PER_SECOND, 1.0)
+        self._flight = SingleFlight()
+
+    def _call(self, method, *args, **kwargs):
+        """Make one paced API call, retrying when Shodan reports its rate limit."""
+        for attempt in range(Config.MAX_RETRIES + 1):
+            self.limiter.acquire()
+            try:
+                return method(*args, **kwargs)
+            except shodan.APIError as e:
+                if "rate limit" not in str(e).lower() or attempt >= Config.MAX_RETRIES:
+                    raise
+                time.sleep(backoff_delay(attempt, base=Config.REQUEST_DELAY))
+
+    def search(self, query: str, **kwargs) -> dict:
+        """Run one search request (raises shodan.APIError)."""
+        return self._call(self.api.search, query, **kwargs)
+
+    def iter_search(self, query: str, start_page: int = 1, max_pages: int = None) -> Iterator[Tuple[int, dict]]:
+        """
+        Page through search results lazily, yielding (page number, page results).
+
+        Stops after the last page of matches or after max_pages pages.
+        """
+        page = start_page
+        while max_pages is None or page - start_page < max_pages:
+            results = self.search(query, page=page)
+            yield page, results
+            if not results.get("matches") or page * RESULTS_PER_PAGE >= results.get("total", 0):
+                return
+            page += 1
+
+    def host(self, ip: str, use_cache: bool = True) -> dict:
+        """
+        Host details for an IP, from the cache when fresh.
+
+        Raises shodan.APIError (including for IPs Shodan has no data on).
+        """
+        cache = get_cache("shodan_hosts", Config.SHODAN_HOST_TTL)
+        if use_cache:
+            entry = cache.get(ip)
+            if entry is not None and entry.fresh:
+                if "error" in entry.value:
+                    raise shodan.APIError(entry.value["error"])
+                return entry.value
+
+        def lookup():
+            try:
+                host = self._call(self.api.host, ip)
+            except shodan.APIError as e:
+                if str(e) == NOT_FOUND_MESSAGE:
+                    cache.set(ip, {"error": str(e)})
+                raise
+            cache.set(ip, host)
+            return host
+
+        # Concurrent lookups of one IP share a single request
+        return self._flight.do(ip, lookup)
+
+    def hosts(self, ips: Iterable[str], use_cache: bool = True) -> Dict[str, dict]:
+        """
+        Host details for many IPs; cached IPs cost no request.
+
+        :return: {ip: host details or {"error": message}} in input order
+        """
+        results: Dict[str, dict] = {}
+        for ip in dict.fromkeys(ips):
+            try:
+                results[ip] = self.host(ip, use_cache=use_cache)
+            except shodan.APIError as e:
+                results[ip] = {"error": str(e)}
+        return results
+
+
+_clients: Dict[str, ShodanClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str) -> ShodanClient:
+    """Shared client for an API key."""
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = ShodanClient(api_key)
+        return _clients[api_key]
+
+
 def search_shodan(api_key: str, query: str):
     """
     Search Shodan for a specific query.
@@ -8,46 +127,123 @@ def search_shodan(api_key: str, query: str):
     :param query: The search query
     :return: Search results
     """
-    api = shodan.Shodan(api_key)
-
     try:
-        results = api.search(query)
+        results = get_client(api_key).search(query)
         total = results.get('total', 0) if isinstance(results, dict) else 0
-        print(f"Results found: {total}")
-        for result in results.get('matches', []) if isinstance(results, dict) else []:
-            ip = result.get('ip_str', 'unknown')
-            print(f"IP: {ip}")
-            banner = result.get('data')
-            if banner:
-                print(banner)
-            print("")
+        logger.info(f"Shodan search {query!r}: {total} results")
         return results
 
     except shodan.APIError as e:
-        print(f"Error: {e}")
+        logger.error(f"Shodan search failed: {e}")
         return None
 
-def get_host_info(api_key: str, ip: str):
+
+def iter_search_matches(api_key: str, query: str, start_page: int = 1, max_pages: int = None) -> Iterator[dict]:
+    """
+    Yield every match of a search, fetching one page at a time.
+
+    :param api_key: Your Shodan API key
+    :param query: The search query
+    :param start_page: First page to fetch
+    :param max_pages: Stop after this many pages (default: all)
+    """
+    for _, results in get_client(api_key).iter_search(query, start_page, max_pages):
+        yield from results.get("matches", [])
+
+
+def _save_cursor(path: str, cursor: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(cursor, fh)
+    os.replace(tmp_path, path)
+
+
+def search_to_ndjson(api_key: str, query: str, output_path: str, max_pages: int = None,
+                     resume: bool = True) -> dict:
+    """
+    Stream search matches to an NDJSON file, one page in memory at a time.
+
+    Progress is kept in a cursor file next to the output (output_path +
+    ".cursor") after every page, so an interrupted or page-limited export
+    continues where it stopped instead of paying for pages again.
+
+    :param api_key: Your Shodan API key
+    :param query: The search query
+    :param output_path: NDJSON file to write (one match per line)
+    :param max_pages: Pages to fetch in this run (default: all remaining)
+    :param resume: Continue from the cursor file if it belongs to the same query
+    :return: Summary with pages fetched, matches written, total and completion state
+    """
+    cursor_path = f"{output_path}.cursor"
+    cursor = {"query": query, "next_page": 1, "written": 0, "offset": 0, "total": None, "complete": False}
+    if resume and os.path.exists(cursor_path) and os.path.exists(output_path):
+        try:
+            with open(cursor_path) as fh:
+                saved = json.load(fh)
+            if saved.get("query") == query:
+                cursor.update(saved)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cursor {cursor_path}: {e}")
+
+    summary = {"query": query, "output": output_path, "pages": 0}
+    if not cursor["complete"]:
+        try:
+            with open(output_path, "r+b" if cursor["offset"] else "wb") as out:
+                # Drop matches written after the last saved cursor
+                out.seek(cursor["offset"])
+                out.truncate()
+                for page, results in get_client(api_key).iter_search(query, cursor["next_page"], max_pages):
+                    matches = results.get("matches", [])
+                    for match in matches:
+                        out.write(json.dumps(match, default=str).encode() + b"\n")
+                    out.flush()
+                    cursor.update(next_page=page + 1, written=cursor["written"] + len(matches),
+                                  offset=out.tell(), total=results.get("total", cursor["total"]))
+                    cursor["complete"] = not matches or page * RESULTS_PER_PAGE >= (cursor["total"] or 0)
+                    _save_cursor(cursor_path, cursor)
+                    summary["pages"] += 1
+        except shodan.APIError as e:
+            logger.error(f"Shodan search {query!r} stopped at page {cursor['next_page']}: {e}")
+            summary["error"] = str(e)
+
+    summary.update(written=cursor["written"], total=cursor["total"],
+                   next_page=cursor["next_page"], complete=cursor["complete"])
+    return summary
+
+
+def get_host_info(api_key: str, ip: str, use_cache: bool = True):
     """
     Get detailed information about a specific host.
 
     :param api_key: Your Shodan API key
     :param ip: The IP address of the host
+    :param use_cache: Reuse host details fetched within Config.SHODAN_HOST_TTL
     :return: Host information
     """
-    api = shodan.Shodan(api_key)
-
     try:
-        host = api.host(ip)
-        print(f"IP: {host.get('ip_str', ip)}")
-        print(f"Organization: {host.get('org', 'n/a')}")
-        print(f"Operating System: {host.get('os', 'n/a')}")
-
-        for item in host.get('data', []) if isinstance(host, dict) else []:
-            print(f"Port: {item.get('port', 'n/a')}")
-            print(f"Banner: {item.get('data', '')}")
-        return host
+        return get_client(api_key).host(ip, use_cache=use_cache)
 
     except shodan.APIError as e:
-        print(f"Error: {e}")
-        return None
\ No newline at end of file
+        logger.error(f"Shodan host lookup for {ip} failed: {e}")
+        return None
+
+
+def get_hosts_info(api_key: str, ips: Iterable[str], use_cache: bool = True) -> Dict[str, dict]:
+    """
+    Get host information for many IPs at Shodan's one request per second.
+
+    Cached hosts are served without a request, so re-enriching large IP
+    lists only costs requests for new or expired IPs.
+
+    :param api_key: Your Shodan API key
+    :param ips: IP addresses (invalid ones and duplicates are skipped)
+    :param use_cache: Reuse host details fetched within Config.SHODAN_HOST_TTL
+    :return: {ip: host information or {"error": message}}
+    """
+    valid = []
+    for ip in ips:
+        try:
+            valid.append(str(ipaddress.ip_address(str(ip).strip())))
+        except ValueError:
+            logger.warning(f"Skipping invalid IP address: {ip!r}")
+    return get_client(api_key).hosts(valid, use_cache=use_cache)
@@ -1,5 +1,7 @@
 import shodan
 
+from .shodan_integration import get_client
+
 def perform_shodan_scan(api_key, target):
     """
     Perform a Shodan scan for the given target.
@@ -12,11 +14,8 @@ def perform_shodan_scan(api_key, target):
         dict: A dictionary containing Shodan scan results.
     """
     try:
-        # Initialize Shodan client
-        api = shodan.Shodan(api_key)
-
-        # Perform Shodan scan
-        result = api.host(target)
+        # Perform Shodan scan (shared client, cached host details)
+        result = get_client(api_key).host(target)
         return result
     except shodan.APIError as e:
         return {"error": str(e)}
@@ -0,0 +1,184 @@
+"""
+Platform signatures for username checks
+
+Each platform's probe (URL, method, headers, ranged reads) and the rules
+that decide whether a response means the profile exists: expected status
+codes, body markers and redirect targets. Signatures are loaded from
+platform_signatures.json, optionally overlaid by a user file, and their
+patterns are compiled once at load time.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Optional, Pattern
+
+from ...config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIGNATURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "platform_signatures.json")
+
+# Probe outcomes
+FOUND = "found"
+NOT_FOUND = "not_found"
+BLOCKED = "blocked"  # rate limited, login wall, or a response no rule explains
+
+# Bytes requested from platforms probed with ranged reads
+RANGE_BYTES = 4096
+
+
+def _compile_any(patterns, as_bytes: bool = False) -> Optional[Pattern]:
+    """Combine patterns into one compiled alternation (None when empty)"""
+    if not patterns:
+        return None
+    combined = "|".join(f"(?:{p})" for p in patterns)
+    return re.compile(combined.encode() if as_bytes else combined)
+
+
+@dataclass
+class PlatformSignature:
+    """How to probe one platform and interpret the response"""
+    name: str
+    url: str
+    probe_url: Optional[str] = None
+    method: str = "GET"
+    headers: Dict[str, str] = field(default_factory=dict)
+    ranged: bool = False
+    found_status: FrozenSet[int] = frozenset({200})
+    not_found_status: FrozenSet[int] = frozenset({404})
+    blocked_status: FrozenSet[int] = frozenset({429})
+    found_markers: Optional[Pattern] = None
+    not_found_markers: Optional[Pattern] = None
+    blocked_redirect: Optional[Pattern] = None
+    not_found_redirect: Optional[Pattern] = None
+    username_pattern: Optional[Pattern] = None
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> "PlatformSignature":
+        """
+        Build a signature from its JSON form
+
+        Raises:
+            ValueError: If the signature is incomplete or inconsistent
+        """
+        if "{username}" not in data.get("url", ""):
+            raise ValueError(f"Signature {name!r} needs a url containing {{username}}")
+        method = data.get("method", "GET").upper()
+        if method not in ("GET", "HEAD"):
+            raise ValueError(f"Signature {name!r} has unsupported method {method}")
+        if method == "HEAD" and (data.get("found_markers") or data.get("not_found_markers")):
+            raise ValueError(f"Signature {name!r} uses body markers with HEAD requests")
+
+        try:
+            return cls(
+                name=name,
+                url=data["url"],
+                probe_url=data.get("probe_url"),
+                method=method,
+                headers=dict(data.get("headers", {})),
+                ranged=bool(data.get("ranged", False)),
+                found_status=frozenset(data.get("found_status", [200])),
+                not_found_status=frozenset(data.get("not_found_status", [404])),
+                blocked_status=frozenset(data.get("blocked_status", [429])),
+                found_markers=_compile_any(data.get("found_markers"), as_bytes=True),
+                not_found_markers=_compile_any(data.get("not_found_markers"), as_bytes=True),
+                blocked_redirect=_compile_any(data.get("blocked_redirect") and [data["blocked_redirect"]]),
+                not_found_redirect=_compile_any(data.get("not_found_redirect") and [data["not_found_redirect"]]),
+                username_pattern=_compile_any(data.get("username_pattern") and [data["username_pattern"]]),
+            )
+        except re.error as e:
+            raise ValueError(f"Signature {name!r} has an invalid pattern: {e}")
+
+    def profile_url(self, username: str) -> str:
+        """Public profile URL reported for a found username"""
+        return self.url.format(username=username)
+
+    def request_url(self, username: str) -> str:
+        """URL actually probed (an API endpoint for some platforms)"""
+        return (self.probe_url or self.url).format(username=username)
+
+    def request_headers(self) -> Dict[str, str]:
+        headers = dict(self.headers)
+        if self.ranged:
+            headers["Range"] = f"bytes=0-{RANGE_BYTES - 1}"
+        return headers
+
+    @property
+    def reads_body(self) -> bool:
+        return self.method != "HEAD" and (self.found_markers is not None or self.not_found_markers is not None)
+
+    def accepts(self, username: str) -> bool:
+        """Whether the platform allows this username at all (no request needed if not)"""
+        return self.username_pattern is None or bool(self.username_pattern.match(username))
+
+    def classify(self, status: int, final_url: str = "", head: bytes = b"") -> str:
+        """
+        Interpret a probe response
+
+        Args:
+            status: HTTP status after redirects
+            final_url: URL after redirects
+            head: First bytes of the body (empty for HEAD requests)
+
+        Returns:
+            FOUND, NOT_FOUND or BLOCKED
+        """
+        if self.ranged and status == 206:
+            status = 200
+        if status in self.blocked_status:
+            return BLOCKED
+        if self.blocked_redirect is not None and self.blocked_redirect.search(final_url or ""):
+            return BLOCKED
+        if self.not_found_redirect is not None and self.not_found_redirect.search(final_url or ""):
+            return NOT_FOUND
+        if status in self.not_found_status:
+            return NOT_FOUND
+        if self.not_found_markers is not None and self.not_found_markers.search(head):
+            return NOT_FOUND
+        if status in self.found_status:
+            if self.found_markers is None or self.found_markers.search(head):
+                return FOUND
+        return BLOCKED
+
+
+def load_signatures(path: str = None) -> Dict[str, PlatformSignature]:
+    """
+    Load the bundled signature database, overlaid by a user file
+
+    Args:
+        path: JSON file of extra or replacement signatures
+              (defaults to Config.USERNAME_SIGNATURES_PATH, if set)
+
+    Returns:
+        Dictionary mapping lowercase platform name -> PlatformSignature
+    """
+    sources = [DEFAULT_SIGNATURES_PATH]
+    path = path or Config.USERNAME_SIGNATURES_PATH
+    if path:
+        sources.append(path)
+
+    signatures: Dict[str, PlatformSignature] = {}
+    for source in sources:
+        with open(source, encoding="utf-8") as fh:
+            data = json.load(fh)
+        for name, spec in data.items():
+            signatures[name.lower()] = PlatformSignature.from_dict(name.lower(), spec)
+    logger.debug(f"Loaded {len(signatures)} platform signatures")
+    return signatures
+
+
+_signatures: Optional[Dict[str, PlatformSignature]] = None
+_signatures_lock = threading.Lock()
+
+
+def get_signatures() -> Dict[str, PlatformSignature]:
+    """Shared signature database, loaded on first use"""
+    global _signatures
+    with _signatures_lock:
+        if _signatures is None:
+            _signatures = load_signatures()
+        return _signatures
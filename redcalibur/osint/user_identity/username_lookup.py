@@ -1,8 +1,16 @@
+import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import aiohttp
 import requests
 
+from ...cache import get_cache
+from ...config import Config
+from .platform_signatures import BLOCKED, FOUND, NOT_FOUND, PlatformSignature, get_signatures
+
 # Initialize logger
 logger = logging.getLogger("username_lookup")
 if not logger.handlers:
@@ -13,59 +21,283 @@ USER_AGENT = (
     "(KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"
 )
 
-# Simple platform URL patterns; can be extended
-PLATFORM_URLS: Dict[str, str] = {
-    "twitter": "https://twitter.com/{username}",
-    "instagram": "https://www.instagram.com/{username}/",
-    "github": "https://github.com/{username}",
-    "linkedin": "https://www.linkedin.com/in/{username}/",
-    "reddit": "https://www.reddit.com/user/{username}/",
-    "medium": "https://medium.com/@{username}",
-}
-
-def _probe_profile(url: str, timeout: float = 3.0) -> bool:
+# Probes in flight per platform, and open connections overall
+PER_PLATFORM_CONCURRENCY = 4
+MAX_CONNECTIONS = 64
+# Body markers are matched against the first PREVIEW_BYTES of a page; bodies
+# up to DRAIN_BYTES are finished so the connection can be reused
+PREVIEW_BYTES = 4096
+DRAIN_BYTES = 64 * 1024
+
+# Probes currently running, by cache key; later callers for the same
+# (platform, username) wait for the running probe, from any thread or loop
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+def _outcome_ttl(outcome: str) -> float:
+    if outcome == FOUND:
+        return Config.USERNAME_FOUND_TTL
+    if outcome == NOT_FOUND:
+        return Config.USERNAME_NOT_FOUND_TTL
+    return Config.USERNAME_BLOCKED_TTL
+
+def _probe_cache():
+    return get_cache("username_probes", Config.USERNAME_FOUND_TTL)
+
+def _cache_key(signature: PlatformSignature, username: str) -> str:
+    return f"{signature.name}:{username}"
+
+def get_cached_outcome(signature: PlatformSignature, username: str) -> Optional[str]:
+    """Cached FOUND / NOT_FOUND / BLOCKED outcome if still within its TTL, else None."""
+    entry = _probe_cache().get(_cache_key(signature, username))
+    if entry is None or time.time() - entry.stored_at >= _outcome_ttl(entry.value):
+        return None
+    return entry.value
+
+def _claim_probe(key: str) -> Tuple[Future, bool]:
+    """Return (future, leader); the leader runs the probe, others wait on the future."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future, False
+        future = _inflight[key] = Future()
+        return future, True
+
+def _finish_probe(key: str, future: Future, outcome: str = None, error: BaseException = None, store: bool = True):
+    # Cache before leaving the in-flight table so no caller misses both
+    if error is None and store:
+        _probe_cache().set(key, outcome)
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    if error is None:
+        future.set_result(outcome)
+    else:
+        future.set_exception(error if isinstance(error, Exception) else RuntimeError("probe cancelled"))
+
+def _format_result(signature: PlatformSignature, username: str, outcome: str) -> str:
+    if outcome == FOUND:
+        return signature.profile_url(username)
+    return "blocked" if outcome == BLOCKED else "not found"
+
+def _probe_profile(signature: PlatformSignature, username: str, timeout: float = 3.0) -> str:
+    """Probe one profile with requests; returns FOUND, NOT_FOUND or BLOCKED."""
+    if not signature.accepts(username):
+        return NOT_FOUND
+    headers = {"User-Agent": USER_AGENT, **signature.request_headers()}
+    with requests.request(signature.method, signature.request_url(username), headers=headers,
+                          timeout=timeout, allow_redirects=True, stream=True) as resp:
+        head = resp.raw.read(PREVIEW_BYTES, decode_content=True) if signature.reads_body else b""
+        return signature.classify(resp.status_code, resp.url, head or b"")
+
+def _probe_profile_cached(signature: PlatformSignature, username: str, timeout: float = 3.0,
+                          use_cache: bool = True) -> str:
+    """_probe_profile with the result cache and in-flight coalescing."""
+    if use_cache:
+        outcome = get_cached_outcome(signature, username)
+        if outcome:
+            return outcome
+    key = _cache_key(signature, username)
+    future, leader = _claim_probe(key)
+    if not leader:
+        return future.result()
+    if use_cache:
+        # A probe may have finished between the cache check and the claim
+        outcome = get_cached_outcome(signature, username)
+        if outcome:
+            _finish_probe(key, future, outcome, store=False)
+            return outcome
+    try:
+        outcome = _probe_profile(signature, username, timeout)
+    except BaseException as e:
+        _finish_probe(key, future, error=e)
+        raise
+    _finish_probe(key, future, outcome)
+    return outcome
+
+async def _probe_profile_async(session: aiohttp.ClientSession, signature: PlatformSignature,
+                               username: str, timeout: float = 3.0) -> str:
+    """
+    Probe one profile over a shared session; returns FOUND, NOT_FOUND or BLOCKED.
+
+    Usernames the platform cannot have are rejected without a request, and
+    the body is only read when the signature has markers to match.
+    """
+    if not signature.accepts(username):
+        return NOT_FOUND
+    async with session.request(signature.method, signature.request_url(username),
+                               headers=signature.request_headers(), allow_redirects=True,
+                               timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+        head = b""
+        if signature.reads_body:
+            while len(head) < PREVIEW_BYTES:
+                chunk = await resp.content.read(PREVIEW_BYTES - len(head))
+                if not chunk:
+                    break
+                head += chunk
+        if resp.content_length is not None and resp.content_length <= DRAIN_BYTES:
+            await resp.content.read()
+        # Otherwise the connection is dropped instead of downloading the whole page
+        return signature.classify(resp.status, str(resp.url), head)
+
+async def _probe_profile_cached_async(session: aiohttp.ClientSession, signature: PlatformSignature,
+                                      username: str, timeout: float = 3.0, use_cache: bool = True) -> str:
+    """_probe_profile_async with the result cache and in-flight coalescing."""
+    if use_cache:
+        outcome = get_cached_outcome(signature, username)
+        if outcome:
+            return outcome
+    key = _cache_key(signature, username)
+    future, leader = _claim_probe(key)
+    if not leader:
+        return await asyncio.wrap_future(future)
+    if use_cache:
+        # A probe may have finished between the cache check and the claim
+        outcome = get_cached_outcome(signature, username)
+        if outcome:
+            _finish_probe(key, future, outcome, store=False)
+            return outcome
+    try:
+        outcome = await _probe_profile_async(session, signature, username, timeout)
+    except BaseException as e:
+        _finish_probe(key, future, error=e)
+        raise
+    _finish_probe(key, future, outcome)
+    return outcome
+
+async def lookup_usernames_async(usernames: Iterable[str], platforms: List[str],
+                                 per_platform: int = PER_PLATFORM_CONCURRENCY, timeout: float = 3.0,
+                                 use_cache: bool = True) -> AsyncIterator[Tuple[str, str, str]]:
+    """
+    Check many usernames across many platforms over shared connections.
+
+    Each platform gets per_platform workers, so a slow or throttling site
+    never holds up the others. Results are yielded as probes finish.
+    Outcomes are cached per (platform, username) with separate TTLs for
+    found, not-found and blocked answers (Config.USERNAME_*_TTL), and
+    concurrent checks of the same pair share one request.
+
+    Args:
+        usernames: Usernames to check (duplicates are checked once)
+        platforms: Platform keys, e.g., ["twitter","github"]
+        per_platform: Concurrent probes against each platform
+        timeout: Per-probe timeout in seconds
+        use_cache: Reuse cached outcomes that are still within their TTL
+
+    Yields:
+        (username, platform, profile URL | 'not found' | 'blocked' | 'unsupported platform' | 'error: ...')
+    """
+    usernames = list(dict.fromkeys(usernames))
+    signatures = get_signatures()
+    supported = []
+    for p in dict.fromkeys(platforms):
+        if p.lower() in signatures:
+            supported.append(p)
+        else:
+            for username in usernames:
+                yield username, p, "unsupported platform"
+    if not usernames or not supported:
+        return
+
+    finished: asyncio.Queue = asyncio.Queue()
+    connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT}) as session:
+        async def worker(platform, jobs):
+            signature = signatures[platform.lower()]
+            # The platform's workers share one iterator over the usernames
+            for username in jobs:
+                try:
+                    outcome = await _probe_profile_cached_async(session, signature, username, timeout, use_cache)
+                    result = _format_result(signature, username, outcome)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.debug(f"Probe error for {signature.request_url(username)}: {e}")
+                    result = f"error: {str(e) or type(e).__name__}"
+                except Exception as e:
+                    result = f"error: {e}"
+                await finished.put((username, platform, result))
+
+        workers = []
+        for p in supported:
+            jobs = iter(usernames)
+            workers += [asyncio.ensure_future(worker(p, jobs)) for _ in range(min(per_platform, len(usernames)))]
+        try:
+            for _ in range(len(usernames) * len(supported)):
+                yield await finished.get()
+        finally:
+            for task in workers:
+                task.cancel()
+
+def lookup_usernames(usernames: Iterable[str], platforms: List[str], per_platform: int = PER_PLATFORM_CONCURRENCY,
+                     timeout: float = 3.0, use_cache: bool = True) -> Dict[str, Dict[str, str]]:
+    """
+    Lookup many usernames across multiple platforms.
+
+    Args:
+        usernames: Usernames to check
+        platforms: List of platform keys, e.g., ["twitter","github"]
+        per_platform: Concurrent probes against each platform
+        timeout: Per-probe timeout in seconds
+        use_cache: Reuse cached outcomes that are still within their TTL
+
+    Returns:
+        dict mapping username -> {platform -> profile URL if found; otherwise 'not found' or 'blocked'}
+    """
+    usernames = list(dict.fromkeys(usernames))
     try:
-        resp = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=timeout, allow_redirects=True)
-        # Basic heuristic: 200 => exists; certain platforms (LinkedIn) may return 999/other codes for blocked
-        if resp.status_code == 200:
-            return True
-        # Handle GitHub not found page (404)
-        if resp.status_code == 404:
-            return False
-        # Treat other codes as not found/blocked without failing
-        return False
-    except requests.RequestException as e:
-        logger.debug(f"Probe error for {url}: {e}")
-        return False
-
-def lookup_username(username: str, platforms: List[str]) -> Dict[str, str]:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        # Already inside an event loop (callers there should use
+        # lookup_usernames_async); fall back to threaded probes
+        return {username: _lookup_username_threaded(username, platforms, use_cache) for username in usernames}
+
+    async def collect():
+        results = {username: {} for username in usernames}
+        async for username, platform, result in lookup_usernames_async(usernames, platforms, per_platform,
+                                                                        timeout, use_cache):
+            results[username][platform] = result
+        # Report platforms in the order they were requested
+        order = list(dict.fromkeys(platforms))
+        return {u: {p: found[p] for p in order if p in found} for u, found in results.items()}
+
+    return asyncio.run(collect())
+
+def lookup_username(username: str, platforms: List[str], use_cache: bool = True) -> Dict[str, str]:
     """
     Lookup a username across multiple platforms via HTTP probes (no external CLI).
 
     Args:
         username: Username to check
         platforms: List of platform keys, e.g., ["twitter","github"]
+        use_cache: Reuse cached outcomes that are still within their TTL
 
     Returns:
-        dict mapping platform -> profile URL if found; otherwise 'not found'.
+        dict mapping platform -> profile URL if found; otherwise 'not found', or
+        'blocked' when the platform refused or gave an inconclusive answer.
+    """
+    return lookup_usernames([username], platforms, use_cache=use_cache)[username]
+
+def _lookup_username_threaded(username: str, platforms: List[str], use_cache: bool = True) -> Dict[str, str]:
+    """
+    Thread-pool lookup of one username, for callers already inside an event loop.
     """
     results: Dict[str, str] = {}
 
+    signatures = get_signatures()
+
     tasks = {}
     with ThreadPoolExecutor(max_workers=min(8, max(1, len(platforms)))) as ex:
         for p in platforms:
-            template = PLATFORM_URLS.get(p.lower())
-            if not template:
+            signature = signatures.get(p.lower())
+            if not signature:
                 results[p] = "unsupported platform"
                 continue
-            url = template.format(username=username)
-            tasks[ex.submit(_probe_profile, url)] = (p, url)
+            tasks[ex.submit(_probe_profile_cached, signature, username, use_cache=use_cache)] = (p, signature)
 
         for fut in as_completed(tasks):
-            p, url = tasks[fut]
+            p, signature = tasks[fut]
             try:
-                exists = fut.result()
-                results[p] = url if exists else "not found"
+                results[p] = _format_result(signature, username, fut.result())
             except Exception as e:
                 results[p] = f"error: {e}"
 
@@ -0,0 +1,278 @@
+"""
+Batch URL scanning with VirusTotal.
+
+Submits many URLs concurrently and polls every pending analysis from a
+single loop, backing off per analysis and scheduling all requests within
+the API key's per-minute and daily quotas. An analysis already being
+polled by another batch or single scan is not polled again.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+from ..cache import get_cache
+from ..config import Config
+from ..ratelimit import SlidingWindowLimiter, backoff_delay, exponential_intervals
+from . import virustotal_integration as vt
+
+logger = logging.getLogger(__name__)
+
+# Statuses VirusTotal returns when throttling or briefly unavailable
+RETRY_STATUSES = {429, 503}
+
+
+class QuotaExceeded(Exception):
+    """Raised when the API key's daily request budget is used up."""
+
+
+class VTQuota:
+    """
+    Request scheduler for one API key.
+
+    Per-minute limits are enforced with a sliding window; the daily budget
+    is counted in the persistent cache so it survives restarts.
+    """
+
+    def __init__(self, api_key: str, per_minute: int = None, per_day: int = None):
+        self.per_minute = per_minute or Config.VIRUSTOTAL_REQUESTS_PER_MINUTE
+        self.per_day = per_day or Config.VIRUSTOTAL_REQUESTS_PER_DAY
+        self.limiter = SlidingWindowLimiter(self.per_minute, 60)
+        self._key_id = hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+        self._lock = threading.Lock()
+
+    def _day_key(self) -> str:
+        return f"{self._key_id}:{datetime.now(timezone.utc):%Y-%m-%d}"
+
+    def used_today(self) -> int:
+        entry = get_cache("vt_quota", 2 * 86400).get(self._day_key())
+        return entry.value if entry is not None else 0
+
+    def remaining_today(self) -> int:
+        return max(self.per_day - self.used_today(), 0)
+
+    def _charge(self):
+        with self._lock:
+            used = self.used_today()
+            if used >= self.per_day:
+                raise QuotaExceeded(f"VirusTotal daily quota of {self.per_day} requests reached")
+            get_cache("vt_quota", 2 * 86400).set(self._day_key(), used + 1)
+
+    async def acquire(self):
+        """Count one request against the daily budget and wait for a per-minute slot."""
+        self._charge()
+        await self.limiter.acquire_async()
+
+
+_quotas: Dict[tuple, VTQuota] = {}
+_quotas_lock = threading.Lock()
+
+
+def get_quota(api_key: str) -> VTQuota:
+    """Shared scheduler for an API key (all batches using the key draw from it)."""
+    key = (api_key, Config.VIRUSTOTAL_REQUESTS_PER_MINUTE, Config.VIRUSTOTAL_REQUESTS_PER_DAY)
+    with _quotas_lock:
+        if key not in _quotas:
+            _quotas[key] = VTQuota(api_key)
+        return _quotas[key]
+
+
+async def vt_request(session: aiohttp.ClientSession, quota: VTQuota, api_key: str, method: str,
+                     path: str, data: dict = None, max_retries: int = None) -> dict:
+    """
+    Make one quota-scheduled VirusTotal API request, retrying throttled responses.
+
+    Raises QuotaExceeded when the daily budget is exhausted.
+    """
+    if max_retries is None:
+        max_retries = Config.MAX_RETRIES
+    timeout = aiohttp.ClientTimeout(total=vt.DEFAULT_TIMEOUT)
+
+    for attempt in range(max_retries + 1):
+        await quota.acquire()
+        try:
+            async with session.request(method, f"{vt.VT_API_URL}{path}", headers={"x-apikey": api_key},
+                                       data=data, timeout=timeout) as response:
+                if response.status == 200:
+                    return await response.json(content_type=None)
+                if response.status in RETRY_STATUSES and attempt < max_retries:
+                    await asyncio.sleep(backoff_delay(attempt, base=Config.REQUEST_DELAY,
+                                                      retry_after=response.headers.get("Retry-After")))
+                    continue
+                return {"error": "virustotal_error", "status": response.status, "body": await response.text()}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt < max_retries:
+                await asyncio.sleep(backoff_delay(attempt, base=Config.REQUEST_DELAY))
+                continue
+            return {"error": str(e) or type(e).__name__}
+    return {"error": "virustotal_error"}
+
+
+def _build_result(url: str, submission: dict, analysis: Optional[dict]) -> dict:
+    """Result shaped like scan_url_full's, built from the completed analysis object."""
+    attrs = (analysis or {}).get("data", {}).get("attributes", {})
+    result = {
+        "source": "virustotal",
+        "url": url,
+        "submitted": submission,
+        "analysis": analysis or {"note": "analysis_pending"},
+        "report": vt.summarize_attributes(attrs, vt.url_to_vt_id(url)),
+    }
+    if not result["report"]["last_analysis_stats"]:
+        result["note"] = "analysis_pending_or_insufficient_time"
+    return result
+
+
+async def scan_urls_async(api_key: str, urls: List[str], max_wait: float = 300.0,
+                          poll_interval: float = 15.0, quota: VTQuota = None,
+                          use_cache: bool = True, max_age: float = None,
+                          max_poll_interval: float = 60.0) -> AsyncIterator[dict]:
+    """
+    Scan many URLs, yielding each result as soon as its analysis completes.
+
+    Submissions run concurrently; one loop polls every analysis that is due.
+    Each analysis is first polled poll_interval seconds after submission and
+    the wait doubles (with jitter) up to max_poll_interval. Report summaries
+    come from the completed analysis object, so no extra report request is
+    spent per URL.
+
+    Args:
+        api_key: VirusTotal API key
+        urls: URLs to scan (duplicates are scanned once)
+        max_wait: Seconds to wait for each analysis after submission
+        poll_interval: Seconds before the first poll of an analysis
+        quota: Scheduler to draw from (defaults to the shared one for the key)
+        use_cache: Reuse reports analysed within max_age seconds instead of resubmitting
+        max_age: Report freshness window (defaults to Config.VIRUSTOTAL_REPORT_TTL)
+        max_poll_interval: Upper bound on the wait between polls of one analysis
+    """
+    quota = quota or get_quota(api_key)
+    # Identifies this batch in the shared poll registry
+    owner = object()
+    unique = list(dict.fromkeys(urls))
+    finished: asyncio.Queue = asyncio.Queue()
+    # analysis id -> [url, submission, submitted_at, poll intervals, next poll at]
+    pending: Dict[str, list] = {}
+
+    def track(url, submission, analysis_id):
+        intervals = exponential_intervals(poll_interval, cap=max_poll_interval)
+        now = time.monotonic()
+        pending[analysis_id] = [url, submission, now, intervals, now + next(intervals)]
+
+    async with aiohttp.ClientSession() as session:
+        async def submit(url):
+            try:
+                await submit_one(url)
+            except QuotaExceeded as e:
+                await finished.put({"source": "virustotal", "url": url, "error": "quota_exceeded", "detail": str(e)})
+            except Exception as e:
+                logger.error(f"VirusTotal submission failed for {url}: {e}")
+                await finished.put({"source": "virustotal", "url": url, "error": str(e)})
+
+        async def submit_one(url):
+            url_id = vt.url_to_vt_id(url)
+            if use_cache:
+                summary = vt.get_cached_report(url, max_age)
+                if summary:
+                    await finished.put(vt.cached_result(url, summary))
+                    return
+            # Resume an analysis an earlier scan submitted but did not see complete
+            resumed = vt.pending_analysis(url_id)
+            if resumed:
+                track(url, resumed[1], resumed[0])
+                return
+            if use_cache:
+                # VirusTotal may already hold a recent analysis of this URL
+                existing = await vt_request(session, quota, api_key, "GET", f"/urls/{url_id}")
+                attrs = existing.get("data", {}).get("attributes", {})
+                if vt.report_is_fresh(attrs, max_age):
+                    summary = vt.summarize_attributes(attrs, url_id)
+                    vt.cache_report(url, summary)
+                    await finished.put(vt.cached_result(url, summary))
+                    return
+            submission = await vt_request(session, quota, api_key, "POST", "/urls", data={"url": url})
+            analysis_id = submission.get("data", {}).get("id") if isinstance(submission, dict) else None
+            if analysis_id:
+                vt.register_analysis(url_id, analysis_id, submission)
+                track(url, submission, analysis_id)
+            else:
+                await finished.put(dict(_build_result(url, submission, None), error=submission.get("error", "no_analysis_id")))
+
+        async def poll(analysis_id):
+            # Another batch or single scan may be polling (or have finished) this analysis
+            completed = vt.completed_analysis(analysis_id)
+            if completed:
+                return completed
+            if not vt.claim_poll(analysis_id, owner):
+                return {"note": "polled_elsewhere"}
+            try:
+                return await vt_request(session, quota, api_key, "GET", f"/analyses/{analysis_id}")
+            except QuotaExceeded as e:
+                return {"error": "quota_exceeded", "detail": str(e)}
+
+        async def poll_loop(submissions):
+            while pending or not all(task.done() for task in submissions):
+                # Wake for the next due analysis, or to pick up new submissions
+                now = time.monotonic()
+                next_due = min((entry[4] for entry in pending.values()), default=now + poll_interval)
+                await asyncio.sleep(min(max(next_due - now, 0), poll_interval))
+                now = time.monotonic()
+                batch = [(analysis_id, entry) for analysis_id, entry in pending.items() if entry[4] <= now]
+                if not batch:
+                    continue
+                analyses = await asyncio.gather(*(poll(analysis_id) for analysis_id, _ in batch))
+                now = time.monotonic()
+                for (analysis_id, entry), analysis in zip(batch, analyses):
+                    url, submission, submitted_at, intervals, _ = entry
+                    if vt.analysis_completed(analysis):
+                        vt.clear_analysis(vt.url_to_vt_id(url))
+                        result = _build_result(url, submission, analysis)
+                        if use_cache:
+                            vt.cache_report(url, result["report"])
+                    elif analysis.get("error") == "quota_exceeded":
+                        result = dict(_build_result(url, submission, None), **analysis)
+                    elif now - submitted_at >= max_wait:
+                        result = _build_result(url, submission, None)
+                    else:
+                        entry[4] = now + next(intervals)
+                        continue
+                    vt.finish_poll(analysis_id, owner, analysis)
+                    pending.pop(analysis_id, None)
+                    await finished.put(result)
+            await finished.put(None)
+
+        submissions = [asyncio.ensure_future(submit(url)) for url in unique]
+        poller = asyncio.ensure_future(poll_loop(submissions))
+        try:
+            while True:
+                result = await finished.get()
+                if result is None:
+                    break
+                yield result
+        finally:
+            for task in submissions + [poller]:
+                task.cancel()
+            # Let other loops take over analyses this batch stopped polling
+            for analysis_id in list(pending):
+                vt.finish_poll(analysis_id, owner)
+
+    logger.info(f"VirusTotal batch complete: {len(unique)} URLs, {quota.remaining_today()} requests left today")
+
+
+def scan_urls(api_key: str, urls: List[str], **kwargs) -> List[dict]:
+    """
+    Blocking wrapper around scan_urls_async returning one result per input URL, in order.
+
+    A URL the batch produced no result for gets an error entry.
+    """
+    async def collect():
+        return {result["url"]: result async for result in scan_urls_async(api_key, urls, **kwargs)}
+
+    by_url = asyncio.run(collect())
+    return [by_url.get(url) or {"source": "virustotal", "url": url, "error": "no_result"} for url in urls]
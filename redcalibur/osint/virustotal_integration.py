@@ -1,8 +1,29 @@
 import base64
+import copy
+import threading
 import time
 import requests
 
+from ..cache import SingleFlight, get_cache
+from ..config import Config
+from ..ratelimit import exponential_intervals
+
 DEFAULT_TIMEOUT = 8.0  # per-request timeout
+VT_API_URL = "https://www.virustotal.com/api/v3"
+VT_GUI_URL = "https://www.virustotal.com/gui/url/{}"
+
+# Submitted analyses older than this are not resumed; the URL is resubmitted
+PENDING_TTL = 600.0
+
+# URL ID -> (analysis id, raw submission, submitted at) for analyses that have
+# not completed yet, shared by single and batch scans
+_pending_analyses = {}
+_pending_lock = threading.Lock()
+_poll_flight = SingleFlight()
+# Analysis id -> (owner, claimed at) of the one poll loop polling it, and
+# analysis id -> (completed analysis, completed at) for the loops waiting on it
+_poll_owners = {}
+_completed_analyses = {}
 
 def scan_url(api_key: str, url: str):
     """
@@ -10,7 +31,7 @@ def scan_url(api_key: str, url: str):
 
     Returns the raw submission response (often contains an analysis id).
     """
-    vt_url = "https://www.virustotal.com/api/v3/urls"
+    vt_url = f"{VT_API_URL}/urls"
     headers = {"x-apikey": api_key}
     data = {"url": url}
     try:
@@ -25,7 +46,7 @@ def get_url_report(api_key: str, url_id: str):
     """
     Get the latest report for a URL using the VirusTotal API (by URL ID).
     """
-    vt_url = f"https://www.virustotal.com/api/v3/urls/{url_id}"
+    vt_url = f"{VT_API_URL}/urls/{url_id}"
     headers = {"x-apikey": api_key}
     try:
         response = requests.get(vt_url, headers=headers, timeout=DEFAULT_TIMEOUT)
@@ -37,7 +58,7 @@ def get_url_report(api_key: str, url_id: str):
 
 def get_analysis(api_key: str, analysis_id: str):
     """Fetch a specific analysis object by id."""
-    vt_url = f"https://www.virustotal.com/api/v3/analyses/{analysis_id}"
+    vt_url = f"{VT_API_URL}/analyses/{analysis_id}"
     headers = {"x-apikey": api_key}
     try:
         response = requests.get(vt_url, headers=headers, timeout=DEFAULT_TIMEOUT)
@@ -52,58 +73,16 @@ def url_to_vt_id(url: str) -> str:
     enc = base64.urlsafe_b64encode(url.encode()).decode()
     return enc.rstrip('=')
 
-def scan_url_full(api_key: str, url: str, overall_timeout: float = 9.0, poll_interval: float = 1.0):
+def summarize_attributes(attrs: dict, url_id: str) -> dict:
     """
-    End-to-end URL scan that submits, polls for completion briefly, and returns structured results.
+    Build the compact report summary from URL report or analysis attributes.
 
-    Returns:
-      {
-        "source": "virustotal",
-        "submitted": { ...raw submission... },
-        "analysis": { ...latest analysis object if fetched... },
-        "report": {
-            "last_analysis_stats": { harmless, malicious, suspicious, undetected, timeout },
-            "reputation": int | None,
-            "total_vendors": int,
-            "malicious_vendors": [ { "engine": name, "category": cat } ... up to 5 ],
-            "link": "https://www.virustotal.com/gui/url/<id>"
-        }
-      }
-      or a pending/timeout structure if not ready in time.
+    URL reports carry last_analysis_stats/last_analysis_results; analysis
+    objects carry the same data as stats/results.
     """
-    start = time.time()
-    result: dict = {"source": "virustotal"}
-
-    submission = scan_url(api_key, url)
-    result["submitted"] = submission
-
-    # Try to get analysis id from submission
-    analysis_id = None
-    try:
-        analysis_id = submission.get("data", {}).get("id")
-    except Exception:
-        pass
-
-    # Compute URL ID for report link and final stats
-    url_id = url_to_vt_id(url)
-    result_link = f"https://www.virustotal.com/gui/url/{url_id}"
-
-    # Poll the analysis endpoint briefly
-    analysis_obj = None
-    while analysis_id and (time.time() - start) < overall_timeout:
-        a = get_analysis(api_key, analysis_id)
-        if isinstance(a, dict) and a.get("data", {}).get("attributes", {}).get("status") == "completed":
-            analysis_obj = a
-            break
-        time.sleep(poll_interval)
-
-    result["analysis"] = analysis_obj or {"note": "analysis_pending"}
-
-    # Fetch latest URL report to get last_analysis_stats
-    report = get_url_report(api_key, url_id)
-    rep_attrs = report.get("data", {}).get("attributes", {}) if isinstance(report, dict) else {}
-    stats = rep_attrs.get("last_analysis_stats", {})
-    vendors = rep_attrs.get("last_analysis_results", {})
+    attrs = attrs if isinstance(attrs, dict) else {}
+    stats = attrs.get("last_analysis_stats") or attrs.get("stats") or {}
+    vendors = attrs.get("last_analysis_results") or attrs.get("results") or {}
     # extract a small list of malicious vendors (up to 5)
     mal_vendors = []
     if isinstance(vendors, dict):
@@ -115,17 +94,224 @@ def scan_url_full(api_key: str, url: str, overall_timeout: float = 9.0, poll_int
                 continue
     mal_vendors = mal_vendors[:5]
 
-    summary = {
+    return {
         "last_analysis_stats": stats or None,
-        "reputation": rep_attrs.get("reputation"),
+        "reputation": attrs.get("reputation"),
         "total_vendors": len(vendors) if isinstance(vendors, dict) else None,
         "malicious_vendors": mal_vendors,
-        "link": result_link,
+        "link": VT_GUI_URL.format(url_id),
+    }
+
+def _report_cache():
+    return get_cache("vt_reports", Config.VIRUSTOTAL_REPORT_TTL)
+
+def get_cached_report(url: str, max_age: float = None):
+    """
+    Return the cached report summary for a URL if it is still fresh, else None.
+
+    Reports are keyed by VirusTotal URL ID.
+    """
+    entry = _report_cache().get(url_to_vt_id(url), ttl=max_age)
+    if entry is None or not entry.fresh:
+        return None
+    return entry.value
+
+def cache_report(url: str, summary: dict):
+    """Store a report summary (only summaries with analysis stats are cached)."""
+    if summary and summary.get("last_analysis_stats"):
+        _report_cache().set(url_to_vt_id(url), summary)
+
+def report_is_fresh(attrs: dict, max_age: float = None) -> bool:
+    """Whether a VirusTotal URL report was analysed within the freshness window."""
+    max_age = Config.VIRUSTOTAL_REPORT_TTL if max_age is None else max_age
+    last_analysis = (attrs or {}).get("last_analysis_date")
+    return bool(last_analysis and (attrs or {}).get("last_analysis_stats")
+                and time.time() - last_analysis < max_age)
+
+def cached_result(url: str, summary: dict) -> dict:
+    """scan_url_full-shaped result for a report served without resubmitting."""
+    return {
+        "source": "virustotal",
+        "url": url,
+        "cached": True,
+        "analysis": {"note": "fresh_report_reused"},
+        "report": summary,
     }
+
+def pending_analysis(url_id: str):
+    """Return (analysis_id, submission) of a recent unfinished analysis of the URL, or None."""
+    with _pending_lock:
+        entry = _pending_analyses.get(url_id)
+        if entry is None:
+            return None
+        if time.time() - entry[2] > PENDING_TTL:
+            del _pending_analyses[url_id]
+            return None
+        return entry[0], entry[1]
+
+def register_analysis(url_id: str, analysis_id: str, submission: dict):
+    """Record a submitted analysis so later scans of the URL resume it instead of resubmitting."""
+    with _pending_lock:
+        _pending_analyses[url_id] = (analysis_id, submission, time.time())
+
+def clear_analysis(url_id: str):
+    with _pending_lock:
+        _pending_analyses.pop(url_id, None)
+
+def claim_poll(analysis_id: str, owner) -> bool:
+    """
+    Take (or keep) the right to poll an analysis.
+
+    Single scans and every batch share this registry, so each analysis is
+    polled by one loop at a time whoever requested it; the others wait for
+    finish_poll to publish the completed analysis. Claims expire after
+    PENDING_TTL in case their owner died without releasing them.
+    """
+    now = time.time()
+    with _pending_lock:
+        current = _poll_owners.get(analysis_id)
+        if current is None or current[0] is owner or now - current[1] > PENDING_TTL:
+            _poll_owners[analysis_id] = (owner, now)
+            return True
+        return False
+
+def finish_poll(analysis_id: str, owner, analysis: dict = None):
+    """Release a claim, publishing the analysis to waiting loops if it completed."""
+    now = time.time()
+    with _pending_lock:
+        current = _poll_owners.get(analysis_id)
+        if current is not None and current[0] is owner:
+            del _poll_owners[analysis_id]
+        if analysis_completed(analysis):
+            for stale in [k for k, (_, at) in _completed_analyses.items() if now - at > PENDING_TTL]:
+                del _completed_analyses[stale]
+            _completed_analyses[analysis_id] = (analysis, now)
+
+def completed_analysis(analysis_id: str):
+    """The completed analysis another loop published, or None."""
+    with _pending_lock:
+        entry = _completed_analyses.get(analysis_id)
+        return copy.deepcopy(entry[0]) if entry is not None else None
+
+def analysis_completed(analysis) -> bool:
+    return isinstance(analysis, dict) and analysis.get("data", {}).get("attributes", {}).get("status") == "completed"
+
+def poll_analysis(api_key: str, analysis_id: str, deadline: float, poll_interval: float = 1.0,
+                  max_poll_interval: float = 8.0):
+    """
+    Poll an analysis until it completes or the deadline (time.time()) passes.
+
+    The wait between polls starts at poll_interval and doubles (with jitter)
+    up to max_poll_interval, so quick analyses return fast and slow ones
+    cost few requests. While another loop (e.g. a batch scan) polls the same
+    analysis, this one waits for its result without sending requests.
+    Returns the completed analysis object, or None.
+    """
+    owner = object()
+    analysis = None
+    try:
+        for delay in exponential_intervals(poll_interval, cap=max_poll_interval):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            time.sleep(min(delay, remaining))
+            completed = completed_analysis(analysis_id)
+            if completed:
+                return completed
+            if claim_poll(analysis_id, owner):
+                analysis = get_analysis(api_key, analysis_id)
+                if analysis_completed(analysis):
+                    return analysis
+    finally:
+        finish_poll(analysis_id, owner, analysis)
+
+def _submit_and_poll(api_key: str, url: str, url_id: str, deadline: float, poll_interval: float,
+                     max_poll_interval: float, stale_attrs: dict = None):
+    result: dict = {"source": "virustotal"}
+
+    # Resume an analysis an earlier (timed out) scan submitted
+    pending = pending_analysis(url_id)
+    if pending:
+        analysis_id, submission = pending
+    else:
+        submission = scan_url(api_key, url)
+        analysis_id = submission.get("data", {}).get("id") if isinstance(submission, dict) else None
+        if analysis_id:
+            register_analysis(url_id, analysis_id, submission)
+    result["submitted"] = submission
+
+    analysis_obj = None
+    if analysis_id:
+        analysis_obj = poll_analysis(api_key, analysis_id, deadline, poll_interval, max_poll_interval)
+    result["analysis"] = analysis_obj or {"note": "analysis_pending"}
+
+    if analysis_obj:
+        # The completed analysis carries the stats; no extra report request needed
+        clear_analysis(url_id)
+        summary = summarize_attributes(analysis_obj["data"]["attributes"], url_id)
+        cache_report(url, summary)
+    else:
+        # Fall back to the previous report, if any (not cached: it is stale)
+        if stale_attrs is None:
+            report = get_url_report(api_key, url_id)
+            stale_attrs = report.get("data", {}).get("attributes", {}) if isinstance(report, dict) else {}
+        summary = summarize_attributes(stale_attrs, url_id)
     result["report"] = summary
 
     # If still nothing meaningful, indicate pending
-    if not stats:
+    if not summary["last_analysis_stats"]:
         result["note"] = "analysis_pending_or_insufficient_time"
 
     return result
+
+def scan_url_full(api_key: str, url: str, overall_timeout: float = 9.0, poll_interval: float = 1.0,
+                  use_cache: bool = True, max_age: float = None, max_poll_interval: float = 8.0):
+    """
+    End-to-end URL scan that submits, polls for completion briefly, and returns structured results.
+
+    With use_cache, a report cached (or analysed by VirusTotal) within max_age
+    seconds (default Config.VIRUSTOTAL_REPORT_TTL) is returned directly with
+    "cached": True, and the URL is only resubmitted when the report is stale.
+
+    Polling backs off from poll_interval to max_poll_interval seconds.
+    Concurrent calls for the same URL share one submission and poll loop,
+    and an analysis left unfinished by a timed-out call is resumed rather
+    than resubmitted.
+
+    Returns:
+      {
+        "source": "virustotal",
+        "submitted": { ...raw submission... },
+        "analysis": { ...latest analysis object if fetched... },
+        "report": {
+            "last_analysis_stats": { harmless, malicious, suspicious, undetected, timeout },
+            "reputation": int | None,
+            "total_vendors": int,
+            "malicious_vendors": [ { "engine": name, "category": cat } ... up to 5 ],
+            "link": "https://www.virustotal.com/gui/url/<id>"
+        }
+      }
+      or a pending/timeout structure if not ready in time.
+    """
+    deadline = time.time() + overall_timeout
+    url_id = url_to_vt_id(url)
+
+    stale_attrs = None
+    if use_cache:
+        summary = get_cached_report(url, max_age)
+        if summary:
+            return cached_result(url, summary)
+
+        # VirusTotal may already hold a recent analysis of this URL
+        existing = get_url_report(api_key, url_id)
+        stale_attrs = existing.get("data", {}).get("attributes", {}) if isinstance(existing, dict) else {}
+        if report_is_fresh(stale_attrs, max_age):
+            summary = summarize_attributes(stale_attrs, url_id)
+            cache_report(url, summary)
+            return cached_result(url, summary)
+
+    result = _poll_flight.do(url_id, lambda: _submit_and_poll(
+        api_key, url, url_id, deadline, poll_interval, max_poll_interval, stale_attrs
+    ))
+    # Callers that joined an in-flight scan get their own copy
+    return copy.deepcopy(result)
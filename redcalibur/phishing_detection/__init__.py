@@ -16,7 +16,9 @@ import re
 import requests
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple, Optional
 from urllib.parse import urlparse
 import tldextract
 from dataclasses import dataclass
@@ -29,6 +31,9 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix
 
 from ..ai_core import TransformerClassifier, RedTeamNeuralNet, AIModelConfig
+from .host_enrichment import UNREACHABLE, enrich_origins, url_origin
+from .model_artifacts import ModelArtifactError, read_artifact, write_artifact
+from ..config import Config
 
 
 @dataclass
@@ -46,6 +51,32 @@ class URLFeatures:
     entropy: float
 
 
+# Column order of feature vectors and matrices
+FEATURE_NAMES = [
+    'length', 'num_dots', 'num_subdomains', 'num_special_chars', 'has_ip',
+    'has_suspicious_words', 'domain_age', 'ssl_cert_valid', 'redirect_count', 'entropy'
+]
+
+_IP_PATTERN = re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
+# Authority part of a URL, split the way tldextract splits it (scheme only stripped before '//')
+_AUTHORITY = re.compile(r'(?:[A-Za-z0-9+.\-]+:)?//([^/?#]*)|([^/?#]*)')
+
+# ASCII characters counted by num_special_chars (not alphanumeric, not one of '.:/-')
+_SPECIAL_ASCII = np.array([not (chr(c).isalnum() or chr(c) in '.:/-') for c in range(128)])
+
+
+@lru_cache(maxsize=65536)
+def _subdomain_count(authority: str) -> int:
+    """Number of subdomain labels; hosts repeat heavily, so tldextract runs once per host"""
+    subdomain = tldextract.extract(authority).subdomain
+    return len(subdomain.split('.')) if subdomain else 0
+
+
+def _url_subdomain_count(url: str) -> int:
+    match = _AUTHORITY.match(url)
+    return _subdomain_count(match.group(1) if match.group(1) is not None else match.group(2))
+
+
 class URLFeatureExtractor:
     """
     Extract features from URLs for machine learning models.
@@ -60,69 +91,66 @@ class URLFeatureExtractor:
         'suspend', 'limited', 'restricted', 'unusual', 'activity'
     ]
     
+    # Vectorized blocks hold at most BATCH_ROWS URLs and BATCH_CELLS padded
+    # characters; longer URLs are rare and take the per-URL path
+    BATCH_ROWS = 4096
+    BATCH_CELLS = 1 << 20
+    MAX_VECTOR_LENGTH = 2048
+
     def __init__(self):
         self.vectorizer = TfidfVectorizer(max_features=1000, ngram_range=(1, 2))
+        self._suspicious_re = re.compile('|'.join(re.escape(word) for word in self.SUSPICIOUS_WORDS))
     
-    def extract_features(self, url: str) -> URLFeatures:
-        """Extract comprehensive features from a URL."""
+    def extract_features(self, url: str, network: bool = True) -> URLFeatures:
+        """Extract comprehensive features from a URL.
+        
+        With network=False only lexical features are computed; SSL validity
+        and redirect count are left at False and 0.
+        """
         parsed = urlparse(url)
         extracted = tldextract.extract(url)
+        host = self._host_features([url])[0] if network else UNREACHABLE
         
         return URLFeatures(
             length=len(url),
             num_dots=url.count('.'),
-            num_subdomains=len(extracted.subdomain.split('.')) if extracted.subdomain else 0,
+            num_subdomains=_url_subdomain_count(url),
             num_special_chars=sum(1 for c in url if not c.isalnum() and c not in '.:/-'),
             has_ip=self._has_ip_address(parsed.netloc),
             has_suspicious_words=self._has_suspicious_words(url),
             domain_age=self._get_domain_age(extracted.domain),
-            ssl_cert_valid=self._check_ssl_certificate(url),
-            redirect_count=self._count_redirects(url),
+            ssl_cert_valid=host["ssl_cert_valid"],
+            redirect_count=host["redirect_count"],
             entropy=self._calculate_entropy(url)
         )
     
     def _has_ip_address(self, netloc: str) -> bool:
         """Check if URL contains IP address instead of domain."""
-        ip_pattern = r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b'
-        return bool(re.search(ip_pattern, netloc))
+        return bool(_IP_PATTERN.search(netloc))
     
     def _has_suspicious_words(self, url: str) -> bool:
         """Check for suspicious words commonly used in phishing."""
-        url_lower = url.lower()
-        return any(word in url_lower for word in self.SUSPICIOUS_WORDS)
+        return bool(self._suspicious_re.search(url.lower()))
     
     def _get_domain_age(self, domain: str) -> Optional[int]:
         """Get domain age (placeholder - would need WHOIS integration)."""
         # This would integrate with python-whois in real implementation
         return None
     
-    def _check_ssl_certificate(self, url: str) -> bool:
-        """Check SSL certificate validity."""
-        try:
-            response = requests.head(url, timeout=5, verify=True)
-            return response.status_code < 400
-        except:
-            return False
-    
-    def _count_redirects(self, url: str) -> int:
-        """Count number of redirects."""
-        try:
-            response = requests.head(url, timeout=5, allow_redirects=True)
-            return len(response.history)
-        except:
-            return 0
+    def _host_features(self, urls: List[str]) -> List[Dict]:
+        """SSL and redirect features per URL, probing each distinct origin once."""
+        origins = [url_origin(url) for url in urls]
+        enriched = enrich_origins(origins)
+        return [enriched.get(origin, UNREACHABLE) if origin else UNREACHABLE for origin in origins]
     
     def _calculate_entropy(self, text: str) -> float:
         """Calculate Shannon entropy of the URL."""
         if not text:
             return 0
         
-        entropy = 0
-        for char in set(text):
-            prob = text.count(char) / len(text)
-            entropy -= prob * np.log2(prob)
-        
-        return entropy
+        counts = np.fromiter(Counter(text).values(), dtype=np.float64)
+        probs = counts / len(text)
+        return float(-(probs * np.log2(probs)).sum())
     
     def features_to_vector(self, features: URLFeatures) -> np.ndarray:
         """Convert URLFeatures to numpy array for ML models."""
@@ -138,6 +166,113 @@ class URLFeatureExtractor:
             features.redirect_count,
             features.entropy
         ])
+    
+    def vector_to_features(self, vector: np.ndarray) -> URLFeatures:
+        """Inverse of features_to_vector (a domain age of 0 reads back as unknown)."""
+        return URLFeatures(
+            length=int(vector[0]),
+            num_dots=int(vector[1]),
+            num_subdomains=int(vector[2]),
+            num_special_chars=int(vector[3]),
+            has_ip=bool(vector[4]),
+            has_suspicious_words=bool(vector[5]),
+            domain_age=int(vector[6]) or None,
+            ssl_cert_valid=bool(vector[7]),
+            redirect_count=int(vector[8]),
+            entropy=float(vector[9])
+        )
+    
+    def extract_feature_matrix(self, urls: Iterable[str], network: bool = True) -> np.ndarray:
+        """
+        Extract features for many URLs into one matrix.
+        
+        Character-level features (length, dots, special characters,
+        entropy) are computed with NumPy over blocks of URLs laid out as
+        padded code-point arrays; subdomain counts are looked up once per
+        distinct host.
+        
+        Args:
+            urls: URLs to featurize
+            network: Also fill SSL validity and redirects from one cached probe per
+                     distinct origin; when False those columns are 0 and no
+                     requests are made
+        
+        Returns:
+            Array of shape (len(urls), len(FEATURE_NAMES)), rows matching
+            features_to_vector(extract_features(url))
+        """
+        urls = list(urls)
+        matrix = np.zeros((len(urls), len(FEATURE_NAMES)), dtype=np.float64)
+        if not urls:
+            return matrix
+        
+        lengths = np.fromiter((len(url) for url in urls), dtype=np.int64, count=len(urls))
+        # Similar lengths share a block, keeping padding small
+        order = np.argsort(lengths, kind='stable')
+        sorted_lengths = lengths[order]
+        vectorized = int(np.searchsorted(sorted_lengths, self.MAX_VECTOR_LENGTH, side='right'))
+        start = 0
+        while start < vectorized:
+            end = min(vectorized, start + self.BATCH_ROWS)
+            # Shrink until rows x longest URL in the block fits the cell budget
+            while end - start > 1 and (end - start) * sorted_lengths[end - 1] > self.BATCH_CELLS:
+                end = start + max(1, self.BATCH_CELLS // int(sorted_lengths[end - 1]))
+            rows = order[start:end]
+            matrix[rows] = self._character_features([urls[i] for i in rows], lengths[rows])
+            start = end
+        for i in order[vectorized:]:
+            matrix[i, [0, 1, 3, 9]] = self._scalar_character_features(urls[i])
+        
+        matrix[:, 2] = [_url_subdomain_count(url) for url in urls]
+        matrix[:, 5] = [self._suspicious_re.search(url.lower()) is not None for url in urls]
+        # An address in the netloc is also one in the URL, so most URLs skip parsing
+        for i in [i for i, url in enumerate(urls) if _IP_PATTERN.search(url)]:
+            try:
+                matrix[i, 4] = self._has_ip_address(urlparse(urls[i]).netloc)
+            except ValueError:
+                pass
+        
+        if network:
+            hosts = self._host_features(urls)
+            matrix[:, 7] = [host["ssl_cert_valid"] for host in hosts]
+            matrix[:, 8] = [host["redirect_count"] for host in hosts]
+        return matrix
+    
+    def _character_features(self, urls: List[str], lengths: np.ndarray) -> np.ndarray:
+        """length, num_dots, num_special_chars and entropy columns for one block"""
+        block = np.zeros((len(urls), len(FEATURE_NAMES)), dtype=np.float64)
+        block[:, 0] = lengths
+        if lengths.max() == 0:
+            return block
+        
+        codes = np.array(urls, dtype=str).view(np.uint32).reshape(len(urls), -1)
+        valid = np.arange(codes.shape[1]) < lengths[:, None]
+        block[:, 1] = (codes == ord('.')).sum(axis=1)
+        
+        ascii_rows = ~((codes >= 128) & valid).any(axis=1)
+        counted = valid & ascii_rows[:, None]
+        ascii_codes = np.where(counted, codes, 0).astype(np.uint8)
+        del codes
+        block[:, 3] = (_SPECIAL_ASCII[ascii_codes] & valid).sum(axis=1)
+        
+        # Per-row character histograms in one bincount (blocks are small
+        # enough for int32 bin indices)
+        bins = np.arange(len(urls), dtype=np.int32)[:, None] * 128 + ascii_codes
+        counts = np.bincount(bins[counted], minlength=len(urls) * 128).reshape(len(urls), 128)
+        probs = counts / np.maximum(lengths, 1)[:, None]
+        logs = np.log2(probs, out=np.zeros_like(probs), where=counts > 0)
+        block[:, 9] = -(probs * logs).sum(axis=1)
+        
+        # Rare non-ASCII URLs keep exact str.isalnum semantics
+        for i in np.flatnonzero(~ascii_rows):
+            block[i, [0, 1, 3, 9]] = self._scalar_character_features(urls[i])
+        return block
+    
+    def _scalar_character_features(self, url: str) -> Tuple[int, int, int, float]:
+        """length, num_dots, num_special_chars and entropy of one URL"""
+        return (len(url), url.count('.'),
+                sum(1 for c in url if not c.isalnum() and c not in '.:/-'),
+                self._calculate_entropy(url))
 
 
 class PhishingNeuralNetwork(nn.Module):
@@ -150,6 +285,8 @@ class PhishingNeuralNetwork(nn.Module):
     
     def __init__(self, feature_size: int = 10, embedding_dim: int = 128):
         super(PhishingNeuralNetwork, self).__init__()
+        self.feature_size = feature_size
+        self.embedding_dim = embedding_dim
         
         # Feature processing layers
         self.feature_net = nn.Sequential(
@@ -194,9 +331,15 @@ class AIPhishingDetector:
         self.transformer_model = None
         self.ensemble_model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        # Standardization of neural network inputs, fitted on the training set
+        self.feature_mean = np.zeros(len(FEATURE_NAMES))
+        self.feature_scale = np.ones(len(FEATURE_NAMES))
         
         # Move neural network to device
         self.neural_net.to(self.device)
+    
+    def _normalize(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.feature_mean) / self.feature_scale
         
     def initialize_transformer(self, model_name: str = "distilbert-base-uncased"):
         """Initialize transformer model for text analysis."""
@@ -217,22 +360,21 @@ class AIPhishingDetector:
             epochs: Number of training epochs
         """
         # Extract features
-        features = []
-        for url in urls:
-            url_features = self.feature_extractor.extract_features(url)
-            feature_vector = self.feature_extractor.features_to_vector(url_features)
-            features.append(feature_vector)
-        
-        X = np.array(features)
+        X = self.feature_extractor.extract_feature_matrix(urls)
         y = np.array(labels)
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
+        # Fit input standardization (constant columns are left unscaled)
+        self.feature_mean = X_train.mean(axis=0)
+        scale = X_train.std(axis=0)
+        self.feature_scale = np.where(scale > 0, scale, 1.0)
+        
         # Convert to tensors
-        X_train_tensor = torch.FloatTensor(X_train).to(self.device)
+        X_train_tensor = torch.FloatTensor(self._normalize(X_train)).to(self.device)
         y_train_tensor = torch.LongTensor(y_train).to(self.device)
-        X_test_tensor = torch.FloatTensor(X_test).to(self.device)
+        X_test_tensor = torch.FloatTensor(self._normalize(X_test)).to(self.device)
         y_test_tensor = torch.LongTensor(y_test).to(self.device)
         
         # Training setup
@@ -264,6 +406,57 @@ class AIPhishingDetector:
         ensemble_accuracy = self.ensemble_model.score(X_test, y_test)
         print(f'Ensemble Model Test Accuracy: {ensemble_accuracy:.4f}')
     
+    def save(self, path: str = None):
+        """
+        Save the trained neural network, ensemble model and input
+        standardization as a versioned artifact.
+        
+        Args:
+            path: Artifact directory (default: Config.PHISHING_MODEL_PATH)
+        """
+        if not hasattr(self.ensemble_model, 'estimators_'):
+            raise ValueError("Model is not trained; call train_neural_network first")
+        state = {name: tensor.detach().cpu().numpy() for name, tensor in self.neural_net.state_dict().items()}
+        write_artifact(
+            path or Config.PHISHING_MODEL_PATH,
+            network_state=state,
+            network_config={
+                'feature_size': self.neural_net.feature_size,
+                'embedding_dim': self.neural_net.embedding_dim
+            },
+            normalization={'mean': self.feature_mean, 'scale': self.feature_scale},
+            ensemble=self.ensemble_model,
+            feature_names=FEATURE_NAMES
+        )
+    
+    @classmethod
+    def load(cls, path: str = None) -> 'AIPhishingDetector':
+        """
+        Load a detector saved with save(), without retraining.
+        
+        Args:
+            path: Artifact directory (default: Config.PHISHING_MODEL_PATH)
+        
+        Raises:
+            ModelArtifactError: If there is no compatible, readable artifact at path
+        """
+        artifact = read_artifact(path or Config.PHISHING_MODEL_PATH, FEATURE_NAMES)
+        detector = cls()
+        try:
+            detector.neural_net = PhishingNeuralNetwork(**artifact['manifest']['network']['config'])
+            detector.neural_net.load_state_dict(
+                {name: torch.from_numpy(array) for name, array in artifact['network_state'].items()}
+            )
+        except (RuntimeError, TypeError) as e:
+            # Tensors or network config that do not match the network architecture
+            raise ModelArtifactError(f"Saved phishing network does not match this version: {e}")
+        detector.neural_net.to(detector.device)
+        detector.neural_net.eval()
+        detector.feature_mean = artifact['normalization']['mean']
+        detector.feature_scale = artifact['normalization']['scale']
+        detector.ensemble_model = artifact['ensemble']
+        return detector
+    
     def predict_url(self, url: str) -> Dict[str, any]:
         """
         Predict if a URL is phishing using AI models.
@@ -271,60 +464,82 @@ class AIPhishingDetector:
         Returns:
             Dictionary with predictions from different models
         """
-        # Extract features
-        url_features = self.feature_extractor.extract_features(url)
-        feature_vector = self.feature_extractor.features_to_vector(url_features)
+        return self.predict_urls([url])[0]
+    
+    def predict_urls(self, urls: Iterable[str], batch_size: int = 1024,
+                     network: bool = True) -> List[Dict[str, any]]:
+        """
+        Predict many URLs at once.
         
-        results = {
-            'url': url,
-            'features': url_features,
-            'predictions': {}
-        }
+        Features are extracted into one matrix; the neural network scores it
+        in batches of stacked rows and the ensemble model in a single call.
         
-        # Neural network prediction
-        feature_tensor = torch.FloatTensor(feature_vector).unsqueeze(0).to(self.device)
+        Args:
+            urls: URLs to classify
+            batch_size: Rows per neural network forward pass
+            network: Include SSL and redirect features (see extract_feature_matrix)
+        
+        Returns:
+            One predict_url-style result per URL, in input order
+        """
+        urls = list(urls)
+        if not urls:
+            return []
+        matrix = self.feature_extractor.extract_feature_matrix(urls, network=network)
+        normalized = self._normalize(matrix)
+        
+        # Neural network predictions
         self.neural_net.eval()
+        nn_probs = []
         with torch.no_grad():
-            nn_output = self.neural_net(feature_tensor)
-            nn_probs = torch.nn.functional.softmax(nn_output, dim=1)
-            nn_prediction = torch.argmax(nn_probs, dim=1).item()
-            nn_confidence = torch.max(nn_probs).item()
-        
-        results['predictions']['neural_network'] = {
-            'prediction': nn_prediction,
-            'confidence': nn_confidence,
-            'probabilities': nn_probs.cpu().numpy().tolist()[0]
-        }
-        
-        # Ensemble prediction
-        ensemble_pred = self.ensemble_model.predict([feature_vector])[0]
-        ensemble_proba = self.ensemble_model.predict_proba([feature_vector])[0]
-        
-        results['predictions']['ensemble'] = {
-            'prediction': ensemble_pred,
-            'confidence': max(ensemble_proba),
-            'probabilities': ensemble_proba.tolist()
-        }
-        
-        # Transformer prediction (if available)
-        if self.transformer_model:
-            transformer_result = self.transformer_model.predict(url)
-            results['predictions']['transformer'] = transformer_result
-        
-        # Final ensemble decision
-        predictions = [
-            results['predictions']['neural_network']['prediction'],
-            results['predictions']['ensemble']['prediction']
-        ]
-        final_prediction = max(set(predictions), key=predictions.count)
-        
-        results['final_prediction'] = {
-            'is_phishing': bool(final_prediction),
-            'confidence': np.mean([
-                results['predictions']['neural_network']['confidence'],
-                results['predictions']['ensemble']['confidence']
-            ])
-        }
+            for start in range(0, len(urls), batch_size):
+                batch = torch.from_numpy(normalized[start:start + batch_size]).float().to(self.device)
+                nn_probs.append(torch.nn.functional.softmax(self.neural_net(batch), dim=1).cpu().numpy())
+        nn_probs = np.concatenate(nn_probs)
+        nn_predictions = nn_probs.argmax(axis=1)
+        
+        # Ensemble predictions (predict() is the argmax of predict_proba)
+        ensemble_probs = self.ensemble_model.predict_proba(matrix)
+        ensemble_predictions = self.ensemble_model.classes_.take(ensemble_probs.argmax(axis=1))
+        
+        results = []
+        for i, url in enumerate(urls):
+            result = {
+                'url': url,
+                'features': self.feature_extractor.vector_to_features(matrix[i]),
+                'predictions': {
+                    'neural_network': {
+                        'prediction': int(nn_predictions[i]),
+                        'confidence': float(nn_probs[i].max()),
+                        'probabilities': nn_probs[i].tolist()
+                    },
+                    'ensemble': {
+                        'prediction': ensemble_predictions[i],
+                        'confidence': ensemble_probs[i].max(),
+                        'probabilities': ensemble_probs[i].tolist()
+                    }
+                }
+            }
+            
+            # Transformer prediction (if available)
+            if self.transformer_model:
+                result['predictions']['transformer'] = self.transformer_model.predict(url)
+            
+            # Final ensemble decision
+            predictions = [
+                result['predictions']['neural_network']['prediction'],
+                result['predictions']['ensemble']['prediction']
+            ]
+            final_prediction = max(set(predictions), key=predictions.count)
+            
+            result['final_prediction'] = {
+                'is_phishing': bool(final_prediction),
+                'confidence': np.mean([
+                    result['predictions']['neural_network']['confidence'],
+                    result['predictions']['ensemble']['confidence']
+                ])
+            }
+            results.append(result)
         
         return results
     
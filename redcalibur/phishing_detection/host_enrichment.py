@@ -0,0 +1,122 @@
+"""
+Network enrichment for phishing features
+
+Probes each distinct origin (scheme://host[:port]) once, concurrently,
+for whether it answers over verified TLS and how many redirects it
+issues. Results are cached per origin, so repeated hosts in a batch, and
+in later batches within the TTL, cost no requests.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from ..cache import get_cache
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# Concurrent origin probes
+MAX_CONCURRENCY = 32
+DEFAULT_TIMEOUT = 5.0
+# Unreachable origins are retried sooner than answered ones
+FAILURE_TTL = 900
+
+UNREACHABLE = {"ssl_cert_valid": False, "redirect_count": 0, "reachable": False}
+
+
+def url_origin(url: str) -> Optional[str]:
+    """scheme://netloc of a URL, or None if it has no host to probe"""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc.lower()}"
+
+
+def _enrichment_cache():
+    return get_cache("phishing_hosts", Config.PHISHING_HOST_TTL)
+
+
+def _cached(origin: str) -> Optional[Dict]:
+    entry = _enrichment_cache().get(origin)
+    if entry is None:
+        return None
+    ttl = Config.PHISHING_HOST_TTL if entry.value.get("reachable") else FAILURE_TTL
+    return entry.value if time.time() - entry.stored_at < ttl else None
+
+
+async def _probe(session: aiohttp.ClientSession, origin: str) -> Dict:
+    """One HEAD request following redirects, with certificate verification"""
+    try:
+        async with session.head(origin + "/", allow_redirects=True) as response:
+            first_status = response.history[0].status if response.history else response.status
+            return {
+                "ssl_cert_valid": first_status < 400,
+                "redirect_count": len(response.history),
+                "reachable": True,
+            }
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        logger.debug(f"Enrichment probe of {origin} failed: {e}")
+        return dict(UNREACHABLE)
+
+
+async def enrich_origins_async(origins: Iterable[str], concurrency: int = MAX_CONCURRENCY,
+                               timeout: float = DEFAULT_TIMEOUT, use_cache: bool = True) -> Dict[str, Dict]:
+    """
+    Network features for many origins
+
+    Args:
+        origins: Origins as returned by url_origin
+        concurrency: Probes in flight at once
+        timeout: Per-probe timeout in seconds
+        use_cache: Reuse results cached within their TTL
+
+    Returns:
+        {origin: {"ssl_cert_valid", "redirect_count", "reachable"}}
+    """
+    origins = list(dict.fromkeys(o for o in origins if o))
+    results: Dict[str, Dict] = {}
+    if use_cache:
+        for origin in origins:
+            cached = _cached(origin)
+            if cached is not None:
+                results[origin] = cached
+    todo = [origin for origin in origins if origin not in results]
+    if not todo:
+        return results
+
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+
+        async def run(origin):
+            async with semaphore:
+                return origin, await _probe(session, origin)
+
+        cache = _enrichment_cache()
+        for origin, features in await asyncio.gather(*(run(origin) for origin in todo)):
+            cache.set(origin, features)
+            results[origin] = features
+    return results
+
+
+def enrich_origins(origins: Iterable[str], concurrency: int = MAX_CONCURRENCY,
+                   timeout: float = DEFAULT_TIMEOUT, use_cache: bool = True) -> Dict[str, Dict]:
+    """Blocking wrapper around enrich_origins_async"""
+    coroutine = enrich_origins_async(origins, concurrency, timeout, use_cache)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # Called from inside an event loop (async callers should await
+    # enrich_origins_async); run the probes on a private loop
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coroutine).result()
@@ -0,0 +1,169 @@
+"""
+Versioned on-disk format for trained phishing models
+
+An artifact is a directory holding a JSON manifest, one uncompressed .npy
+file per network tensor and per normalization vector, and the ensemble
+model as an uncompressed joblib pickle. Arrays are memory-mapped on load,
+so a warm start costs a few file opens instead of a training run.
+
+Artifacts contain pickled objects; only load ones you created.
+"""
+
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+import time
+from typing import Any, Dict, List
+
+import joblib
+import numpy as np
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NAME = "redcalibur-phishing-model"
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+class ModelArtifactError(ValueError):
+    """Missing, incomplete or incompatible model artifact"""
+
+
+def artifact_exists(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+def write_artifact(path: str, network_state: Dict[str, np.ndarray], network_config: Dict[str, Any],
+                   normalization: Dict[str, np.ndarray], ensemble: Any, feature_names: List[str]):
+    """
+    Write a model artifact, replacing any artifact already at path
+
+    The artifact is assembled next to path and renamed into place, so
+    readers never see a partially written model.
+
+    Args:
+        path: Artifact directory
+        network_state: Neural network state dict as NumPy arrays
+        network_config: Constructor arguments of the network
+        normalization: {"mean", "scale"} applied to network inputs
+        ensemble: Fitted ensemble model
+        feature_names: Feature column order the models were trained on
+    """
+    path = os.path.abspath(path)
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    staging = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(os.path.join(staging, "network"))
+
+    for name, array in network_state.items():
+        np.save(os.path.join(staging, "network", f"{name}.npy"), np.ascontiguousarray(array))
+    for name in ("mean", "scale"):
+        np.save(os.path.join(staging, f"{name}.npy"), np.asarray(normalization[name], dtype=np.float64))
+    joblib.dump(ensemble, os.path.join(staging, "ensemble.joblib"))
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "created_at": time.time(),
+        "feature_names": list(feature_names),
+        "network": {"config": network_config, "tensors": list(network_state)},
+    }
+    with open(os.path.join(staging, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    previous = None
+    if os.path.exists(path):
+        previous = f"{path}.old-{os.getpid()}"
+        os.rename(path, previous)
+    os.rename(staging, path)
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+    logger.info(f"Saved phishing model to {path}")
+
+
+def read_artifact(path: str, feature_names: List[str]) -> Dict[str, Any]:
+    """
+    Read a model artifact with its arrays memory-mapped
+
+    Args:
+        path: Artifact directory
+        feature_names: Feature column order the caller will supply
+
+    Returns:
+        {"manifest", "network_state", "normalization", "ensemble"}
+
+    Raises:
+        ModelArtifactError: If the artifact is missing, corrupt or was written
+            by an incompatible version
+    """
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ModelArtifactError(f"No readable phishing model at {path}: {e}")
+    if manifest.get("format") != FORMAT_NAME or manifest.get("version") != FORMAT_VERSION:
+        raise ModelArtifactError(
+            f"Unsupported model format {manifest.get('format')!r} version {manifest.get('version')!r} "
+            f"(expected {FORMAT_NAME} version {FORMAT_VERSION})"
+        )
+    if manifest.get("feature_names") != list(feature_names):
+        raise ModelArtifactError("Model was trained on a different feature set; retrain it")
+
+    try:
+        # Copy-on-write maps are writable views, so torch can wrap them without copying
+        network_state = {
+            name: np.load(os.path.join(path, "network", f"{name}.npy"), mmap_mode="c")
+            for name in manifest["network"]["tensors"]
+        }
+        normalization = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ("mean", "scale")
+        }
+        ensemble = joblib.load(os.path.join(path, "ensemble.joblib"), mmap_mode="r")
+    except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError,
+            AttributeError, ImportError, IndexError, TypeError) as e:
+        # A truncated or foreign pickle surfaces as any of these from joblib.load
+        raise ModelArtifactError(f"Incomplete or corrupt phishing model at {path}: {e}")
+    return {
+        "manifest": manifest,
+        "network_state": network_state,
+        "normalization": normalization,
+        "ensemble": ensemble,
+    }
+
+
+_default_detector = None
+_default_detector_key = None
+_default_detector_lock = threading.Lock()
+
+
+def get_default_detector():
+    """
+    Shared detector loaded from Config.PHISHING_MODEL_PATH
+
+    Reloaded when the artifact is replaced; None if no model has been saved
+    or the saved one cannot be loaded (the failure is logged once per
+    artifact version, not retried on every call).
+    """
+    global _default_detector, _default_detector_key
+    from . import AIPhishingDetector
+
+    path = Config.PHISHING_MODEL_PATH
+    with _default_detector_lock:
+        try:
+            key = (path, os.stat(os.path.join(path, MANIFEST)).st_mtime_ns)
+        except OSError:
+            return None
+        if _default_detector_key != key:
+            try:
+                _default_detector = AIPhishingDetector.load(path)
+            except ModelArtifactError as e:
+                logger.error(f"Ignoring phishing model at {path}: {e}")
+                _default_detector = None
+            _default_detector_key = key
+        return _default_detector
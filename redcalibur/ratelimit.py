@@ -0,0 +1,92 @@
+"""
+Rate limiting helpers for RedCalibur
+
+Sliding-window limiter shared by synchronous and asyncio callers, plus
+exponential backoff with jitter for retrying throttled requests and
+polling long-running jobs.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Iterator, Optional
+
+
+class SlidingWindowLimiter:
+    """
+    Allow at most max_calls within any rolling window of period seconds
+
+    Callers reserve a slot and sleep until it comes up, so threads and
+    coroutines can share one limiter without holding a lock while waiting.
+    """
+
+    def __init__(self, max_calls: int, period: float):
+        if max_calls < 1:
+            raise ValueError("max_calls must be at least 1")
+        self.max_calls = max_calls
+        self.period = period
+        self._slots = deque()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Reserve the next available slot
+
+        Returns:
+            Seconds the caller must wait before making its call
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._slots and self._slots[0] <= now - self.period:
+                self._slots.popleft()
+
+            if len(self._slots) < self.max_calls:
+                slot = max(now, self._slots[-1]) if self._slots else now
+            else:
+                slot = max(now, self._slots[-self.max_calls] + self.period)
+            self._slots.append(slot)
+            return slot - now
+
+    def acquire(self):
+        """Block until a call is allowed"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a call is allowed"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0,
+                  retry_after: Optional[str] = None) -> float:
+    """
+    Delay before retry number `attempt` (0-based)
+
+    Honors a numeric Retry-After header when present, otherwise uses
+    exponential backoff with full jitter.
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), cap)
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def exponential_intervals(initial: float, factor: float = 2.0, cap: float = 60.0,
+                          jitter: float = 0.2) -> Iterator[float]:
+    """
+    Polling delays that start short and grow geometrically up to cap
+
+    Each delay is randomized by +/- jitter (a fraction) so callers polling
+    in parallel spread out instead of firing in lockstep.
+    """
+    delay = initial
+    while True:
+        yield delay * random.uniform(1 - jitter, 1 + jitter)
+        delay = min(delay * factor, cap)
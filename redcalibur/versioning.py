@@ -0,0 +1,224 @@
+"""
+Version parsing and comparison for RedCalibur
+
+Normalizes vendor version strings (8.9p1, 2.4.41-ubuntu, 1.0.2k,
+1.0.0-rc1, 1:2.4.41) into fixed-width integer keys that compare correctly
+as tuples, and compares whole arrays of versions at once with NumPy.
+"""
+
+import re
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Key layout: epoch, RELEASE_PARTS numeric components, stage, pre-release
+# number, trailing letter, patch level
+RELEASE_PARTS = 6
+KEY_WIDTH = RELEASE_PARTS + 5
+
+# Pre-release stages sort before the final release
+STAGES = {"dev": 0, "alpha": 1, "a": 1, "beta": 2, "b": 2, "pre": 3, "rc": 3, "c": 3}
+RELEASE_STAGE = 4
+
+# Sort below / above every real version key
+MIN_VERSION_KEY: Tuple[int, ...] = ()
+MAX_VERSION_KEY: Tuple[int, ...] = (np.iinfo(np.int64).max,)
+
+_PRE_RELEASE = r"(?:alpha|beta|pre|rc|dev|a|b|c)\.?\d*"
+
+_VERSION_RE = re.compile(
+    r"^(?:(?P<epoch>\d+):)?v?"
+    r"(?P<release>\d+(?:\.\d+)*)"
+    r"(?:p(?P<patch>\d+)|(?P<letter>[a-z])(?![a-z\d]))?"
+    r"(?:[._-]?(?P<stage>alpha|beta|pre|rc|dev|a|b|c)\.?(?P<pre>\d*))?"
+)
+
+# Distribution / build suffixes ('-ubuntu', '+deb11u1', '~bpo', ' (Ubuntu)')
+# are cut off unless they are a pre-release tag ('-rc1', '-beta')
+_SUFFIX_RE = re.compile(rf"[-+~ (](?!{_PRE_RELEASE}(?:$|[-+~ (.]))")
+
+_VERSION_CORE = rf"(\d+(?:\.\d+)*(?:p\d+|[a-z](?![a-z]))?(?:[-_.]?{_PRE_RELEASE}(?![a-z]))?)"
+
+# Generic version in free text: at least major.minor, not glued to another number
+_BANNER_VERSION_RE = re.compile(
+    rf"(?<![\d.])v?(\d+(?:\.\d+)+(?:p\d+|[a-z](?![a-z]))?(?:[-_.]?{_PRE_RELEASE}(?![a-z]))?)"
+)
+
+# Protocol versions that precede the product version in banners
+_PROTOCOL_RE = re.compile(r"\b(?:ssh|http|https|rtsp|sip|smb)[-/]\d+(?:\.\d+)?-?", re.IGNORECASE)
+
+
+def _parse_version(version: Optional[str]) -> Optional[tuple]:
+    """Split a version into (epoch, release parts, stage, pre, letter, patch)"""
+    text = (version or "").strip().lower()
+    if text.startswith("version"):
+        text = text[7:].lstrip(" :=")
+    match = _SUFFIX_RE.search(text)
+    if match:
+        text = text[:match.start()]
+
+    match = _VERSION_RE.match(text)
+    if not match:
+        return None
+
+    stage = match.group("stage")
+    letter = match.group("letter")
+    return (
+        int(match.group("epoch") or 0),
+        [int(part) for part in match.group("release").split(".")][:RELEASE_PARTS],
+        STAGES[stage] if stage else RELEASE_STAGE,
+        int(match.group("pre") or 0),
+        ord(letter) - ord("a") + 1 if letter else 0,
+        int(match.group("patch") or 0),
+    )
+
+
+def version_key(version: Optional[str]) -> Optional[Tuple[int, ...]]:
+    """
+    Comparable key for a version string
+
+    '8.9' < '8.9p1' < '8.10', '1.0.2' < '1.0.2k' < '1.0.3',
+    '1.0.0rc1' < '1.0.0', and '2.4.41-ubuntu' == '2.4.41'.
+
+    Args:
+        version: Version string
+
+    Returns:
+        Tuple of KEY_WIDTH integers, or None if no version can be parsed
+        (e.g., '*', '-', 'unknown')
+    """
+    parsed = _parse_version(version)
+    if parsed is None:
+        return None
+    epoch, release, stage, pre, letter, patch = parsed
+    return (epoch, *release, *([0] * (RELEASE_PARTS - len(release))), stage, pre, letter, patch)
+
+
+def normalize_version(version: Optional[str]) -> Optional[str]:
+    """
+    Canonical spelling of a version string
+
+    Args:
+        version: Version string (e.g., 'v2.4.41-ubuntu', '1.0.0-RC1')
+
+    Returns:
+        Normalized version (e.g., '2.4.41', '1.0.0rc1'), or None if unparseable
+    """
+    parsed = _parse_version(version)
+    if parsed is None:
+        return None
+    epoch, release, stage, pre, letter, patch = parsed
+
+    normalized = ".".join(str(part) for part in release)
+    if epoch:
+        normalized = f"{epoch}:{normalized}"
+    if letter:
+        normalized += chr(ord("a") + letter - 1)
+    if patch:
+        normalized += f"p{patch}"
+    if stage != RELEASE_STAGE:
+        name = {0: "dev", 1: "alpha", 2: "beta", 3: "rc"}[stage]
+        normalized += f"{name}{pre or ''}"
+    return normalized
+
+
+def compare_versions(a: str, b: str) -> int:
+    """
+    Compare two version strings
+
+    Returns:
+        -1, 0 or 1; unparseable versions sort below parseable ones
+    """
+    key_a, key_b = version_key(a), version_key(b)
+    if key_a is None or key_b is None:
+        return (key_a is not None) - (key_b is not None)
+    return (key_a > key_b) - (key_a < key_b)
+
+
+def extract_version(text: str, product: str = None) -> str:
+    """
+    Find the version in a banner or version string
+
+    Protocol versions (e.g., the '2.0' in 'SSH-2.0-OpenSSH_8.9p1') are
+    skipped, and a version directly following the product name is preferred.
+
+    Args:
+        text: Banner or version text
+        product: Product name expected before the version (e.g., 'openssh')
+
+    Returns:
+        Version string as it appears in the text, or an empty string
+    """
+    text = _PROTOCOL_RE.sub(" ", (text or "").lower())
+    if product:
+        match = re.search(re.escape(product.lower()) + r"[\s_/:=(-]*(?:version[\s:=]*)?v?" + _VERSION_CORE, text)
+        if match:
+            return match.group(1).rstrip(".")
+    match = _BANNER_VERSION_RE.search(text)
+    return match.group(1).rstrip(".") if match else ""
+
+
+def encode_versions(versions: Iterable[Optional[str]]) -> np.ndarray:
+    """
+    Encode many versions as an (n, KEY_WIDTH) int64 array of keys
+
+    Unparseable versions are encoded as rows of -1 and never fall inside a
+    range checked by versions_in_range.
+    """
+    rows = [version_key(v) or (-1,) * KEY_WIDTH for v in versions]
+    if not rows:
+        return np.empty((0, KEY_WIDTH), dtype=np.int64)
+    return np.array(rows, dtype=np.int64)
+
+
+def compare_keys(keys: np.ndarray, version: str) -> np.ndarray:
+    """
+    Compare every encoded version against one version
+
+    Args:
+        keys: Output of encode_versions
+        version: Version to compare against
+
+    Returns:
+        int8 array of -1 / 0 / 1 (keys below / equal / above the version)
+    """
+    key = version_key(version)
+    if key is None:
+        raise ValueError(f"Unparseable version: {version!r}")
+    diff = keys - np.array(key, dtype=np.int64)
+    # Lexicographic order is decided by the first differing component
+    first = (diff != 0).argmax(axis=1)
+    return np.sign(diff[np.arange(len(keys)), first]).astype(np.int8)
+
+
+def versions_in_range(versions, start_including: str = None, start_excluding: str = None,
+                      end_including: str = None, end_excluding: str = None) -> np.ndarray:
+    """
+    Vectorized check of which versions fall within an (NVD-style) range
+
+    Args:
+        versions: Version strings or the output of encode_versions
+        start_including / start_excluding: Lower bound (optional)
+        end_including / end_excluding: Upper bound (optional)
+
+    Returns:
+        Boolean array, True where the version is inside the range
+    """
+    keys = versions if isinstance(versions, np.ndarray) else encode_versions(versions)
+    mask = keys[:, 0] >= 0
+    if start_including:
+        mask &= compare_keys(keys, start_including) >= 0
+    if start_excluding:
+        mask &= compare_keys(keys, start_excluding) > 0
+    if end_including:
+        mask &= compare_keys(keys, end_including) <= 0
+    if end_excluding:
+        mask &= compare_keys(keys, end_excluding) < 0
+    return mask
+
+
+def sort_versions(versions: List[str]) -> List[str]:
+    """Sort version strings in version order (unparseable versions first)"""
+    keys = encode_versions(versions)
+    order = np.lexsort(keys.T[::-1]) if len(versions) else []
+    return [versions[i] for i in order]
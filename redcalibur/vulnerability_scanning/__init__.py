@@ -8,10 +8,15 @@ and databases like NVD, CVE, and Exploit-DB.
 
 from .cve_scanner import scan_for_cves
 from .service_vuln_check import check_service_vulnerabilities
-from .exploit_finder import find_exploits
+from .exploit_finder import find_exploits, find_exploits_many
+from .cve_store import CVEStore
+from .exploit_index import ExploitIndex
 
 __all__ = [
     'scan_for_cves',
     'check_service_vulnerabilities',
-    'find_exploits'
+    'find_exploits',
+    'find_exploits_many',
+    'CVEStore',
+    'ExploitIndex'
 ]
@@ -0,0 +1,317 @@
+"""
+CPE Matcher - Match detected services to CVEs by CPE and affected version ranges
+Normalizes banners to CPE vendor/product/version and answers version queries
+from an interval index built over the local NVD mirror
+"""
+
+import logging
+import re
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from ..versioning import (
+    MAX_VERSION_KEY, MIN_VERSION_KEY, encode_versions, normalize_version, version_key, versions_in_range
+)
+from .cve_store import CVEStore, SEVERITY_LEVELS, format_cve
+
+logger = logging.getLogger(__name__)
+
+# Banner signatures -> CPE (vendor, product) candidates. Order matters: more
+# specific products (e.g., Tomcat) must come before generic ones (Apache httpd).
+PRODUCT_SIGNATURES: List[Tuple[str, List[Tuple[str, str]]]] = [
+    (r"openssh[_ /-]?(?P<version>\d[\w.]*)?", [("openbsd", "openssh")]),
+    (r"dropbear(?:[_ ]sshd?)?[_ ]?v?(?P<version>\d[\w.]*)?", [("dropbear_ssh_project", "dropbear_ssh")]),
+    (r"apache[- ]?tomcat(?:/|\s+)?(?P<version>\d[\w.]*)?", [("apache", "tomcat")]),
+    (r"apache(?:[/ ](?:httpd[/ ]?)?(?P<version>\d[\w.]*))?", [("apache", "http_server")]),
+    (r"nginx(?:/(?P<version>\d[\w.]*))?", [("f5", "nginx"), ("nginx", "nginx")]),
+    (r"microsoft[- ]iis(?:/(?P<version>\d[\w.]*))?", [("microsoft", "internet_information_services")]),
+    (r"lighttpd(?:/(?P<version>\d[\w.]*))?", [("lighttpd", "lighttpd")]),
+    (r"jetty(?:\(|/)?(?P<version>\d[\w.]*)?", [("eclipse", "jetty")]),
+    (r"vsftpd\s*\(?(?P<version>\d[\w.]*)?", [("beasts", "vsftpd")]),
+    (r"proftpd(?: server)?\s*\(?(?P<version>\d[\w.]*)?", [("proftpd", "proftpd")]),
+    (r"pure-ftpd", [("pureftpd", "pure-ftpd")]),
+    (r"filezilla server\s*(?P<version>\d[\w.]*)?", [("filezilla-project", "filezilla_server")]),
+    (r"exim\s*(?P<version>\d[\w.]*)?", [("exim", "exim")]),
+    (r"postfix", [("postfix", "postfix")]),
+    (r"sendmail\s*(?P<version>\d[\w.]*)?", [("sendmail", "sendmail")]),
+    (r"(?:(?P<version>\d[\w.]*)-)?mariadb", [("mariadb", "mariadb")]),
+    (r"mysql\s*(?P<version>\d[\w.]*)?", [("oracle", "mysql"), ("mysql", "mysql")]),
+    (r"postgresql\s*(?P<version>\d[\w.]*)?", [("postgresql", "postgresql")]),
+    (r"redis(?:[_ ]server)?(?:\s*v=|\s+)?(?P<version>\d[\w.]*)?", [("redis", "redis")]),
+    (r"mongodb\s*(?P<version>\d[\w.]*)?", [("mongodb", "mongodb")]),
+]
+_COMPILED_SIGNATURES = [(re.compile(pattern), cpes) for pattern, cpes in PRODUCT_SIGNATURES]
+
+
+def identify_product(service: str, version_string: str = "", banner: str = "") -> Optional[Dict[str, Any]]:
+    """
+    Normalize a detected service to CPE vendor/product/version
+
+    Args:
+        service: Detected service name (e.g., 'SSH', 'HTTP')
+        version_string: Version text reported by service detection (e.g., 'OpenSSH 8.9p1')
+        banner: Raw service banner, used when the version text is not conclusive
+
+    Returns:
+        Dictionary with 'cpes' (vendor, product candidates) and 'version', or None
+    """
+    for text in (f"{service or ''} {version_string or ''}", banner or ""):
+        text = text.lower().strip()
+        if not text:
+            continue
+        for regex, cpes in _COMPILED_SIGNATURES:
+            match = regex.search(text)
+            if match:
+                version = match.groupdict().get("version")
+                if version:
+                    version = normalize_version(version) or version.rstrip(".")
+                return {"cpes": cpes, "version": version}
+    return None
+
+
+class VersionInterval:
+    """A range of affected versions for one CVE"""
+
+    __slots__ = ("lo", "lo_incl", "hi", "hi_incl", "cve_id")
+
+    def __init__(self, lo: tuple, lo_incl: bool, hi: tuple, hi_incl: bool, cve_id: str):
+        self.lo = lo
+        self.lo_incl = lo_incl
+        self.hi = hi
+        self.hi_incl = hi_incl
+        self.cve_id = cve_id
+
+    def contains(self, key: tuple) -> bool:
+        if key < self.lo or (key == self.lo and not self.lo_incl):
+            return False
+        if key > self.hi or (key == self.hi and not self.hi_incl):
+            return False
+        return True
+
+
+class _IntervalNode:
+    __slots__ = ("center", "by_lo", "by_hi", "left", "right")
+
+    def __init__(self, intervals: List[VersionInterval]):
+        endpoints = sorted({iv.lo for iv in intervals} | {iv.hi for iv in intervals})
+        self.center = endpoints[len(endpoints) // 2]
+
+        left, right, here = [], [], []
+        for iv in intervals:
+            if iv.hi < self.center:
+                left.append(iv)
+            elif iv.lo > self.center:
+                right.append(iv)
+            else:
+                here.append(iv)
+
+        self.by_lo = sorted(here, key=lambda iv: iv.lo)
+        self.by_hi = sorted(here, key=lambda iv: iv.hi, reverse=True)
+        self.left = _IntervalNode(left) if left else None
+        self.right = _IntervalNode(right) if right else None
+
+
+class VersionIntervalIndex:
+    """
+    Centered interval tree over affected version ranges
+
+    Stabbing queries ("which ranges contain version v?") run in
+    O(log n + k) instead of testing every range.
+    """
+
+    def __init__(self, intervals: List[VersionInterval]):
+        self.size = len(intervals)
+        self.root = _IntervalNode(intervals) if intervals else None
+
+    def query(self, key: tuple) -> List[str]:
+        """Return CVE IDs whose range contains the version key"""
+        found = []
+        node = self.root
+        while node is not None:
+            if key < node.center:
+                for iv in node.by_lo:
+                    if iv.lo > key:
+                        break
+                    if iv.contains(key):
+                        found.append(iv.cve_id)
+                node = node.left
+            elif key > node.center:
+                for iv in node.by_hi:
+                    if iv.hi < key:
+                        break
+                    if iv.contains(key):
+                        found.append(iv.cve_id)
+                node = node.right
+            else:
+                found.extend(iv.cve_id for iv in node.by_lo if iv.contains(key))
+                break
+        return found
+
+
+def build_index(rows: List[Dict[str, Any]]) -> Tuple[VersionIntervalIndex, List[str]]:
+    """
+    Build an interval index from cve_cpes rows
+
+    Args:
+        rows: Output of CVEStore.cpe_ranges
+
+    Returns:
+        (index over bounded ranges, CVE IDs affecting every version)
+    """
+    intervals = []
+    all_versions = []
+    for row in rows:
+        version = row.get("version") or "*"
+        if version == "-":
+            continue
+        if version != "*":
+            key = version_key(version)
+            if key is not None:
+                intervals.append(VersionInterval(key, True, key, True, row["cve_id"]))
+            continue
+
+        bounds = (row.get("version_start_including"), row.get("version_start_excluding"),
+                  row.get("version_end_including"), row.get("version_end_excluding"))
+        if not any(bounds):
+            all_versions.append(row["cve_id"])
+            continue
+
+        start_incl, start_excl, end_incl, end_excl = bounds
+        # Unparseable bounds are treated as open so matches err on the side of reporting
+        lo = version_key(start_incl or start_excl) or MIN_VERSION_KEY
+        hi = version_key(end_incl or end_excl) or MAX_VERSION_KEY
+        intervals.append(VersionInterval(lo, not start_excl, hi, not end_excl, row["cve_id"]))
+
+    return VersionIntervalIndex(intervals), all_versions
+
+
+class CPEMatcher:
+    """
+    Resolve (vendor, product, version) to the exact CVEs that apply
+
+    Interval indexes are built lazily per product and rebuilt when the
+    underlying store changes.
+    """
+
+    def __init__(self, store: CVEStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self._indexes: Dict[Tuple[str, str], Tuple[VersionIntervalIndex, List[str]]] = {}
+        self._generation = None
+
+    def _index_for(self, vendor: str, product: str) -> Tuple[VersionIntervalIndex, List[str]]:
+        generation = self.store.generation
+        with self._lock:
+            if generation != self._generation:
+                self._indexes.clear()
+                self._generation = generation
+            key = (vendor, product)
+            if key not in self._indexes:
+                self._indexes[key] = build_index(self.store.cpe_ranges(vendor, product))
+            return self._indexes[key]
+
+    def match(self, vendor: str, product: str, version: str = None) -> List[str]:
+        """
+        CVE IDs affecting a product version
+
+        Args:
+            vendor: CPE vendor
+            product: CPE product
+            version: Detected version; when None every CVE for the product is returned
+
+        Returns:
+            List of CVE IDs
+        """
+        key = version_key(version)
+        if key is None:
+            return list(dict.fromkeys(row["cve_id"] for row in self.store.cpe_ranges(vendor, product)))
+        index, all_versions = self._index_for(vendor, product)
+        return list(dict.fromkeys(all_versions + index.query(key)))
+
+    def match_versions(self, vendor: str, product: str, versions: List[str]) -> Dict[str, List[str]]:
+        """
+        CVE IDs affecting each of many versions of one product
+
+        Every affected range is checked against the whole inventory with
+        one vectorized comparison, rather than querying version by version.
+
+        Args:
+            vendor: CPE vendor
+            product: CPE product
+            versions: Detected versions (e.g., one per host)
+
+        Returns:
+            Mapping of each parseable version to its CVE IDs
+        """
+        unique = list(dict.fromkeys(v for v in versions if version_key(v) is not None))
+        keys = encode_versions(unique)
+        hits = {version: [] for version in unique}
+        for row in self.store.cpe_ranges(vendor, product):
+            version = row.get("version") or "*"
+            if version == "-":
+                continue
+            if version != "*":
+                target = version_key(version)
+                if target is None:
+                    continue
+                mask = np.all(keys == np.array(target, dtype=np.int64), axis=1)
+            else:
+                # Unparseable bounds are ignored, matching build_index's open intervals
+                bounds = {name: value if version_key(value) else None for name, value in (
+                    ("start_including", row.get("version_start_including")),
+                    ("start_excluding", row.get("version_start_excluding")),
+                    ("end_including", row.get("version_end_including")),
+                    ("end_excluding", row.get("version_end_excluding")),
+                )}
+                mask = versions_in_range(keys, **bounds)
+            for i in np.flatnonzero(mask):
+                hits[unique[i]].append(row["cve_id"])
+        return {version: list(dict.fromkeys(ids)) for version, ids in hits.items()}
+
+    def match_product(self, product: Dict[str, Any], max_results: int = 100) -> Dict[str, Any]:
+        """
+        Look up CVEs for a product identified by identify_product
+
+        Args:
+            product: Dictionary with 'cpes' candidates and 'version'
+            max_results: Maximum number of CVEs returned (highest CVSS first)
+
+        Returns:
+            Dictionary shaped like scan_for_cves results
+        """
+        version = product.get("version")
+        cve_ids: List[str] = []
+        for vendor, name in product["cpes"]:
+            cve_ids.extend(self.match(vendor, name, version))
+
+        rows = self.store.get_summaries(cve_ids)
+        counts = {level: 0 for level in SEVERITY_LEVELS}
+        for row in rows:
+            if row["severity"] in counts:
+                counts[row["severity"]] += 1
+
+        vendor, name = product["cpes"][0]
+        results = {
+            "cpe": f"cpe:2.3:a:{vendor}:{name}:{version or '*'}",
+            "version": version,
+            "cves": [format_cve(row) for row in rows[:max_results]],
+            "total_found": len(rows),
+            "source": "local",
+            "match_type": "cpe_version" if version else "cpe_product",
+        }
+        for level, count in counts.items():
+            results[f"{level.lower()}_count"] = count
+        return results
+
+
+_matchers: Dict[int, CPEMatcher] = {}
+
+
+def get_matcher(store: CVEStore) -> CPEMatcher:
+    """Shared matcher per store, so interval indexes are reused across lookups"""
+    matcher = _matchers.get(id(store))
+    if matcher is None or matcher.store is not store:
+        matcher = _matchers[id(store)] = CPEMatcher(store)
+    return matcher
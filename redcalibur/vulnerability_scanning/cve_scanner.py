@@ -1,124 +1,231 @@
 """
 CVE Scanner - Scan for Common Vulnerabilities and Exposures
-Uses NVD (National Vulnerability Database) API
+Answers from the local NVD mirror when available, otherwise uses the
+NVD (National Vulnerability Database) API
 """
 
+import asyncio
+import copy
+import aiohttp
 import requests
 import time
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+
+from ..cache import CacheEntry, SingleFlight, get_cache
+from ..config import Config
+from ..ratelimit import SlidingWindowLimiter, backoff_delay
+from .cve_store import get_default_store, parse_nvd_cve, format_cve
 
 logger = logging.getLogger(__name__)
 
+NVD_API_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0"
+
+# NVD public quotas: 5 requests per rolling 30 seconds, 50 with an API key
+NVD_WINDOW_SECONDS = 30
+NVD_REQUESTS_PER_WINDOW = 5
+NVD_REQUESTS_PER_WINDOW_WITH_KEY = 50
+
+# Statuses NVD returns when throttling or briefly unavailable
+RETRY_STATUSES = {403, 429, 503}
+
+# Identical lookups running at the same time share one NVD request
+_inflight = SingleFlight()
+
+_limiters: Dict[int, SlidingWindowLimiter] = {}
+
+
+def nvd_limiter() -> SlidingWindowLimiter:
+    """Process-wide limiter sized to the NVD quota for the configured key"""
+    max_calls = NVD_REQUESTS_PER_WINDOW_WITH_KEY if Config.NVD_API_KEY else NVD_REQUESTS_PER_WINDOW
+    limiter = _limiters.get(max_calls)
+    if limiter is None:
+        limiter = _limiters.setdefault(max_calls, SlidingWindowLimiter(max_calls, NVD_WINDOW_SECONDS))
+    return limiter
 
-def scan_for_cves(software: str, version: str = None) -> Dict[str, Any]:
+
+def _empty_results(software: str, version: str = None) -> Dict[str, Any]:
+    return {
+        "software": software,
+        "version": version,
+        "cves": [],
+        "total_found": 0,
+        "critical_count": 0,
+        "high_count": 0,
+        "medium_count": 0,
+        "low_count": 0
+    }
+
+
+def scan_for_cves(software: str, version: str = None, use_local: bool = True,
+                  live_fallback: bool = None, max_results: int = 100,
+                  use_cache: bool = True) -> Dict[str, Any]:
     """
     Search for CVEs related to specific software/service
     
     Args:
         software: Software name (e.g., 'apache', 'nginx', 'openssh')
         version: Specific version if known
+        use_local: Query the local NVD mirror first
+        live_fallback: Use the NVD API when no local mirror is available
+                       (defaults to Config.CVE_LIVE_FALLBACK)
+        max_results: Maximum number of CVEs returned from the local mirror
+        use_cache: Serve live NVD results from the persistent response cache
         
     Returns:
         Dictionary containing CVE information
     """
-    results = {
-        "software": software,
-        "version": version,
-        "cves": [],
-        "total_found": 0,
-        "critical_count": 0,
-        "high_count": 0,
-        "medium_count": 0,
-        "low_count": 0
+    if live_fallback is None:
+        live_fallback = Config.CVE_LIVE_FALLBACK
+
+    keyword = f"{software}"
+    if version:
+        keyword = f"{software} {version}"
+
+    if use_local:
+        store = get_default_store()
+        if store is not None and store.has_data():
+            try:
+                return _scan_local(store, software, version, keyword, max_results)
+            except Exception as e:
+                logger.error(f"Local CVE store query failed: {e}")
+
+    if not live_fallback:
+        results = _empty_results(software, version)
+        results["error"] = "No local CVE database available and live NVD lookups are disabled"
+        return results
+
+    if not use_cache:
+        results = _scan_live(software, version, keyword)
+        results.pop("_etag", None)
+        results.pop("_last_modified", None)
+        return results
+
+    cache_key = lookup_key(software, version)
+    results = _inflight.do(cache_key, lambda: _scan_live_cached(software, version, keyword, cache_key))
+    return copy.deepcopy(results)
+
+
+def lookup_key(software: str, version: str = None) -> str:
+    """Normalized (software, version) key used to coalesce and cache lookups"""
+    return f"{' '.join(software.lower().split())}|{(version or '').lower().strip()}"
+
+
+def _scan_live_cached(software: str, version: str, keyword: str, cache_key: str) -> Dict[str, Any]:
+    """Serve a live lookup from the persistent cache, revalidating stale entries"""
+    cache = get_cache("nvd", Config.CVE_CACHE_TTL)
+    entry = cache.get(cache_key)
+    if entry is not None and entry.fresh:
+        logger.debug(f"NVD cache hit for {keyword}")
+        return dict(entry.value, cached=True)
+
+    results = _scan_live(software, version, keyword, cached_entry=entry)
+    return _store_live_results(cache, cache_key, entry, results)
+
+
+def _store_live_results(cache, cache_key: str, entry: Optional[CacheEntry],
+                        results: Dict[str, Any]) -> Dict[str, Any]:
+    """Record a live NVD answer in the cache and return the caller's copy"""
+    if results.get("not_modified"):
+        cache.touch(cache_key)
+        return dict(entry.value, cached=True)
+
+    etag = results.pop("_etag", None)
+    last_modified = results.pop("_last_modified", None)
+    if "error" not in results:
+        cache.set(cache_key, results, etag=etag, last_modified=last_modified)
+    return dict(results, cached=False)
+
+
+def _scan_local(store, software: str, version: str, keyword: str, max_results: int) -> Dict[str, Any]:
+    """Answer a CVE search from the local NVD mirror"""
+    results = _empty_results(software, version)
+    found = store.search(keyword=keyword, limit=max_results)
+
+    results["cves"] = [format_cve(row) for row in found["cves"]]
+    results["total_found"] = found["total_found"]
+    for level, count in found["severity_counts"].items():
+        results[f"{level}_count"] = count
+    results["source"] = "local"
+
+    logger.debug(f"Local CVE store returned {results['total_found']} CVEs for {keyword}")
+    return results
+
+
+def _nvd_request(keyword: str, cached_entry: CacheEntry = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Query parameters and headers for an NVD keyword search"""
+    params = {
+        "keywordSearch": keyword,
+        "resultsPerPage": 20  # Limit to avoid rate limiting
     }
+    headers = {
+        "User-Agent": "RedCalibur-Security-Tool/1.0"
+    }
+    if Config.NVD_API_KEY:
+        headers["apiKey"] = Config.NVD_API_KEY
+    if cached_entry is not None:
+        headers.update(cached_entry.conditional_headers())
+    return params, headers
+
+
+def _apply_nvd_response(results: Dict[str, Any], data: Dict[str, Any], keyword: str):
+    """Fill scan results from an NVD API response body"""
+    if "vulnerabilities" not in data:
+        logger.debug("No vulnerabilities found in NVD response")
+        return
+
+    for vuln_item in data.get("vulnerabilities", []):
+        cve_info = format_cve(parse_nvd_cve(vuln_item.get("cve", {})))
+        results["cves"].append(cve_info)
+
+        # Count by severity
+        severity = cve_info["severity"]
+        if severity == "CRITICAL":
+            results["critical_count"] += 1
+        elif severity == "HIGH":
+            results["high_count"] += 1
+        elif severity == "MEDIUM":
+            results["medium_count"] += 1
+        elif severity == "LOW":
+            results["low_count"] += 1
+
+    results["total_found"] = len(results["cves"])
+    if results["total_found"] > 0:
+        logger.info(f"Found {results['total_found']} CVEs for {keyword}")
+    else:
+        logger.debug(f"No CVEs found for {keyword}")
+
+
+def _status_error(status: int) -> str:
+    if status == 403:
+        logger.error("NVD API rate limit exceeded")
+        return "NVD API access forbidden - rate limit may be exceeded"
+    logger.error(f"NVD API error: {status}")
+    return f"NVD API returned status code: {status}"
+
+
+def _scan_live(software: str, version: str, keyword: str, cached_entry: CacheEntry = None) -> Dict[str, Any]:
+    """Search the public NVD API (conditionally, when a stale cached entry exists)"""
+    results = _empty_results(software, version)
+    results["source"] = "nvd"
     
     try:
-        # NVD API v2.0 endpoint
-        base_url = "https://services.nvd.nist.gov/rest/json/cves/2.0"
-        
-        # Construct search keyword
-        keyword = f"{software}"
-        if version:
-            keyword = f"{software} {version}"
-        
-        params = {
-            "keywordSearch": keyword,
-            "resultsPerPage": 20  # Limit to avoid rate limiting
-        }
-        
+        params, headers = _nvd_request(keyword, cached_entry)
         logger.info(f"Searching NVD for: {keyword}")
+
+        nvd_limiter().acquire()
+        response = requests.get(NVD_API_URL, params=params, headers=headers, timeout=15)
         
-        # Make request with proper headers
-        headers = {
-            "User-Agent": "RedCalibur-Security-Tool/1.0"
-        }
-        
-        response = requests.get(base_url, params=params, headers=headers, timeout=15)
-        
+        if response.status_code == 304 and cached_entry is not None:
+            logger.debug(f"NVD response for {keyword} not modified")
+            return {"not_modified": True}
+
         if response.status_code == 200:
-            data = response.json()
-            
-            if "vulnerabilities" in data:
-                for vuln_item in data.get("vulnerabilities", []):
-                    cve_data = vuln_item.get("cve", {})
-                    cve_id = cve_data.get("id", "N/A")
-                    
-                    # Extract description
-                    descriptions = cve_data.get("descriptions", [])
-                    description = descriptions[0].get("value", "No description") if descriptions else "No description"
-                    
-                    # Extract CVSS score and severity
-                    metrics = cve_data.get("metrics", {})
-                    cvss_score = "N/A"
-                    severity = "UNKNOWN"
-                    
-                    # Try CVSS v3.1 first, then v3.0, then v2.0
-                    for cvss_version in ["cvssMetricV31", "cvssMetricV30", "cvssMetricV2"]:
-                        if cvss_version in metrics and metrics[cvss_version]:
-                            cvss_data = metrics[cvss_version][0].get("cvssData", {})
-                            cvss_score = cvss_data.get("baseScore", "N/A")
-                            severity = cvss_data.get("baseSeverity", "UNKNOWN")
-                            break
-                    
-                    # Published date
-                    published = cve_data.get("published", "N/A")
-                    
-                    cve_info = {
-                        "cve_id": cve_id,
-                        "description": description[:200] + "..." if len(description) > 200 else description,
-                        "cvss_score": cvss_score,
-                        "severity": severity,
-                        "published": published,
-                        "url": f"https://nvd.nist.gov/vuln/detail/{cve_id}"
-                    }
-                    
-                    results["cves"].append(cve_info)
-                    
-                    # Count by severity
-                    if severity == "CRITICAL":
-                        results["critical_count"] += 1
-                    elif severity == "HIGH":
-                        results["high_count"] += 1
-                    elif severity == "MEDIUM":
-                        results["medium_count"] += 1
-                    elif severity == "LOW":
-                        results["low_count"] += 1
-                
-                results["total_found"] = len(results["cves"])
-                if results["total_found"] > 0:
-                    logger.info(f"Found {results['total_found']} CVEs for {keyword}")
-                else:
-                    logger.debug(f"No CVEs found for {keyword}")
-            else:
-                logger.debug("No vulnerabilities found in NVD response")
-                
-        elif response.status_code == 403:
-            results["error"] = "NVD API access forbidden - rate limit may be exceeded"
-            logger.error("NVD API rate limit exceeded")
+            results["_etag"] = response.headers.get("ETag")
+            results["_last_modified"] = response.headers.get("Last-Modified")
+            _apply_nvd_response(results, response.json(), keyword)
         else:
-            results["error"] = f"NVD API returned status code: {response.status_code}"
-            logger.error(f"NVD API error: {response.status_code}")
+            results["error"] = _status_error(response.status_code)
             
     except requests.exceptions.Timeout:
         results["error"] = "Request to NVD API timed out"
@@ -133,25 +240,162 @@ def scan_for_cves(software: str, version: str = None) -> Dict[str, Any]:
     return results
 
 
-def search_cve_by_id(cve_id: str) -> Dict[str, Any]:
+async def scan_for_cves_async(session: aiohttp.ClientSession, software: str, version: str = None,
+                              use_local: bool = True, live_fallback: bool = None,
+                              max_results: int = 100, use_cache: bool = True,
+                              max_retries: int = None) -> Dict[str, Any]:
+    """
+    Asynchronous scan_for_cves for running many lookups concurrently
+
+    Live requests are paced by the shared NVD quota limiter and retried with
+    backoff when NVD throttles (403/429) or is briefly unavailable (503).
+
+    Args:
+        session: aiohttp session used for NVD requests
+        software: Software name (e.g., 'apache', 'nginx', 'openssh')
+        version: Specific version if known
+        use_local: Query the local NVD mirror first
+        live_fallback: Use the NVD API when no local mirror is available
+        max_results: Maximum number of CVEs returned from the local mirror
+        use_cache: Serve live NVD results from the persistent response cache
+        max_retries: Retries for throttled requests (defaults to Config.MAX_RETRIES)
+
+    Returns:
+        Dictionary containing CVE information
+    """
+    if live_fallback is None:
+        live_fallback = Config.CVE_LIVE_FALLBACK
+
+    keyword = f"{software} {version}" if version else f"{software}"
+
+    if use_local:
+        store = get_default_store()
+        if store is not None and store.has_data():
+            try:
+                return _scan_local(store, software, version, keyword, max_results)
+            except Exception as e:
+                logger.error(f"Local CVE store query failed: {e}")
+
+    if not live_fallback:
+        results = _empty_results(software, version)
+        results["error"] = "No local CVE database available and live NVD lookups are disabled"
+        return results
+
+    entry = None
+    if use_cache:
+        cache_key = lookup_key(software, version)
+        cache = get_cache("nvd", Config.CVE_CACHE_TTL)
+        entry = cache.get(cache_key)
+        if entry is not None and entry.fresh:
+            logger.debug(f"NVD cache hit for {keyword}")
+            return dict(entry.value, cached=True)
+
+    results = await _scan_live_async(session, software, version, keyword, entry, max_retries)
+    if use_cache:
+        return _store_live_results(cache, cache_key, entry, results)
+
+    results.pop("_etag", None)
+    results.pop("_last_modified", None)
+    return results
+
+
+async def _scan_live_async(session: aiohttp.ClientSession, software: str, version: str, keyword: str,
+                           cached_entry: CacheEntry = None, max_retries: int = None) -> Dict[str, Any]:
+    """Search the public NVD API without blocking the event loop"""
+    if max_retries is None:
+        max_retries = Config.MAX_RETRIES
+
+    results = _empty_results(software, version)
+    results["source"] = "nvd"
+    params, headers = _nvd_request(keyword, cached_entry)
+    timeout = aiohttp.ClientTimeout(total=15)
+
+    for attempt in range(max_retries + 1):
+        await nvd_limiter().acquire_async()
+        logger.info(f"Searching NVD for: {keyword}")
+        try:
+            async with session.get(NVD_API_URL, params=params, headers=headers, timeout=timeout) as response:
+                if response.status == 304 and cached_entry is not None:
+                    logger.debug(f"NVD response for {keyword} not modified")
+                    return {"not_modified": True}
+
+                if response.status == 200:
+                    results["_etag"] = response.headers.get("ETag")
+                    results["_last_modified"] = response.headers.get("Last-Modified")
+                    _apply_nvd_response(results, await response.json(content_type=None), keyword)
+                    return results
+
+                if response.status in RETRY_STATUSES and attempt < max_retries:
+                    delay = backoff_delay(attempt, base=Config.REQUEST_DELAY,
+                                          retry_after=response.headers.get("Retry-After"))
+                    logger.warning(f"NVD returned {response.status} for {keyword}; retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                results["error"] = _status_error(response.status)
+                return results
+
+        except asyncio.TimeoutError:
+            error = "Request to NVD API timed out"
+        except aiohttp.ClientError as e:
+            error = f"Request error: {str(e)}"
+        except Exception as e:
+            results["error"] = f"Unexpected error: {str(e)}"
+            logger.error(f"Unexpected error in CVE scan: {e}")
+            return results
+
+        if attempt < max_retries:
+            await asyncio.sleep(backoff_delay(attempt, base=Config.REQUEST_DELAY))
+            continue
+        results["error"] = error
+        logger.error(f"NVD API request failed for {keyword}: {error}")
+
+    return results
+
+
+def search_cve_by_id(cve_id: str, use_local: bool = True, live_fallback: bool = None) -> Dict[str, Any]:
     """
     Get detailed information about a specific CVE
     
     Args:
         cve_id: CVE ID (e.g., 'CVE-2021-44228')
+        use_local: Look the CVE up in the local NVD mirror first
+        live_fallback: Query the NVD API when the CVE is not mirrored locally
+                       (defaults to Config.CVE_LIVE_FALLBACK)
         
     Returns:
-        Dictionary with CVE details
+        Dictionary with CVE details (NVD API 2.0 response format)
     """
+    if live_fallback is None:
+        live_fallback = Config.CVE_LIVE_FALLBACK
+
+    if use_local:
+        store = get_default_store()
+        if store is not None:
+            try:
+                cve_data = store.get(cve_id)
+                if cve_data is not None:
+                    return {
+                        "totalResults": 1,
+                        "format": "NVD_CVE",
+                        "version": "2.0",
+                        "vulnerabilities": [{"cve": cve_data}],
+                        "source": "local"
+                    }
+            except Exception as e:
+                logger.error(f"Local CVE store lookup failed: {e}")
+
+    if not live_fallback:
+        return {"error": f"{cve_id} not found in local CVE database"}
+
     try:
-        base_url = f"https://services.nvd.nist.gov/rest/json/cves/2.0"
         params = {"cveId": cve_id}
         
         headers = {
             "User-Agent": "RedCalibur-Security-Tool/1.0"
         }
         
-        response = requests.get(base_url, params=params, headers=headers, timeout=10)
+        response = requests.get(NVD_API_URL, params=params, headers=headers, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
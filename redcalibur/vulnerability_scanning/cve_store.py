@@ -0,0 +1,610 @@
+"""
+CVE Store - Local NVD mirror for offline CVE search
+Ingests NVD JSON 2.0 feeds into an indexed SQLite database
+"""
+
+import csv
+import gzip
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import zipfile
+from typing import Dict, List, Any, Iterable, Optional
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_LEVELS = ["CRITICAL", "HIGH", "MEDIUM", "LOW"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cves (
+    cve_id TEXT PRIMARY KEY,
+    description TEXT,
+    cvss_score REAL,
+    severity TEXT,
+    published TEXT,
+    last_modified TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cves_cvss ON cves(cvss_score);
+CREATE INDEX IF NOT EXISTS idx_cves_severity ON cves(severity);
+CREATE INDEX IF NOT EXISTS idx_cves_last_modified ON cves(last_modified);
+
+CREATE TABLE IF NOT EXISTS cve_cpes (
+    cve_id TEXT NOT NULL,
+    part TEXT,
+    vendor TEXT NOT NULL,
+    product TEXT NOT NULL,
+    version TEXT,
+    version_start_including TEXT,
+    version_start_excluding TEXT,
+    version_end_including TEXT,
+    version_end_excluding TEXT,
+    criteria TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cpes_vendor_product ON cve_cpes(vendor, product);
+CREATE INDEX IF NOT EXISTS idx_cpes_product ON cve_cpes(product);
+CREATE INDEX IF NOT EXISTS idx_cpes_cve ON cve_cpes(cve_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS cves_fts USING fts5(description, products);
+
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS epss (
+    cve_id TEXT PRIMARY KEY,
+    epss REAL NOT NULL,
+    percentile REAL
+);
+
+-- Precomputed CVSS / exploit / EPSS join used to rank findings
+CREATE TABLE IF NOT EXISTS cve_priority (
+    cve_id TEXT PRIMARY KEY,
+    cvss_score REAL,
+    severity TEXT,
+    epss REAL,
+    percentile REAL,
+    exploit_count INTEGER,
+    verified_exploit INTEGER,
+    priority REAL
+);
+CREATE INDEX IF NOT EXISTS idx_priority_priority ON cve_priority(priority);
+
+-- CVEs whose priority row must be recomputed. The triggers avoid OR IGNORE
+-- because an outer upsert's conflict handling overrides it inside triggers.
+CREATE TABLE IF NOT EXISTS priority_pending (
+    cve_id TEXT PRIMARY KEY
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_cves_insert_priority AFTER INSERT ON cves BEGIN
+    INSERT INTO priority_pending (cve_id)
+    SELECT NEW.cve_id WHERE NOT EXISTS (SELECT 1 FROM priority_pending WHERE cve_id = NEW.cve_id);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_cves_update_priority AFTER UPDATE OF cvss_score, severity ON cves BEGIN
+    INSERT INTO priority_pending (cve_id)
+    SELECT NEW.cve_id WHERE NOT EXISTS (SELECT 1 FROM priority_pending WHERE cve_id = NEW.cve_id);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_epss_insert_priority AFTER INSERT ON epss BEGIN
+    INSERT INTO priority_pending (cve_id)
+    SELECT NEW.cve_id WHERE NOT EXISTS (SELECT 1 FROM priority_pending WHERE cve_id = NEW.cve_id);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_epss_update_priority AFTER UPDATE ON epss BEGIN
+    INSERT INTO priority_pending (cve_id)
+    SELECT NEW.cve_id WHERE NOT EXISTS (SELECT 1 FROM priority_pending WHERE cve_id = NEW.cve_id);
+END;
+"""
+
+# CPE 2.3 formatted strings escape ':' inside components with a backslash
+_CPE_SPLIT = re.compile(r'(?<!\\):')
+
+
+def parse_cpe(criteria: str) -> Dict[str, str]:
+    """
+    Split a CPE 2.3 formatted string into its components
+
+    Args:
+        criteria: CPE string (e.g., 'cpe:2.3:a:apache:http_server:2.4.41:*:*:*:*:*:*:*')
+
+    Returns:
+        Dictionary with part, vendor, product and version (empty dict if malformed)
+    """
+    fields = _CPE_SPLIT.split(criteria or "")
+    if len(fields) < 6 or fields[0] != "cpe":
+        return {}
+    version = fields[5].replace("\\", "")
+    # OpenSSH-style portable releases keep the patch level in the update field (8.9:p1)
+    if len(fields) > 6 and re.match(r"^p\d+$", fields[6]):
+        version += fields[6]
+    return {
+        "part": fields[2],
+        "vendor": fields[3].replace("\\", "").lower(),
+        "product": fields[4].replace("\\", "").lower(),
+        "version": version,
+    }
+
+
+def parse_nvd_cve(cve_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Flatten an NVD API 2.0 CVE object into the fields we index
+
+    Args:
+        cve_data: The "cve" object of an NVD vulnerability item
+
+    Returns:
+        Dictionary with id, description, CVSS, dates and vulnerable CPE matches
+    """
+    descriptions = cve_data.get("descriptions", [])
+    description = "No description"
+    for desc in descriptions:
+        if desc.get("lang") == "en":
+            description = desc.get("value", description)
+            break
+    else:
+        if descriptions:
+            description = descriptions[0].get("value", description)
+
+    # Try CVSS v3.1 first, then v3.0, then v2.0
+    metrics = cve_data.get("metrics", {})
+    cvss_score = None
+    severity = "UNKNOWN"
+    for cvss_version in ["cvssMetricV31", "cvssMetricV30", "cvssMetricV2"]:
+        if metrics.get(cvss_version):
+            metric = metrics[cvss_version][0]
+            cvss_data = metric.get("cvssData", {})
+            cvss_score = cvss_data.get("baseScore")
+            # CVSS v2 keeps the severity on the metric rather than in cvssData
+            severity = cvss_data.get("baseSeverity") or metric.get("baseSeverity", "UNKNOWN")
+            break
+
+    cpes = []
+    for config in cve_data.get("configurations", []):
+        for node in config.get("nodes", []):
+            for match in node.get("cpeMatch", []):
+                if not match.get("vulnerable", True):
+                    continue
+                cpe = parse_cpe(match.get("criteria", ""))
+                if not cpe:
+                    continue
+                cpe.update({
+                    "criteria": match.get("criteria"),
+                    "version_start_including": match.get("versionStartIncluding"),
+                    "version_start_excluding": match.get("versionStartExcluding"),
+                    "version_end_including": match.get("versionEndIncluding"),
+                    "version_end_excluding": match.get("versionEndExcluding"),
+                })
+                cpes.append(cpe)
+
+    return {
+        "cve_id": cve_data.get("id", "N/A"),
+        "description": description,
+        "cvss_score": cvss_score,
+        "severity": severity,
+        "published": cve_data.get("published", "N/A"),
+        "last_modified": cve_data.get("lastModified"),
+        "cpes": cpes,
+    }
+
+
+def format_cve(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the CVE summary returned by scan_for_cves
+
+    Args:
+        parsed: Output of parse_nvd_cve (or an equivalent row from the store)
+
+    Returns:
+        Dictionary with id, truncated description, score, severity and link
+    """
+    cve_id = parsed["cve_id"]
+    description = parsed.get("description") or "No description"
+    cvss_score = parsed.get("cvss_score")
+    return {
+        "cve_id": cve_id,
+        "description": description[:200] + "..." if len(description) > 200 else description,
+        "cvss_score": cvss_score if cvss_score is not None else "N/A",
+        "severity": parsed.get("severity") or "UNKNOWN",
+        "published": parsed.get("published") or "N/A",
+        "url": f"https://nvd.nist.gov/vuln/detail/{cve_id}"
+    }
+
+
+def iter_feed_items(path: str) -> Iterable[Dict[str, Any]]:
+    """
+    Yield the "cve" objects contained in an NVD JSON 2.0 feed file
+
+    Plain .json, gzip (.json.gz) and zip (.json.zip) feeds are supported.
+    """
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if name.endswith(".json"):
+                    with archive.open(name) as fh:
+                        data = json.load(fh)
+                    for item in data.get("vulnerabilities", []):
+                        yield item.get("cve", {})
+        return
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as fh:
+        data = json.load(fh)
+    for item in data.get("vulnerabilities", []):
+        yield item.get("cve", {})
+
+
+def iter_epss_scores(path: str) -> Iterable[tuple]:
+    """
+    Yield (cve_id, epss, percentile) rows from a FIRST EPSS scores CSV
+
+    The daily epss_scores-YYYY-MM-DD.csv(.gz) files start with a
+    '#model_version:...' comment line followed by a cve,epss,percentile header.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as fh:
+        lines = (line for line in fh if not line.startswith("#"))
+        for row in csv.DictReader(lines):
+            try:
+                percentile = row.get("percentile")
+                yield (row["cve"].upper(), float(row["epss"]),
+                       float(percentile) if percentile else None)
+            except (KeyError, ValueError, AttributeError):
+                continue
+
+
+def _fts_query(keyword: str) -> str:
+    """Turn a free-text keyword into an FTS5 query requiring every term"""
+    terms = [t.replace('"', '') for t in keyword.split()]
+    return " AND ".join(f'"{t}"' for t in terms if t)
+
+
+class CVEStore:
+    """
+    SQLite-backed local mirror of the NVD CVE database
+
+    CVEs are indexed by keyword (FTS5 over descriptions and affected
+    products), CPE vendor/product and CVSS score.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.CVE_DB_PATH
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self._lock = threading.RLock()
+        self._writes = 0
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self.conn.close()
+
+    def count(self) -> int:
+        """Number of CVEs in the store"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM cves").fetchone()[0]
+
+    def has_data(self) -> bool:
+        """Whether any CVE has been imported (cheap, unlike count())"""
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM cves LIMIT 1").fetchone() is not None
+
+    def get_meta(self, key: str, default: str = None) -> Optional[str]:
+        """Read a value from the metadata table"""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: Optional[str]):
+        """Write a value to the metadata table (None deletes the key)"""
+        with self._lock, self.conn:
+            if value is None:
+                self.conn.execute("DELETE FROM metadata WHERE key = ?", (key,))
+                return
+            self.conn.execute(
+                "INSERT INTO metadata (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    @property
+    def generation(self) -> tuple:
+        """Changes whenever this or another connection commits new data"""
+        with self._lock:
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return (self._writes, data_version)
+
+    def latest_modified(self) -> Optional[str]:
+        """Most recent NVD lastModified timestamp in the store"""
+        with self._lock:
+            return self.conn.execute("SELECT MAX(last_modified) FROM cves").fetchone()[0]
+
+    def upsert_cves(self, cve_items: Iterable[Dict[str, Any]], meta: Dict[str, str] = None) -> int:
+        """
+        Insert or update NVD CVE objects in a single transaction
+
+        Args:
+            cve_items: Iterable of NVD "cve" objects
+            meta: Metadata entries committed atomically with the CVEs
+                  (used to checkpoint sync progress)
+
+        Returns:
+            Number of CVEs written
+        """
+        written = 0
+        with self._lock, self.conn:
+            cur = self.conn.cursor()
+            for cve_data in cve_items:
+                parsed = parse_nvd_cve(cve_data)
+                cve_id = parsed["cve_id"]
+                if cve_id == "N/A":
+                    continue
+
+                cur.execute(
+                    """
+                    INSERT INTO cves (cve_id, description, cvss_score, severity, published, last_modified, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(cve_id) DO UPDATE SET
+                        description = excluded.description,
+                        cvss_score = excluded.cvss_score,
+                        severity = excluded.severity,
+                        published = excluded.published,
+                        last_modified = excluded.last_modified,
+                        data = excluded.data
+                    """,
+                    (cve_id, parsed["description"], parsed["cvss_score"], parsed["severity"],
+                     parsed["published"], parsed["last_modified"], json.dumps(cve_data))
+                )
+                rowid = cur.execute("SELECT rowid FROM cves WHERE cve_id = ?", (cve_id,)).fetchone()[0]
+
+                cur.execute("DELETE FROM cve_cpes WHERE cve_id = ?", (cve_id,))
+                cur.executemany(
+                    """
+                    INSERT INTO cve_cpes (cve_id, part, vendor, product, version,
+                        version_start_including, version_start_excluding,
+                        version_end_including, version_end_excluding, criteria)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [(cve_id, c["part"], c["vendor"], c["product"], c["version"],
+                      c["version_start_including"], c["version_start_excluding"],
+                      c["version_end_including"], c["version_end_excluding"], c["criteria"])
+                     for c in parsed["cpes"]]
+                )
+
+                products = " ".join(sorted({
+                    f"{c['vendor']} {c['product']}".replace("_", " ") for c in parsed["cpes"]
+                }))
+                cur.execute("DELETE FROM cves_fts WHERE rowid = ?", (rowid,))
+                cur.execute(
+                    "INSERT INTO cves_fts (rowid, description, products) VALUES (?, ?, ?)",
+                    (rowid, parsed["description"], products)
+                )
+                written += 1
+
+            for key, value in (meta or {}).items():
+                cur.execute(
+                    "INSERT INTO metadata (key, value) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (key, value)
+                )
+            self._writes += 1
+        return written
+
+    def ingest_feed(self, path: str, batch_size: int = 5000) -> int:
+        """
+        Load an NVD JSON 2.0 feed file into the store
+
+        Args:
+            path: Feed file (.json, .json.gz or .json.zip)
+            batch_size: Number of CVEs written per transaction
+
+        Returns:
+            Number of CVEs ingested
+        """
+        total = 0
+        batch = []
+        for cve_data in iter_feed_items(path):
+            batch.append(cve_data)
+            if len(batch) >= batch_size:
+                total += self.upsert_cves(batch)
+                batch = []
+        if batch:
+            total += self.upsert_cves(batch)
+
+        logger.info(f"Ingested {total} CVEs from {path}")
+        return total
+
+    def ingest_epss(self, path: str, batch_size: int = 50000) -> int:
+        """
+        Load EPSS exploit-probability scores from a local CSV file
+
+        Args:
+            path: EPSS scores file (.csv or .csv.gz)
+            batch_size: Number of scores written per transaction
+
+        Returns:
+            Number of scores ingested
+        """
+        total = 0
+        batch = []
+
+        def flush():
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    "INSERT INTO epss (cve_id, epss, percentile) VALUES (?, ?, ?) "
+                    "ON CONFLICT(cve_id) DO UPDATE SET epss = excluded.epss, percentile = excluded.percentile "
+                    "WHERE epss.epss IS NOT excluded.epss OR epss.percentile IS NOT excluded.percentile",
+                    batch
+                )
+                self._writes += 1
+
+        for score in iter_epss_scores(path):
+            batch.append(score)
+            if len(batch) >= batch_size:
+                flush()
+                total += len(batch)
+                batch = []
+        if batch:
+            flush()
+            total += len(batch)
+
+        logger.info(f"Ingested {total} EPSS scores from {path}")
+        return total
+
+    def _where(self, keyword: str = None, vendor: str = None, product: str = None,
+               min_cvss: float = None, severity: str = None):
+        clauses = []
+        params: List[Any] = []
+        if keyword:
+            clauses.append("c.rowid IN (SELECT rowid FROM cves_fts WHERE cves_fts MATCH ?)")
+            params.append(_fts_query(keyword))
+        if vendor or product:
+            sub = "SELECT cve_id FROM cve_cpes WHERE 1 = 1"
+            if vendor:
+                sub += " AND vendor = ?"
+                params.append(vendor.lower())
+            if product:
+                sub += " AND product = ?"
+                params.append(product.lower())
+            clauses.append(f"c.cve_id IN ({sub})")
+        if min_cvss is not None:
+            clauses.append("c.cvss_score >= ?")
+            params.append(min_cvss)
+        if severity:
+            clauses.append("c.severity = ?")
+            params.append(severity.upper())
+        where = " AND ".join(clauses) if clauses else "1 = 1"
+        return where, params
+
+    def search(self, keyword: str = None, vendor: str = None, product: str = None,
+               min_cvss: float = None, severity: str = None, limit: int = 100) -> Dict[str, Any]:
+        """
+        Search the local CVE mirror
+
+        Args:
+            keyword: Free-text search; every term must match
+            vendor: CPE vendor (e.g., 'apache')
+            product: CPE product (e.g., 'http_server')
+            min_cvss: Minimum CVSS base score
+            severity: Exact severity (CRITICAL, HIGH, MEDIUM, LOW)
+            limit: Maximum number of CVEs returned (highest CVSS first)
+
+        Returns:
+            Dictionary with matching CVE rows, total match count and severity counts
+        """
+        where, params = self._where(keyword, vendor, product, min_cvss, severity)
+        with self._lock:
+            counts = {
+                row["severity"]: row["n"] for row in self.conn.execute(
+                    f"SELECT c.severity AS severity, COUNT(*) AS n FROM cves c WHERE {where} GROUP BY c.severity",
+                    params
+                )
+            }
+            rows = self.conn.execute(
+                f"""
+                SELECT c.cve_id, c.description, c.cvss_score, c.severity, c.published, c.last_modified
+                FROM cves c WHERE {where}
+                ORDER BY c.cvss_score IS NULL, c.cvss_score DESC, c.published DESC
+                LIMIT ?
+                """,
+                params + [limit]
+            ).fetchall()
+
+        return {
+            "cves": [dict(row) for row in rows],
+            "total_found": sum(counts.values()),
+            "severity_counts": {level.lower(): counts.get(level, 0) for level in SEVERITY_LEVELS},
+        }
+
+    def cpe_ranges(self, vendor: str, product: str) -> List[Dict[str, Any]]:
+        """
+        Affected version ranges recorded for a CPE vendor/product
+
+        Args:
+            vendor: CPE vendor (e.g., 'openbsd')
+            product: CPE product (e.g., 'openssh')
+
+        Returns:
+            List of rows with cve_id, exact version and range bounds
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT cve_id, version, version_start_including, version_start_excluding,
+                       version_end_including, version_end_excluding
+                FROM cve_cpes WHERE vendor = ? AND product = ?
+                """,
+                (vendor.lower(), product.lower())
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_summaries(self, cve_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch summary rows for many CVEs, highest CVSS first
+
+        Args:
+            cve_ids: CVE IDs to fetch
+
+        Returns:
+            List of rows with cve_id, description, cvss_score, severity and dates
+        """
+        ids = list(dict.fromkeys(cve_ids))
+        rows = []
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(ids), 900):
+                chunk = ids[i:i + 900]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(dict(row) for row in self.conn.execute(
+                    f"""
+                    SELECT cve_id, description, cvss_score, severity, published, last_modified
+                    FROM cves WHERE cve_id IN ({placeholders})
+                    """,
+                    chunk
+                ))
+        rows.sort(key=lambda r: (r["cvss_score"] is None, -(r["cvss_score"] or 0), r["cve_id"]))
+        return rows
+
+    def get(self, cve_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch the raw NVD CVE object for an ID
+
+        Args:
+            cve_id: CVE ID (e.g., 'CVE-2021-44228')
+
+        Returns:
+            The NVD "cve" object or None if not mirrored
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM cves WHERE cve_id = ?", (cve_id.upper(),)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+
+_default_store: Optional[CVEStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store() -> Optional[CVEStore]:
+    """
+    Return the shared store at Config.CVE_DB_PATH
+
+    Returns None when no local mirror has been created yet, so callers can
+    fall back to the live NVD API.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None or _default_store.db_path != Config.CVE_DB_PATH:
+            if not os.path.exists(Config.CVE_DB_PATH):
+                return None
+            _default_store = CVEStore(Config.CVE_DB_PATH)
+        return _default_store
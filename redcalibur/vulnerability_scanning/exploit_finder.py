@@ -1,22 +1,41 @@
 """
 Exploit Finder - Search for public exploits
-Uses Exploit-DB and other sources
+Uses the offline Exploit-DB index when available, otherwise returns
+Exploit-DB and GitHub search references
 """
 
-import requests
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable
+
+from .exploit_index import EXPLOIT_URL, get_default_index
 
 logger = logging.getLogger(__name__)
 
 
-def find_exploits(cve_id: str = None, software: str = None) -> Dict[str, Any]:
+def _format_exploit(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "source": "exploit-db",
+        "edb_id": row["edb_id"],
+        "url": EXPLOIT_URL.format(row["edb_id"]),
+        "description": row["description"],
+        "type": row["type"],
+        "platform": row["platform"],
+        "port": row["port"],
+        "date_published": row["date_published"],
+        "verified": bool(row["verified"])
+    }
+
+
+def find_exploits(cve_id: str = None, software: str = None, platform: str = None,
+                  use_local: bool = True) -> Dict[str, Any]:
     """
     Search for publicly available exploits
     
     Args:
         cve_id: CVE identifier
         software: Software name to search
+        platform: Restrict local results to an Exploit-DB platform (e.g., 'linux')
+        use_local: Answer from the offline Exploit-DB index when it exists
         
     Returns:
         Dictionary with exploit information
@@ -26,6 +45,32 @@ def find_exploits(cve_id: str = None, software: str = None) -> Dict[str, Any]:
         "exploits": [],
         "total_found": 0
     }
+
+    index = get_default_index() if use_local else None
+    if index is not None and index.has_data():
+        try:
+            rows = []
+            if cve_id:
+                rows.extend(index.by_cves([cve_id]).get(cve_id.upper(), []))
+            if software:
+                matches = index.search(product=software, platform=platform)
+                if not matches:
+                    matches = index.search(keyword=software, platform=platform)
+                rows.extend(matches)
+            if platform:
+                rows = [row for row in rows if row["platform"] == platform.lower()]
+
+            seen = set()
+            for row in rows:
+                if row["edb_id"] not in seen:
+                    seen.add(row["edb_id"])
+                    results["exploits"].append(_format_exploit(row))
+            results["total_found"] = len(results["exploits"])
+            results["source"] = "local"
+            logger.debug(f"Exploit index returned {results['total_found']} exploits for {results['query']}")
+            return results
+        except Exception as e:
+            logger.error(f"Local exploit index query failed: {e}")
     
     try:
         # Search using Exploit-DB API (if available) or fallback to search
@@ -65,6 +110,49 @@ def find_exploits(cve_id: str = None, software: str = None) -> Dict[str, Any]:
     return results
 
 
+def find_exploits_many(cve_ids: Iterable[str], platform: str = None) -> Dict[str, Any]:
+    """
+    Look up public exploits for many CVEs at once
+
+    Intended for joining scan output (e.g., every CVE returned by
+    batch_check_services) against the offline Exploit-DB index.
+
+    Args:
+        cve_ids: CVE identifiers
+        platform: Restrict results to an Exploit-DB platform (e.g., 'linux')
+
+    Returns:
+        Dictionary mapping each CVE with exploits to its exploit list,
+        plus totals
+    """
+    ids = list(dict.fromkeys(c.upper() for c in cve_ids if c))
+    results = {
+        "queried": len(ids),
+        "exploits": {},
+        "cves_with_exploits": 0,
+        "total_found": 0
+    }
+
+    index = get_default_index()
+    if index is None:
+        results["error"] = "No local exploit index available - run exploit-import first"
+        return results
+
+    try:
+        for cve_id, rows in index.by_cves(ids).items():
+            if platform:
+                rows = [row for row in rows if row["platform"] == platform.lower()]
+            if rows:
+                results["exploits"][cve_id] = [_format_exploit(row) for row in rows]
+        results["cves_with_exploits"] = len(results["exploits"])
+        results["total_found"] = sum(len(rows) for rows in results["exploits"].values())
+    except Exception as e:
+        results["error"] = f"Error finding exploits: {str(e)}"
+        logger.error(f"Exploit finder error: {e}")
+
+    return results
+
+
 def search_metasploit_modules(software: str) -> List[str]:
     """
     Search for Metasploit modules (returns search suggestions)
@@ -0,0 +1,347 @@
+"""
+Exploit Index - Offline Exploit-DB lookup
+Imports an Exploit-DB checkout (files_exploits.csv) into an indexed
+SQLite database keyed by CVE, product and platform
+"""
+
+import csv
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Any, Iterable, Optional
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+EXPLOIT_URL = "https://www.exploit-db.com/exploits/{}"
+
+# Changes on every import so dependent tables know to recompute
+IMPORT_VERSION_KEY = "import_version"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exploits (
+    edb_id INTEGER PRIMARY KEY,
+    description TEXT,
+    product TEXT COLLATE NOCASE,
+    type TEXT,
+    platform TEXT COLLATE NOCASE,
+    port INTEGER,
+    date_published TEXT,
+    author TEXT,
+    verified INTEGER,
+    file TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_exploits_product ON exploits(product);
+CREATE INDEX IF NOT EXISTS idx_exploits_platform ON exploits(platform);
+
+CREATE TABLE IF NOT EXISTS exploit_cves (
+    cve_id TEXT NOT NULL,
+    edb_id INTEGER NOT NULL,
+    PRIMARY KEY (cve_id, edb_id)
+) WITHOUT ROWID;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS exploits_fts USING fts5(description);
+
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_CVE_RE = re.compile(r"CVE-\d{4}-\d{4,}", re.IGNORECASE)
+
+# Title prefix before the first version-like token ("OpenSSH 2.3 < 7.7 - ...")
+_VERSION_TOKEN = re.compile(r"^(?:[<>=(]|v?\d)", re.IGNORECASE)
+
+
+def exploit_product(description: str) -> str:
+    """
+    Derive the product name from an Exploit-DB title
+
+    Args:
+        description: Exploit title (e.g., 'Apache HTTP Server 2.4.49 - Path Traversal')
+
+    Returns:
+        Lowercased product name (e.g., 'apache http server')
+    """
+    title = (description or "").split(" - ", 1)[0]
+    words = []
+    for word in title.split():
+        if _VERSION_TOKEN.match(word):
+            break
+        words.append(word)
+    return " ".join(words).strip(" /,").lower()
+
+
+def parse_exploit_row(row: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Normalize one files_exploits.csv row
+
+    Both the current layout (codes, date_published, verified) and the older
+    eight-column layout (id, file, description, date, author, type,
+    platform, port) are understood.
+
+    Returns:
+        Dictionary ready for insertion, or None if the row has no usable ID
+    """
+    try:
+        edb_id = int(row.get("id") or "")
+    except ValueError:
+        return None
+
+    description = row.get("description") or ""
+    codes = row.get("codes") or ""
+    cves = sorted({c.upper() for c in _CVE_RE.findall(codes + " " + description)})
+    try:
+        port = int(row.get("port") or 0) or None
+    except ValueError:
+        port = None
+
+    return {
+        "edb_id": edb_id,
+        "description": description,
+        "product": exploit_product(description),
+        "type": row.get("type"),
+        "platform": (row.get("platform") or "").lower(),
+        "port": port,
+        "date_published": row.get("date_published") or row.get("date"),
+        "author": row.get("author"),
+        "verified": 1 if (row.get("verified") or "0") == "1" else 0,
+        "file": row.get("file"),
+        "cves": cves,
+    }
+
+
+def _resolve_csv(path: str) -> str:
+    """Accept either the CSV itself or an Exploit-DB repository checkout"""
+    if os.path.isdir(path):
+        candidate = os.path.join(path, "files_exploits.csv")
+        if not os.path.exists(candidate):
+            raise FileNotFoundError(f"files_exploits.csv not found in {path}")
+        return candidate
+    return path
+
+
+class ExploitIndex:
+    """
+    SQLite-backed offline index of Exploit-DB entries
+
+    Exploits are indexed by referenced CVE, product (derived from the
+    title), platform and full-text description.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.EXPLOIT_DB_PATH
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self.conn.close()
+
+    def count(self) -> int:
+        """Number of exploits in the index"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM exploits").fetchone()[0]
+
+    def has_data(self) -> bool:
+        """Whether any exploit has been imported (cheap, unlike count())"""
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM exploits LIMIT 1").fetchone() is not None
+
+    def get_meta(self, key: str, default: str = None) -> Optional[str]:
+        """Read a value from the metadata table"""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        """Write a value to the metadata table"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO metadata (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def upsert_exploits(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert or update parsed exploit rows in a single transaction
+
+        Args:
+            rows: Output of parse_exploit_row
+
+        Returns:
+            Number of exploits written
+        """
+        written = 0
+        with self._lock, self.conn:
+            cur = self.conn.cursor()
+            for row in rows:
+                cur.execute(
+                    """
+                    INSERT INTO exploits (edb_id, description, product, type, platform, port,
+                                          date_published, author, verified, file)
+                    VALUES (:edb_id, :description, :product, :type, :platform, :port,
+                            :date_published, :author, :verified, :file)
+                    ON CONFLICT(edb_id) DO UPDATE SET
+                        description = excluded.description,
+                        product = excluded.product,
+                        type = excluded.type,
+                        platform = excluded.platform,
+                        port = excluded.port,
+                        date_published = excluded.date_published,
+                        author = excluded.author,
+                        verified = excluded.verified,
+                        file = excluded.file
+                    """,
+                    row
+                )
+                cur.execute("DELETE FROM exploit_cves WHERE edb_id = ?", (row["edb_id"],))
+                cur.executemany(
+                    "INSERT OR IGNORE INTO exploit_cves (cve_id, edb_id) VALUES (?, ?)",
+                    [(cve_id, row["edb_id"]) for cve_id in row["cves"]]
+                )
+                cur.execute("DELETE FROM exploits_fts WHERE rowid = ?", (row["edb_id"],))
+                cur.execute(
+                    "INSERT INTO exploits_fts (rowid, description) VALUES (?, ?)",
+                    (row["edb_id"], row["description"])
+                )
+                written += 1
+        return written
+
+    def import_csv(self, path: str, batch_size: int = 5000) -> int:
+        """
+        Load Exploit-DB's files_exploits.csv into the index
+
+        Args:
+            path: The CSV file or an Exploit-DB repository checkout
+            batch_size: Number of exploits written per transaction
+
+        Returns:
+            Number of exploits imported
+        """
+        csv_path = _resolve_csv(path)
+        total = 0
+        batch = []
+        with open(csv_path, newline="", encoding="utf-8", errors="replace") as fh:
+            for raw in csv.DictReader(fh):
+                row = parse_exploit_row(raw)
+                if row is None:
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    total += self.upsert_exploits(batch)
+                    batch = []
+        if batch:
+            total += self.upsert_exploits(batch)
+        self.set_meta(IMPORT_VERSION_KEY, str(time.time()))
+
+        logger.info(f"Imported {total} exploits from {csv_path}")
+        return total
+
+    def by_cves(self, cve_ids: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Exploits referencing each of many CVEs, fetched with one join per chunk
+
+        Args:
+            cve_ids: CVE IDs to look up
+
+        Returns:
+            Mapping of CVE ID to its exploits (CVEs without exploits are omitted)
+        """
+        ids = list(dict.fromkeys(c.upper() for c in cve_ids if c))
+        found: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(ids), 900):
+                chunk = ids[i:i + 900]
+                placeholders = ",".join("?" * len(chunk))
+                for row in self.conn.execute(
+                    f"""
+                    SELECT ec.cve_id AS cve_id, e.*
+                    FROM exploit_cves ec JOIN exploits e ON e.edb_id = ec.edb_id
+                    WHERE ec.cve_id IN ({placeholders})
+                    ORDER BY e.verified DESC, e.edb_id DESC
+                    """,
+                    chunk
+                ):
+                    row = dict(row)
+                    found.setdefault(row.pop("cve_id"), []).append(row)
+        return found
+
+    def search(self, product: str = None, platform: str = None, keyword: str = None,
+               limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Search exploits by product, platform and/or description keywords
+
+        Args:
+            product: Product name prefix (e.g., 'openssh', 'apache http server')
+            platform: Exploit-DB platform (e.g., 'linux', 'windows', 'php')
+            keyword: Free-text search; every term must match
+            limit: Maximum number of exploits returned (newest first)
+
+        Returns:
+            List of exploit rows
+        """
+        clauses = []
+        params: List[Any] = []
+        if product:
+            clauses.append("product LIKE ?")
+            params.append(product.strip().lower().replace("%", "").replace("_", " ") + "%")
+        if platform:
+            clauses.append("platform = ?")
+            params.append(platform.lower())
+        if keyword:
+            terms = [t.replace('"', '') for t in keyword.split()]
+            clauses.append("edb_id IN (SELECT rowid FROM exploits_fts WHERE exploits_fts MATCH ?)")
+            params.append(" AND ".join(f'"{t}"' for t in terms if t))
+        where = " AND ".join(clauses) if clauses else "1 = 1"
+
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM exploits WHERE {where} ORDER BY edb_id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def cves_for(self, edb_id: int) -> List[str]:
+        """CVE IDs referenced by an exploit"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT cve_id FROM exploit_cves WHERE edb_id = ? ORDER BY cve_id", (edb_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+_default_index: Optional[ExploitIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_default_index() -> Optional[ExploitIndex]:
+    """
+    Return the shared index at Config.EXPLOIT_DB_PATH
+
+    Returns None when no Exploit-DB data has been imported yet, so callers
+    can fall back to search references.
+    """
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None or _default_index.db_path != Config.EXPLOIT_DB_PATH:
+            if not os.path.exists(Config.EXPLOIT_DB_PATH):
+                return None
+            _default_index = ExploitIndex(Config.EXPLOIT_DB_PATH)
+        return _default_index
@@ -0,0 +1,229 @@
+"""
+NVD Sync - Incremental refresh of the local CVE database
+Pulls only CVEs modified since the last sync using the NVD API 2.0
+lastModStartDate/lastModEndDate filters
+"""
+
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import requests
+
+from ..config import Config
+from ..ratelimit import SlidingWindowLimiter, backoff_delay
+from .cve_scanner import NVD_API_URL, RETRY_STATUSES, nvd_limiter
+from .cve_store import CVEStore
+
+logger = logging.getLogger(__name__)
+
+# NVD rejects lastMod ranges longer than 120 days
+MAX_WINDOW_DAYS = 120
+MAX_PAGE_SIZE = 2000
+
+LAST_SYNC_KEY = "nvd_last_sync"
+CURSOR_KEY = "nvd_sync_cursor"
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse an NVD/ISO timestamp; naive values are treated as UTC"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _format_timestamp(value: datetime) -> str:
+    """Format a timestamp the way the NVD API expects it"""
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000+00:00")
+
+
+def split_windows(since: datetime, until: datetime,
+                  max_days: int = MAX_WINDOW_DAYS) -> List[Tuple[datetime, datetime]]:
+    """
+    Split a lastModified range into windows the NVD API accepts
+
+    Args:
+        since: Start of the range
+        until: End of the range
+        max_days: Maximum window length in days
+
+    Returns:
+        List of (start, end) tuples covering the range
+    """
+    windows = []
+    start = since
+    while start < until:
+        end = min(start + timedelta(days=max_days), until)
+        windows.append((start, end))
+        start = end
+    return windows
+
+
+def iter_nvd_pages(session: requests.Session, params: Dict[str, Any], start_index: int = 0,
+                   page_size: int = MAX_PAGE_SIZE, base_url: str = NVD_API_URL,
+                   api_key: str = None, limiter: SlidingWindowLimiter = None,
+                   max_retries: int = None) -> Iterator[Tuple[int, int, List[Dict[str, Any]]]]:
+    """
+    Page through an NVD API query lazily
+
+    Args:
+        session: HTTP session reused for every page
+        params: Query parameters (e.g., lastModStartDate/lastModEndDate)
+        start_index: Index of the first result to fetch (for resuming)
+        page_size: resultsPerPage sent to the API
+        base_url: NVD CVE API endpoint
+        api_key: Optional NVD API key
+        limiter: Limiter each request takes a slot from (defaults to the
+                 shared NVD limiter CVE lookups use)
+        max_retries: Retries on 403/503 and network errors
+
+    Yields:
+        (start_index, total_results, list of NVD "cve" objects) per page
+    """
+    if max_retries is None:
+        max_retries = Config.MAX_RETRIES
+    limiter = limiter or nvd_limiter()
+    headers = {"User-Agent": "RedCalibur-Security-Tool/1.0"}
+    if api_key:
+        headers["apiKey"] = api_key
+
+    total = None
+    while total is None or start_index < total:
+        query = dict(params, startIndex=start_index, resultsPerPage=page_size)
+        for attempt in range(max_retries + 1):
+            limiter.acquire()
+            retry_after = None
+            try:
+                response = session.get(base_url, params=query, headers=headers, timeout=60)
+                if response.status_code == 200:
+                    break
+                if response.status_code not in RETRY_STATUSES:
+                    raise RuntimeError(f"NVD API returned status code: {response.status_code}")
+                error = f"NVD API returned status code: {response.status_code}"
+                retry_after = response.headers.get("Retry-After")
+            except requests.exceptions.RequestException as e:
+                error = f"Request error: {str(e)}"
+            if attempt == max_retries:
+                raise RuntimeError(error)
+            backoff = backoff_delay(attempt, base=Config.REQUEST_DELAY, retry_after=retry_after)
+            logger.warning(f"{error} - retrying in {backoff:.1f}s")
+            time.sleep(backoff)
+
+        data = response.json()
+        total = data.get("totalResults", 0)
+        items = [v.get("cve", {}) for v in data.get("vulnerabilities", [])]
+        yield start_index, total, items
+
+        if not items:
+            break
+        start_index += len(items)
+
+
+def sync_nvd(store: CVEStore = None, since: str = None, until: str = None, full: bool = False,
+             api_key: str = None, base_url: str = NVD_API_URL, page_size: int = MAX_PAGE_SIZE,
+             limiter: SlidingWindowLimiter = None, session: requests.Session = None) -> Dict[str, Any]:
+    """
+    Bring the local CVE database up to date with the NVD
+
+    Only CVEs modified since the last successful sync are downloaded. Each
+    page is upserted in one transaction together with a cursor, so an
+    interrupted sync resumes from the last committed page.
+
+    Args:
+        store: Target CVE store (defaults to Config.CVE_DB_PATH)
+        since: ISO timestamp to sync from (defaults to the last sync, or the
+               newest lastModified timestamp already in the store)
+        until: ISO timestamp to sync up to (defaults to now)
+        full: Download the whole NVD dataset when the store has nothing to sync from
+        api_key: NVD API key (defaults to Config.NVD_API_KEY)
+        base_url: NVD CVE API endpoint
+        page_size: Results requested per page (max 2000)
+        limiter: Request limiter (defaults to the shared NVD limiter, so a sync
+                 and concurrent CVE lookups stay within one quota)
+        session: Optional requests session
+
+    Returns:
+        Dictionary summarizing the sync
+    """
+    store = store or CVEStore()
+    api_key = api_key if api_key is not None else Config.NVD_API_KEY
+    page_size = min(page_size, MAX_PAGE_SIZE)
+    session = session or requests.Session()
+
+    summary = {
+        "database": store.db_path,
+        "pages": 0,
+        "cves_updated": 0,
+        "resumed": False,
+        "completed": False
+    }
+
+    cursor: Optional[Dict[str, Any]] = None
+    raw_cursor = store.get_meta(CURSOR_KEY)
+    if raw_cursor and not since:
+        cursor = json.loads(raw_cursor)
+        summary["resumed"] = True
+
+    if cursor:
+        until_dt = _parse_timestamp(cursor["until"])
+        since_dt = _parse_timestamp(cursor["window_start"]) if cursor.get("window_start") else None
+        start_index = cursor["start_index"]
+    else:
+        until_dt = _parse_timestamp(until) if until else datetime.now(timezone.utc)
+        since_value = since or store.get_meta(LAST_SYNC_KEY) or store.latest_modified()
+        if not since_value and not full:
+            summary["error"] = "Local CVE database is empty - import NVD feeds first or run a full sync"
+            return summary
+        since_dt = _parse_timestamp(since_value) if since_value else None
+        start_index = 0
+
+    # A full sync pages through the whole dataset without lastMod filters
+    windows: List[Tuple[Optional[datetime], Optional[datetime]]]
+    windows = split_windows(since_dt, until_dt) if since_dt else [(None, None)]
+    summary["since"] = _format_timestamp(since_dt) if since_dt else None
+    summary["until"] = _format_timestamp(until_dt)
+    summary["windows"] = len(windows)
+
+    try:
+        for window_start, window_end in windows:
+            params = {}
+            if window_start:
+                params = {
+                    "lastModStartDate": _format_timestamp(window_start),
+                    "lastModEndDate": _format_timestamp(window_end),
+                }
+            logger.info(f"Syncing NVD changes {params or '(full dataset)'} from index {start_index}")
+
+            for page_start, total, items in iter_nvd_pages(
+                session, params, start_index=start_index, page_size=page_size,
+                base_url=base_url, api_key=api_key, limiter=limiter
+            ):
+                next_cursor = {
+                    "until": _format_timestamp(until_dt),
+                    "window_start": _format_timestamp(window_start) if window_start else None,
+                    "start_index": page_start + len(items),
+                }
+                summary["cves_updated"] += store.upsert_cves(items, meta={CURSOR_KEY: json.dumps(next_cursor)})
+                summary["pages"] += 1
+                logger.info(f"Synced {page_start + len(items)}/{total} CVEs in window")
+
+            start_index = 0
+            if window_end:
+                store.set_meta(CURSOR_KEY, json.dumps({
+                    "until": _format_timestamp(until_dt),
+                    "window_start": _format_timestamp(window_end),
+                    "start_index": 0,
+                }))
+    except Exception as e:
+        summary["error"] = str(e)
+        logger.error(f"NVD sync interrupted: {e} - rerun cve-sync to resume")
+        return summary
+
+    store.set_meta(LAST_SYNC_KEY, _format_timestamp(until_dt))
+    store.set_meta(CURSOR_KEY, None)
+    summary["completed"] = True
+    logger.info(f"NVD sync complete: {summary['cves_updated']} CVEs updated in {summary['pages']} pages")
+    return summary
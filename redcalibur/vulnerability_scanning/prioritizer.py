@@ -0,0 +1,289 @@
+"""
+Finding Prioritizer - Rank CVE findings by exploitability
+Maintains a precomputed CVE / CVSS / public exploit / EPSS join in the
+local CVE database and sorts scan findings with NumPy
+"""
+
+import logging
+import os
+import sqlite3
+from typing import Dict, List, Any, Iterable, Optional
+
+import numpy as np
+
+from .cve_store import CVEStore, get_default_store
+from .exploit_index import ExploitIndex, IMPORT_VERSION_KEY, get_default_index
+
+logger = logging.getLogger(__name__)
+
+# Weights of the normalized CVSS score, EPSS probability and public exploit
+# availability in the combined priority (0-1)
+CVSS_WEIGHT = 0.5
+EPSS_WEIGHT = 0.3
+EXPLOIT_WEIGHT = 0.2
+# Extra credit for exploits Exploit-DB has verified
+VERIFIED_BONUS = 0.05
+
+# Without EPSS or exploit data priority tops out at CVSS_WEIGHT, so risk
+# falls back to severity: any critical CVSS, or many high-severity findings
+CRITICAL_CVSS = 9.0
+HIGH_SEVERITY_CVSS = 7.0
+MAX_HIGH_SEVERITY_FINDINGS = 10
+
+SEEDED_KEY = "priority_seeded"
+EXPLOIT_VERSION_KEY = "priority_exploit_version"
+
+
+def priority_scores(cvss: np.ndarray, epss: np.ndarray, exploit_count: np.ndarray,
+                    verified: np.ndarray) -> np.ndarray:
+    """
+    Combined priority for arrays of findings
+
+    Args:
+        cvss: CVSS base scores (NaN when unknown)
+        epss: EPSS probabilities (NaN when unknown)
+        exploit_count: Number of public exploits
+        verified: Whether any exploit is verified
+
+    Returns:
+        Priority scores between 0 and 1
+    """
+    cvss = np.nan_to_num(np.asarray(cvss, dtype=float), nan=0.0) / 10.0
+    epss = np.nan_to_num(np.asarray(epss, dtype=float), nan=0.0)
+    has_exploit = (np.asarray(exploit_count, dtype=float) > 0).astype(float)
+    verified = (np.asarray(verified, dtype=float) > 0).astype(float)
+    scores = CVSS_WEIGHT * cvss + EPSS_WEIGHT * epss + EXPLOIT_WEIGHT * has_exploit + VERIFIED_BONUS * verified
+    return np.minimum(scores, 1.0)
+
+
+def refresh_priorities(store: CVEStore, exploit_index: Optional[ExploitIndex] = None) -> int:
+    """
+    Recompute cve_priority rows for CVEs changed since the last refresh
+
+    CVE and EPSS changes are queued by triggers in the CVE database; a new
+    Exploit-DB import queues every CVE once.
+
+    Args:
+        store: Local CVE database
+        exploit_index: Offline Exploit-DB index (optional)
+
+    Returns:
+        Number of priority rows recomputed
+    """
+    exploit_version = exploit_index.get_meta(IMPORT_VERSION_KEY, "") if exploit_index else ""
+
+    with store._lock:
+        conn = store.conn
+        attached = exploit_index is not None and os.path.exists(exploit_index.db_path)
+        if attached:
+            conn.execute("ATTACH DATABASE ? AS edb", (exploit_index.db_path,))
+        try:
+            with conn:
+                queue_all = (store.get_meta(SEEDED_KEY) is None
+                             or store.get_meta(EXPLOIT_VERSION_KEY, "") != exploit_version)
+                if queue_all:
+                    conn.execute("INSERT OR IGNORE INTO priority_pending (cve_id) SELECT cve_id FROM cves")
+
+                if attached:
+                    exploit_columns = """
+                        (SELECT COUNT(*) FROM edb.exploit_cves ec WHERE ec.cve_id = c.cve_id),
+                        (SELECT MAX(x.verified) FROM edb.exploit_cves ec
+                         JOIN edb.exploits x ON x.edb_id = ec.edb_id WHERE ec.cve_id = c.cve_id)
+                    """
+                else:
+                    exploit_columns = "0, 0"
+                rows = conn.execute(
+                    f"""
+                    SELECT c.cve_id, c.cvss_score, c.severity, e.epss, e.percentile, {exploit_columns}
+                    FROM priority_pending p
+                    JOIN cves c ON c.cve_id = p.cve_id
+                    LEFT JOIN epss e ON e.cve_id = p.cve_id
+                    """
+                ).fetchall()
+
+                if rows:
+                    columns = list(zip(*rows))
+                    exploit_count = np.array([n or 0 for n in columns[5]], dtype=float)
+                    verified = np.array([v or 0 for v in columns[6]], dtype=float)
+                    scores = priority_scores(
+                        np.array(columns[1], dtype=float),
+                        np.array(columns[3], dtype=float),
+                        exploit_count,
+                        verified
+                    )
+                    conn.executemany(
+                        """
+                        INSERT OR REPLACE INTO cve_priority (cve_id, cvss_score, severity, epss, percentile,
+                                                             exploit_count, verified_exploit, priority)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        [(row[0], row[1], row[2], row[3], row[4], int(n), int(v), float(score))
+                         for row, n, v, score in zip(rows, exploit_count, verified, scores)]
+                    )
+
+                conn.execute("DELETE FROM priority_pending")
+                for key, value in ((SEEDED_KEY, "1"), (EXPLOIT_VERSION_KEY, exploit_version)):
+                    conn.execute(
+                        "INSERT INTO metadata (key, value) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                        (key, value)
+                    )
+        finally:
+            if attached:
+                conn.execute("DETACH DATABASE edb")
+
+    if rows:
+        logger.info(f"Recomputed priority for {len(rows)} CVEs")
+    return len(rows)
+
+
+def _priority_rows(store: CVEStore, cve_ids: List[str]) -> Dict[str, tuple]:
+    """Fetch precomputed priority rows (and EPSS for CVEs not mirrored locally)"""
+    found: Dict[str, tuple] = {}
+    with store._lock:
+        # Stay below SQLite's bound-parameter limit
+        for i in range(0, len(cve_ids), 900):
+            chunk = cve_ids[i:i + 900]
+            placeholders = ",".join("?" * len(chunk))
+            for row in store.conn.execute(
+                f"""
+                SELECT cve_id, cvss_score, epss, exploit_count, verified_exploit, priority
+                FROM cve_priority WHERE cve_id IN ({placeholders})
+                """,
+                chunk
+            ):
+                found[row[0]] = tuple(row[1:])
+            for row in store.conn.execute(
+                f"SELECT cve_id, epss FROM epss WHERE cve_id IN ({placeholders})", chunk
+            ):
+                found.setdefault(row[0], (None, row[1], None, None, None))
+    return found
+
+
+def _score_or_nan(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def prioritize_findings(services: Iterable[Dict[str, Any]], store: Optional[CVEStore] = None,
+                        exploit_index: Optional[ExploitIndex] = None) -> List[Dict[str, Any]]:
+    """
+    Rank every CVE finding from batch_check_services by priority
+
+    Precomputed rows are used where the CVE is in the local database;
+    remaining findings are scored from their own CVSS plus local exploit
+    and EPSS data. All findings are then ranked with a single sort.
+
+    Args:
+        services: Per-service vulnerability results
+        store: Local CVE database (defaults to the shared store, if any)
+        exploit_index: Offline Exploit-DB index (defaults to the shared index, if any)
+
+    Returns:
+        One dictionary per (service, CVE) finding, highest priority first
+    """
+    store = store or get_default_store()
+    exploit_index = exploit_index or get_default_index()
+
+    findings = []
+    for service in services:
+        for vuln in service.get("vulnerabilities", []):
+            if vuln.get("cve_id"):
+                findings.append((service, vuln))
+    if not findings:
+        return []
+
+    cve_ids = list(dict.fromkeys(vuln["cve_id"].upper() for _, vuln in findings))
+    known: Dict[str, tuple] = {}
+    if store is not None:
+        try:
+            refresh_priorities(store, exploit_index)
+            known = _priority_rows(store, cve_ids)
+        except sqlite3.Error as e:
+            logger.error(f"Priority table lookup failed: {e}")
+
+    exploits: Dict[str, List[Dict[str, Any]]] = {}
+    missing = [c for c in cve_ids if known.get(c, (None,) * 5)[4] is None]
+    if exploit_index is not None and missing:
+        exploits = exploit_index.by_cves(missing)
+
+    size = len(findings)
+    cvss = np.empty(size)
+    epss = np.empty(size)
+    exploit_count = np.zeros(size)
+    verified = np.zeros(size)
+    priority = np.full(size, np.nan)
+    for i, (_, vuln) in enumerate(findings):
+        cve_id = vuln["cve_id"].upper()
+        row = known.get(cve_id)
+        if row is not None and row[4] is not None:
+            cvss[i], epss[i], exploit_count[i], verified[i], priority[i] = (
+                _score_or_nan(row[0]), _score_or_nan(row[1]), row[2], row[3], row[4]
+            )
+            continue
+        cvss[i] = _score_or_nan(vuln.get("cvss_score"))
+        epss[i] = _score_or_nan(row[1]) if row is not None else np.nan
+        cve_exploits = exploits.get(cve_id, [])
+        exploit_count[i] = len(cve_exploits)
+        verified[i] = any(e["verified"] for e in cve_exploits)
+
+    unscored = np.isnan(priority)
+    priority[unscored] = priority_scores(cvss[unscored], epss[unscored],
+                                         exploit_count[unscored], verified[unscored])
+
+    # Highest priority first, ties broken by CVSS
+    order = np.lexsort((-np.nan_to_num(cvss, nan=-1.0), -priority))
+
+    ranked = []
+    for i in order:
+        service, vuln = findings[i]
+        ranked.append({
+            "cve_id": vuln["cve_id"],
+            "port": service.get("port"),
+            "service": service.get("service"),
+            "severity": vuln.get("severity", "UNKNOWN"),
+            "cvss_score": None if np.isnan(cvss[i]) else float(cvss[i]),
+            "epss": None if np.isnan(epss[i]) else float(epss[i]),
+            "exploit_available": bool(exploit_count[i] > 0),
+            "exploit_count": int(exploit_count[i]),
+            "priority": round(float(priority[i]), 4)
+        })
+    return ranked
+
+
+def summarize_risk(ranked: List[Dict[str, Any]], top: int = 10) -> Dict[str, Any]:
+    """
+    Risk summary for prioritized findings
+
+    Args:
+        ranked: Output of prioritize_findings
+        top: Number of top findings included
+
+    Returns:
+        Dictionary with overall risk level, counts and the top findings
+    """
+    exploitable = [f for f in ranked if f["exploit_available"]]
+    top_priority = ranked[0]["priority"] if ranked else 0.0
+
+    cvss_scores = [f["cvss_score"] or 0 for f in ranked]
+
+    if top_priority >= 0.7 or any((f["cvss_score"] or 0) >= HIGH_SEVERITY_CVSS for f in exploitable):
+        risk_level = "HIGH"
+    # Severity floors hold whether or not EPSS/exploit data lowered the priorities
+    elif (max(cvss_scores, default=0) >= CRITICAL_CVSS
+          or sum(s >= HIGH_SEVERITY_CVSS for s in cvss_scores) > MAX_HIGH_SEVERITY_FINDINGS):
+        risk_level = "HIGH"
+    elif ranked:
+        risk_level = "MEDIUM"
+    else:
+        risk_level = "LOW"
+
+    return {
+        "risk_level": risk_level,
+        "total_findings": len(ranked),
+        "exploitable_findings": len(exploitable),
+        "top_priority": top_priority,
+        "top_findings": ranked[:top]
+    }
@@ -3,17 +3,26 @@ Service Vulnerability Checker
 Checks known vulnerabilities for detected services
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Any
-from .cve_scanner import scan_for_cves
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from ..versioning import extract_version, normalize_version
+from .cve_scanner import scan_for_cves, scan_for_cves_async, lookup_key
+from .cve_store import get_default_store
+from .cpe_matcher import identify_product, get_matcher
 
 logger = logging.getLogger(__name__)
 
+# Protocols served by many different products; without an identified server
+# product a keyword search on these only produces false positives
+GENERIC_SERVICES = {"http", "https", "http-proxy", "https-alt"}
+
 # Common service version patterns and their software names
 SERVICE_MAPPINGS = {
     "ssh": "openssh",
-    "http": "apache",
-    "https": "apache",
     "ftp": "vsftpd",
     "smtp": "postfix",
     "mysql": "mysql",
@@ -26,95 +35,281 @@ SERVICE_MAPPINGS = {
 }
 
 
-def check_service_vulnerabilities(service_info: Dict[str, Any]) -> Dict[str, Any]:
+def resolve_service_query(service_info: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Check for vulnerabilities in detected services
-    
+    Decide how a detected service should be looked up
+
+    Services that resolve to the same query share a 'key', so a batch only
+    performs one lookup per unique software version.
+
     Args:
         service_info: Dictionary with service details
-                     Example: {"port": 80, "service": "http", "version": "Apache 2.4.41"}
-        
+
     Returns:
-        Dictionary with vulnerability results
+        Query dictionary ('key', 'mode', 'product'/'software', 'version'),
+        or a dictionary with 'skip' set to the reason the service is skipped
     """
+    service_name = (service_info.get("service") or "").lower()
+    version_string = service_info.get("version") or ""
+
+    # Skip scanning for unknown services
+    if service_name == "unknown" or not service_name:
+        return {"skip": "Unknown service - skipping CVE scan"}
+
+    # Prefer exact CPE/version-range matching against the local NVD mirror
+    product = identify_product(service_name, version_string, service_info.get("banner", ""))
+    store = get_default_store()
+    if product and store is not None and store.has_data():
+        return {
+            "key": ("cpe", tuple(product["cpes"]), (product["version"] or "").lower()),
+            "mode": "cpe",
+            "product": product,
+        }
+
+    if not product and service_name in GENERIC_SERVICES:
+        return {"skip": "Server product not identified - skipping CVE scan"}
+
+    # Extract software name
+    software = SERVICE_MAPPINGS.get(service_name, service_name)
+    if product:
+        software = product["cpes"][0][1].replace("_", " ")
+
+    # Try to parse version from version string
+    version = None
+    if version_string:
+        extracted = extract_version(version_string, product=software)
+        version = normalize_version(extracted) or extracted or None
+
+    return {
+        "key": ("keyword", lookup_key(software, version)),
+        "mode": "keyword",
+        "software": software,
+        "version": version,
+    }
+
+
+def run_service_query(query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Perform the CVE lookup for a resolved service query
+
+    Args:
+        query: Output of resolve_service_query
+
+    Returns:
+        Dictionary shaped like scan_for_cves results
+    """
+    if query["mode"] == "cpe":
+        cve_results = get_matcher(get_default_store()).match_product(query["product"])
+        logger.info(f"Matched {cve_results['cpe']} to {cve_results['total_found']} CVEs")
+        return cve_results
+
+    logger.info(f"Checking vulnerabilities for {query['software']} {query['version'] or ''}")
+    return scan_for_cves(query["software"], query["version"])
+
+
+async def run_service_query_async(query: Dict[str, Any], session: aiohttp.ClientSession) -> Dict[str, Any]:
+    """
+    Asynchronous run_service_query; live NVD searches go through the session
+
+    Args:
+        query: Output of resolve_service_query
+        session: aiohttp session used for NVD requests
+
+    Returns:
+        Dictionary shaped like scan_for_cves results
+    """
+    if query["mode"] == "cpe":
+        return run_service_query(query)
+
+    logger.info(f"Checking vulnerabilities for {query['software']} {query['version'] or ''}")
+    return await scan_for_cves_async(session, query["software"], query["version"])
+
+
+def _build_result(service_info: Dict[str, Any], cve_results: Optional[Dict[str, Any]] = None,
+                  skip_reason: str = None) -> Dict[str, Any]:
+    """Assemble the per-service result from a (possibly shared) CVE lookup"""
     results = {
         "port": service_info.get("port"),
         "service": service_info.get("service"),
         "version": service_info.get("version"),
         "vulnerabilities": []
     }
+
+    if skip_reason:
+        logger.debug(f"Skipping vulnerability scan on port {service_info.get('port')}: {skip_reason}")
+        results["skipped"] = True
+        results["reason"] = skip_reason
+        return results
+
+    if "cpe" in cve_results:
+        results["cpe"] = cve_results["cpe"]
+        results["match_type"] = cve_results["match_type"]
+    results["vulnerabilities"] = list(cve_results.get("cves", []))
+    results["total_cves"] = cve_results.get("total_found", 0)
+    results["critical_count"] = cve_results.get("critical_count", 0)
+    results["high_count"] = cve_results.get("high_count", 0)
+
+    if "error" in cve_results:
+        results["error"] = cve_results["error"]
+
+    return results
+
+
+def check_service_vulnerabilities(service_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check for vulnerabilities in detected services
     
-    try:
-        service_name = service_info.get("service", "").lower()
-        version_string = service_info.get("version", "")
-        
-        # Skip scanning for unknown services
-        if service_name == "unknown" or not service_name:
-            logger.debug(f"Skipping vulnerability scan for unknown service on port {service_info.get('port')}")
-            results["skipped"] = True
-            results["reason"] = "Unknown service - skipping CVE scan"
-            return results
-        
-        # Extract software name
-        software = SERVICE_MAPPINGS.get(service_name, service_name)
-        
-        # Try to parse version from version string
-        version = None
-        if version_string:
-            # Simple version extraction (can be improved)
-            parts = version_string.split()
-            for part in parts:
-                if any(char.isdigit() for char in part):
-                    version = part.replace(",", "").replace("(", "").replace(")", "")
-                    break
-        
-        logger.info(f"Checking vulnerabilities for {software} {version if version else ''}")
-        
-        # Scan for CVEs
-        cve_results = scan_for_cves(software, version)
-        results["vulnerabilities"] = cve_results.get("cves", [])
-        results["total_cves"] = cve_results.get("total_found", 0)
-        results["critical_count"] = cve_results.get("critical_count", 0)
-        results["high_count"] = cve_results.get("high_count", 0)
+    Args:
+        service_info: Dictionary with service details
+                     Example: {"port": 80, "service": "http", "version": "Apache 2.4.41"}
         
-        if "error" in cve_results:
-            results["error"] = cve_results["error"]
+    Returns:
+        Dictionary with vulnerability results
+    """
+    try:
+        query = resolve_service_query(service_info)
+        if "skip" in query:
+            return _build_result(service_info, skip_reason=query["skip"])
+        return _build_result(service_info, run_service_query(query))
             
     except Exception as e:
+        results = _build_result(service_info, {})
         results["error"] = f"Error checking service vulnerabilities: {str(e)}"
         logger.error(f"Service vulnerability check error: {e}")
+        return results
+
+
+async def _check_services_indexed(services: List[Dict[str, Any]],
+                                  max_concurrency: int) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (input index, result) pairs as the unique lookups complete"""
+    groups: Dict[Any, List[int]] = {}
+    queries: Dict[Any, Dict[str, Any]] = {}
+    skipped_count = 0
+
+    for index, service in enumerate(services):
+        try:
+            query = resolve_service_query(service)
+        except Exception as e:
+            result = _build_result(service, {})
+            result["error"] = f"Error checking service vulnerabilities: {str(e)}"
+            yield index, result
+            continue
+
+        if "skip" in query:
+            skipped_count += 1
+            # Don't add skipped services to results
+            continue
+
+        queries.setdefault(query["key"], query)
+        groups.setdefault(query["key"], []).append(index)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def lookup(key, session):
+        async with semaphore:
+            try:
+                return key, await run_service_query_async(queries[key], session)
+            except Exception as e:
+                logger.error(f"Service vulnerability check error: {e}")
+                return key, {"error": f"Error checking service vulnerabilities: {str(e)}"}
+
+    async with aiohttp.ClientSession() as session:
+        tasks = [asyncio.ensure_future(lookup(key, session)) for key in queries]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                key, answer = await next_done
+                for index in groups[key]:
+                    yield index, _build_result(services[index], answer)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    logger.info(f"Vulnerability scan complete: {sum(len(g) for g in groups.values())} services scanned "
+                f"({len(queries)} unique lookups), {skipped_count} services skipped")
+
+
+async def batch_check_services_async(services: List[Dict[str, Any]],
+                                     max_concurrency: int = 10) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Check vulnerabilities for multiple services concurrently
     
-    return results
+    Unique lookups run in parallel (live NVD requests paced by the shared
+    quota limiter) and results are yielded as soon as each one completes,
+    so the order differs from the input order.
+    
+    Args:
+        services: List of service dictionaries
+        max_concurrency: Maximum number of lookups in flight at once
+        
+    Yields:
+        Vulnerability check result for each non-skipped service
+    """
+    async for _, result in _check_services_indexed(services, max_concurrency):
+        yield result
 
 
-def batch_check_services(services: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def batch_check_services(services: List[Dict[str, Any]], max_concurrency: int = 10) -> List[Dict[str, Any]]:
     """
     Check vulnerabilities for multiple services
     
+    Identical (software, version) lookups are performed once per batch and
+    shared by every service that resolves to them. Lookups run concurrently;
+    results are returned in input order.
+    
     Args:
         services: List of service dictionaries
+        max_concurrency: Maximum number of lookups in flight at once
         
     Returns:
         List of vulnerability check results
     """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        # Already inside an event loop (callers there should use
+        # batch_check_services_async); fall back to sequential lookups
+        return _batch_check_services_serial(services)
+
+    async def collect():
+        return [pair async for pair in _check_services_indexed(services, max_concurrency)]
+
+    return [result for _, result in sorted(asyncio.run(collect()), key=lambda pair: pair[0])]
+
+
+def _batch_check_services_serial(services: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Sequential batch check; live requests are paced by the NVD limiter"""
     results = []
     skipped_count = 0
-    scanned_count = 0
+    answers: Dict[Any, Dict[str, Any]] = {}
     
     for service in services:
-        result = check_service_vulnerabilities(service)
-        
-        if result.get("skipped"):
+        try:
+            query = resolve_service_query(service)
+        except Exception as e:
+            query = {"error": str(e)}
+
+        if "skip" in query:
             skipped_count += 1
-            # Don't add skipped services to results
             continue
-        else:
-            scanned_count += 1
+
+        if "error" in query:
+            result = _build_result(service, {})
+            result["error"] = f"Error checking service vulnerabilities: {query['error']}"
             results.append(result)
-            # Add small delay to avoid rate limiting (only for actual scans)
-            import time
-            time.sleep(1)
+            continue
+
+        if query["key"] not in answers:
+            try:
+                answers[query["key"]] = run_service_query(query)
+            except Exception as e:
+                logger.error(f"Service vulnerability check error: {e}")
+                answers[query["key"]] = {"error": f"Error checking service vulnerabilities: {str(e)}"}
+
+        results.append(_build_result(service, answers[query["key"]]))
     
-    logger.info(f"Vulnerability scan complete: {scanned_count} services scanned, {skipped_count} unknown services skipped")
+    logger.info(f"Vulnerability scan complete: {len(results)} services scanned "
+                f"({len(answers)} unique lookups), {skipped_count} services skipped")
     
     return results
@@ -42,7 +42,7 @@ setup(
     },
     include_package_data=True,
     package_data={
-        "redcalibur": ["*.txt", "*.md"],
+        "redcalibur": ["*.txt", "*.md", "osint/user_identity/*.json"],
     },
     keywords="security, penetration-testing, osint, red-team, cybersecurity, ai",
 )
@@ -0,0 +1,139 @@
+import io
+import json
+import os
+import shutil
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+from PyPDF2 import PdfWriter
+
+from redcalibur.config import Config
+from redcalibur.osint.image_file_osint import bulk_file_osint as bulk_module
+from redcalibur.osint.image_file_osint.bulk_file_osint import (
+    ChunkDispatcher, bulk_file_osint, iter_tasks, write_ndjson
+)
+
+
+def make_pdf(author):
+    writer = PdfWriter()
+    writer.add_blank_page(width=72, height=72)
+    writer.add_metadata({"/Author": author, "/Title": "Quarterly report"})
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def make_jpeg(make):
+    exif = Image.Exif()
+    exif[0x010F] = make  # Make
+    exif[0x0131] = "Editor 1.0"  # Software
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "red").save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def evidence(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CACHE_DB_PATH", str(tmp_path / "cache.db"))
+    root = tmp_path / "evidence"
+    (root / "docs").mkdir(parents=True)
+    (root / "docs" / "report.pdf").write_bytes(make_pdf("alice"))
+    (root / "docs" / "broken.pdf").write_bytes(b"%PDF-1.4 truncated")
+    (root / "photo.JPG").write_bytes(make_jpeg("Canon"))
+    (root / "notes.txt").write_text("not a target")
+
+    with zipfile.ZipFile(root / "bundle.zip", "w") as archive:
+        archive.writestr("inner/memo.pdf", make_pdf("bob"))
+        archive.writestr("inner/readme.md", "skip me")
+    with tarfile.open(root / "photos.tar.gz", "w:gz") as archive:
+        data = make_jpeg("Nikon")
+        info = tarfile.TarInfo("camera/img.jpeg")
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+    (root / "corrupt.zip").write_bytes(b"not a zip")
+    return root
+
+
+def test_iter_tasks_expands_archives(evidence):
+    tasks = {task[0]: (task[1], skipped) for task, skipped in iter_tasks(str(evidence))}
+
+    assert tasks[f"{evidence}/bundle.zip!inner/memo.pdf"] == ("document", None)
+    assert tasks[f"{evidence}/photos.tar.gz!camera/img.jpeg"] == ("image", None)
+    assert tasks[f"{evidence}/photo.JPG"] == ("image", None)
+    assert tasks[f"{evidence}/corrupt.zip"][1].startswith("unreadable archive")
+    assert not any(path.endswith((".txt", ".md")) for path in tasks)
+
+    # Members of unwanted types are not yielded (and so never read)
+    images = [task[0] for task, _ in iter_tasks(str(evidence), kinds={"image"})]
+    assert f"{evidence}/photos.tar.gz!camera/img.jpeg" in images
+    assert not any(path.lower().endswith(".pdf") for path in images)
+
+
+def test_dispatcher_bounds_member_bytes_in_flight(monkeypatch):
+    monkeypatch.setattr(bulk_module, "CHUNK_BYTES", 1000)
+    monkeypatch.setattr(bulk_module, "MAX_PENDING_BYTES", 3000)
+    tasks = [(f"a.zip!{i}.jpg", "image", None, b"x" * 400) for i in range(50)]
+    tasks += [(f"{i}.jpg", "image", f"{i}.jpg", None) for i in range(100)]
+    chunks = []
+
+    def work(chunk):
+        chunks.append(sum(len(t[3] or b"") for t in chunk))
+        return [t[0] for t in chunk]
+
+    done = []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        dispatcher = ChunkDispatcher(pool, work, max_pending=100)
+        for task in tasks:
+            done.extend(dispatcher.add(task))
+            assert dispatcher.pending_bytes <= 3000
+        done.extend(dispatcher.finish())
+
+    assert sorted(done) == sorted(t[0] for t in tasks)
+    assert max(chunks) < 1000 + 400
+    assert dispatcher.pending == {} and dispatcher.pending_bytes == 0
+
+
+def test_bulk_records_streamed_as_ndjson(evidence, tmp_path):
+    output = tmp_path / "out.ndjson"
+    with open(output, "w") as fh:
+        counts = write_ndjson(bulk_file_osint(str(evidence), workers=2), fh)
+
+    records = {r["path"]: r for r in map(json.loads, output.read_text().splitlines())}
+    assert counts == {"files": 6, "errors": 2, "cached": 0}
+    assert len(records) == 6
+
+    assert records[f"{evidence}/docs/report.pdf"]["metadata"]["/Author"] == "alice"
+    assert records[f"{evidence}/bundle.zip!inner/memo.pdf"]["metadata"]["/Author"] == "bob"
+    assert records[f"{evidence}/photo.JPG"]["metadata"]["Make"] == "Canon"
+    assert records[f"{evidence}/photos.tar.gz!camera/img.jpeg"]["metadata"]["Software"] == "Editor 1.0"
+    assert records[f"{evidence}/photo.JPG"]["size"] == (evidence / "photo.JPG").stat().st_size
+    assert "error" in records[f"{evidence}/docs/broken.pdf"]
+    assert "error" in records[f"{evidence}/corrupt.zip"]
+
+
+def test_rescans_are_incremental(evidence):
+    first = {r["path"]: r for r in bulk_file_osint(str(evidence), workers=2)}
+    assert not any(r.get("cached") for r in first.values())
+
+    # Unchanged files are answered from the cache without being read
+    second = {r["path"]: r for r in bulk_file_osint(str(evidence), workers=2)}
+    report = f"{evidence}/docs/report.pdf"
+    assert second[report]["cached"] and second[report]["metadata"] == first[report]["metadata"]
+    assert second[f"{evidence}/photo.JPG"]["digest"] == first[f"{evidence}/photo.JPG"]["digest"]
+    assert all(r.get("cached") for path, r in second.items() if path != f"{evidence}/corrupt.zip")
+
+    # A copy is recognized by content; a rewritten file is extracted again
+    shutil.copy(evidence / "photo.JPG", evidence / "copy.jpg")
+    (evidence / "docs" / "report.pdf").write_bytes(make_pdf("carol"))
+    os.utime(evidence / "docs" / "report.pdf", ns=(1, 1))
+    third = {r["path"]: r for r in bulk_file_osint(str(evidence), workers=2)}
+    assert third[f"{evidence}/copy.jpg"]["cached"]
+    assert third[f"{evidence}/copy.jpg"]["digest"] == first[f"{evidence}/photo.JPG"]["digest"]
+    assert "cached" not in third[report]
+    assert third[report]["metadata"]["/Author"] == "carol"
+
+    uncached = list(bulk_file_osint(str(evidence), workers=1, use_cache=False))
+    assert not any("cached" in r or "digest" in r for r in uncached)
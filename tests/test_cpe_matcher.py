@@ -0,0 +1,102 @@
+import random
+from unittest.mock import patch
+
+import pytest
+
+from redcalibur.config import Config
+from redcalibur.vulnerability_scanning.cve_store import CVEStore
+from redcalibur.vulnerability_scanning.cpe_matcher import (
+    CPEMatcher, VersionInterval, VersionIntervalIndex, identify_product, version_key
+)
+from redcalibur.vulnerability_scanning.service_vuln_check import check_service_vulnerabilities
+
+
+def make_cve(cve_id, criteria, score=7.5, severity="HIGH", **ranges):
+    match = {"vulnerable": True, "criteria": criteria}
+    match.update(ranges)
+    return {
+        "id": cve_id,
+        "published": "2023-01-01T00:00:00.000",
+        "lastModified": "2023-01-01T00:00:00.000",
+        "descriptions": [{"lang": "en", "value": f"Issue {cve_id}"}],
+        "metrics": {"cvssMetricV31": [{"cvssData": {"baseScore": score, "baseSeverity": severity}}]},
+        "configurations": [{"nodes": [{"operator": "OR", "cpeMatch": [match]}]}],
+    }
+
+
+OPENSSH = "cpe:2.3:a:openbsd:openssh:*:*:*:*:*:*:*:*"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CVEStore(str(tmp_path / "nvd.db"))
+    store.upsert_cves([
+        make_cve("CVE-A", OPENSSH, versionEndExcluding="9.3p2"),
+        make_cve("CVE-B", OPENSSH, versionStartIncluding="8.5", versionEndIncluding="8.8"),
+        make_cve("CVE-C", "cpe:2.3:a:openbsd:openssh:8.9:p1:*:*:*:*:*:*", score=9.8, severity="CRITICAL"),
+        make_cve("CVE-D", "cpe:2.3:a:apache:http_server:*:*:*:*:*:*:*:*", versionEndIncluding="2.4.51"),
+    ])
+    yield store
+    store.close()
+
+
+def test_identify_product_from_banners():
+    assert identify_product("SSH", "OpenSSH 8.9p1") == {"cpes": [("openbsd", "openssh")], "version": "8.9p1"}
+    assert identify_product("HTTP", "apache/2.4.41 (ubuntu)")["cpes"] == [("apache", "http_server")]
+    assert identify_product("HTTP", "Apache-Coyote/1.1 Apache Tomcat/9.0.31")["cpes"] == [("apache", "tomcat")]
+    assert identify_product("FTP", "", "220 (vsFTPd 3.0.3)")["version"] == "3.0.3"
+    assert identify_product("HTTP", "cloudflare") is None
+
+
+def test_version_key_ordering():
+    assert version_key("8.9") < version_key("8.9p1") < version_key("8.10")
+    assert version_key("1.0.2") < version_key("1.0.2k")
+    assert version_key("2.4.41-ubuntu") == version_key("2.4.41")
+
+
+def test_interval_index_matches_brute_force():
+    rng = random.Random(0)
+    intervals = []
+    for i in range(300):
+        lo, hi = sorted((rng.randint(0, 50), rng.randint(0, 50)))
+        intervals.append(VersionInterval(version_key(f"1.{lo}"), rng.random() < 0.5,
+                                         version_key(f"1.{hi}"), rng.random() < 0.5, f"CVE-{i}"))
+    index = VersionIntervalIndex(intervals)
+    for v in range(-1, 52):
+        key = version_key(f"1.{v}")
+        expected = sorted(iv.cve_id for iv in intervals if iv.contains(key))
+        assert sorted(index.query(key)) == expected
+
+
+def test_matcher_applies_version_ranges(store):
+    matcher = CPEMatcher(store)
+    assert sorted(matcher.match("openbsd", "openssh", "8.7")) == ["CVE-A", "CVE-B"]
+    assert sorted(matcher.match("openbsd", "openssh", "8.9p1")) == ["CVE-A", "CVE-C"]
+    assert sorted(matcher.match("openbsd", "openssh", "8.9")) == ["CVE-A"]
+    assert matcher.match("openbsd", "openssh", "9.3p2") == []
+    assert len(matcher.match("openbsd", "openssh")) == 3
+
+
+def test_match_versions_agrees_with_interval_index(store):
+    matcher = CPEMatcher(store)
+    inventory = ["8.4", "8.7", "8.9", "8.9p1", "9.3p2", "9.3p1"]
+    bulk = matcher.match_versions("openbsd", "openssh", inventory + ["unknown"])
+    assert set(bulk) == set(inventory)
+    for version in inventory:
+        assert sorted(bulk[version]) == sorted(matcher.match("openbsd", "openssh", version))
+
+
+@patch("requests.get")
+def test_check_service_vulnerabilities_uses_cpe_match(mock_get, store, monkeypatch):
+    monkeypatch.setattr(Config, "CVE_DB_PATH", store.db_path)
+
+    result = check_service_vulnerabilities({"port": 22, "service": "SSH", "version": "OpenSSH 8.9p1"})
+    assert result["match_type"] == "cpe_version"
+    assert result["total_cves"] == 2
+    assert result["critical_count"] == 1
+    assert result["vulnerabilities"][0]["cve_id"] == "CVE-C"
+
+    # HTTP without an identified server product is no longer mapped to Apache
+    result = check_service_vulnerabilities({"port": 80, "service": "HTTP", "version": ""})
+    assert result["skipped"]
+    mock_get.assert_not_called()
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from redcalibur.cache import PersistentCache, SingleFlight
+from redcalibur.config import Config
+from redcalibur.ratelimit import SlidingWindowLimiter
+from redcalibur.vulnerability_scanning import cve_scanner
+from redcalibur.vulnerability_scanning.service_vuln_check import (
+    batch_check_services, batch_check_services_async
+)
+
+NVD_RESPONSE = {
+    "totalResults": 1,
+    "vulnerabilities": [{"cve": {
+        "id": "CVE-2023-38408",
+        "descriptions": [{"lang": "en", "value": "OpenSSH ssh-agent remote code execution"}],
+        "metrics": {"cvssMetricV31": [{"cvssData": {"baseScore": 9.8, "baseSeverity": "CRITICAL"}}]},
+    }}],
+}
+
+
+class FakeNVDHandler(BaseHTTPRequestHandler):
+    """Serves NVD_RESPONSE with an ETag; statuses queued in `fail_with` are returned first"""
+    requests_seen = []
+    fail_with = []
+    delay = 0.0
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests_seen.append(dict(self.headers))
+        time.sleep(cls.delay)
+        if cls.fail_with:
+            self.send_response(cls.fail_with.pop(0))
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = json.dumps(NVD_RESPONSE).encode()
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def isolated_data(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CVE_DB_PATH", str(tmp_path / "no-mirror.db"))
+    monkeypatch.setattr(Config, "CACHE_DB_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(Config, "REQUEST_DELAY", 0)
+    monkeypatch.setattr(Config, "NVD_API_KEY", None)
+    monkeypatch.setattr(cve_scanner, "_limiters", {})
+
+
+@pytest.fixture
+def nvd_server(monkeypatch):
+    FakeNVDHandler.requests_seen = []
+    FakeNVDHandler.fail_with = []
+    FakeNVDHandler.delay = 0.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeNVDHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(cve_scanner, "NVD_API_URL", f"http://127.0.0.1:{server.server_port}/cves")
+    yield FakeNVDHandler
+    server.shutdown()
+    server.server_close()
+
+
+def ssh(port, version):
+    return {"port": port, "service": "SSH", "version": f"OpenSSH {version}"}
+
+
+def test_batch_coalesces_identical_services(nvd_server):
+    services = [ssh(22, "8.9") for _ in range(5)]
+
+    results = batch_check_services(services)
+    assert len(results) == 5
+    assert all(r["total_cves"] == 1 for r in results)
+    assert len(nvd_server.requests_seen) == 1
+
+    # A later run is answered from the persistent cache
+    batch_check_services(services)
+    assert len(nvd_server.requests_seen) == 1
+
+
+def test_stale_entry_is_revalidated(nvd_server, monkeypatch):
+    batch_check_services([ssh(22, "8.9")])
+
+    monkeypatch.setattr(Config, "CVE_CACHE_TTL", 0)
+    results = batch_check_services([ssh(22, "8.9")])
+
+    assert results[0]["total_cves"] == 1
+    assert nvd_server.requests_seen[-1]["If-None-Match"] == '"v1"'
+
+
+def test_batch_runs_concurrently_and_keeps_order(nvd_server):
+    nvd_server.delay = 0.3
+    services = [ssh(port, f"8.{port}") for port in range(1, 5)]
+
+    started = time.monotonic()
+    results = batch_check_services(services)
+    assert time.monotonic() - started < 1.0
+    assert [r["port"] for r in results] == [1, 2, 3, 4]
+
+
+def test_async_batch_retries_throttled_requests(nvd_server):
+    nvd_server.fail_with = [503, 403]
+
+    async def collect():
+        return [r async for r in batch_check_services_async([ssh(22, "9.0")])]
+
+    results = asyncio.run(collect())
+    assert results[0]["total_cves"] == 1 and "error" not in results[0]
+    assert len(nvd_server.requests_seen) == 3
+
+
+def test_sliding_window_limiter_spaces_calls():
+    limiter = SlidingWindowLimiter(max_calls=2, period=10)
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert 9.9 < limiter.reserve() <= 10
+    assert 9.9 < limiter.reserve() <= 10
+    assert 19.9 < limiter.reserve() <= 20
+
+
+def test_persistent_cache_ttl(tmp_path):
+    cache = PersistentCache(str(tmp_path / "c.db"), namespace="test", ttl=60)
+    cache.set("k", {"a": 1}, etag="e1")
+    entry = cache.get("k")
+    assert entry.fresh and entry.value == {"a": 1}
+    assert not cache.get("k", ttl=0).fresh
+    assert cache.purge_expired(max_age=-1) == 1
+    assert cache.get("k") is None
+
+
+def test_single_flight_shares_result():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    # Let every thread join the in-flight call before it completes
+    while len(flight._calls) == 0:
+        pass
+    threading.Timer(0.2, release.set).start()
+    for t in threads:
+        t.join()
+
+    assert results == ["value"] * 5
+    assert len(calls) == 1
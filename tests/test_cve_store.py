@@ -0,0 +1,110 @@
+import gzip
+import json
+from unittest.mock import patch
+
+import pytest
+
+from redcalibur.config import Config
+from redcalibur.vulnerability_scanning.cve_store import CVEStore, parse_cpe
+from redcalibur.vulnerability_scanning.cve_scanner import scan_for_cves, search_cve_by_id
+
+
+def make_cve(cve_id, description, score, severity, criteria, **ranges):
+    match = {"vulnerable": True, "criteria": criteria}
+    match.update(ranges)
+    return {
+        "id": cve_id,
+        "published": "2021-01-01T00:00:00.000",
+        "lastModified": "2021-06-01T00:00:00.000",
+        "descriptions": [{"lang": "en", "value": description}],
+        "metrics": {"cvssMetricV31": [{"cvssData": {"baseScore": score, "baseSeverity": severity}}]},
+        "configurations": [{"nodes": [{"operator": "OR", "cpeMatch": [match]}]}],
+    }
+
+
+SAMPLE_CVES = [
+    make_cve("CVE-2021-41773", "Path traversal in Apache HTTP Server 2.4.49", 7.5, "HIGH",
+             "cpe:2.3:a:apache:http_server:2.4.49:*:*:*:*:*:*:*"),
+    make_cve("CVE-2021-44790", "Buffer overflow in mod_lua of Apache HTTP Server", 9.8, "CRITICAL",
+             "cpe:2.3:a:apache:http_server:*:*:*:*:*:*:*:*", versionEndIncluding="2.4.51"),
+    make_cve("CVE-2023-38408", "OpenSSH ssh-agent remote code execution", 9.8, "CRITICAL",
+             "cpe:2.3:a:openbsd:openssh:*:*:*:*:*:*:*:*", versionEndExcluding="9.3"),
+]
+
+
+@pytest.fixture
+def feed_path(tmp_path):
+    path = tmp_path / "nvdcve-2.0-test.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as fh:
+        json.dump({"vulnerabilities": [{"cve": c} for c in SAMPLE_CVES]}, fh)
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path, feed_path):
+    store = CVEStore(str(tmp_path / "nvd.db"))
+    store.ingest_feed(feed_path)
+    yield store
+    store.close()
+
+
+def test_parse_cpe():
+    cpe = parse_cpe("cpe:2.3:a:apache:http_server:2.4.41:*:*:*:*:*:*:*")
+    assert cpe["vendor"] == "apache"
+    assert cpe["product"] == "http_server"
+    assert cpe["version"] == "2.4.41"
+    assert parse_cpe("not-a-cpe") == {}
+
+
+def test_ingest_and_keyword_search(store, tmp_path):
+    assert store.count() == 3
+    assert store.has_data()
+    empty = CVEStore(str(tmp_path / "empty.db"))
+    assert not empty.has_data()
+    empty.close()
+
+    found = store.search(keyword="apache")
+    assert found["total_found"] == 2
+    # Highest CVSS first
+    assert found["cves"][0]["cve_id"] == "CVE-2021-44790"
+    assert found["severity_counts"]["critical"] == 1
+
+    found = store.search(keyword="apache 2.4.49")
+    assert [c["cve_id"] for c in found["cves"]] == ["CVE-2021-41773"]
+
+
+def test_search_by_cpe_and_cvss(store):
+    found = store.search(vendor="openbsd", product="openssh")
+    assert [c["cve_id"] for c in found["cves"]] == ["CVE-2023-38408"]
+
+    found = store.search(min_cvss=9.0)
+    assert found["total_found"] == 2
+
+
+def test_upsert_replaces_existing(store):
+    updated = dict(SAMPLE_CVES[0], descriptions=[{"lang": "en", "value": "Updated nginx description"}])
+    store.upsert_cves([updated])
+    assert store.count() == 3
+    assert store.search(keyword="nginx")["total_found"] == 1
+    assert store.search(keyword="traversal")["total_found"] == 0
+
+
+@patch("requests.get")
+def test_scan_for_cves_uses_local_store(mock_get, store, monkeypatch):
+    monkeypatch.setattr(Config, "CVE_DB_PATH", store.db_path)
+
+    results = scan_for_cves("openssh")
+    assert results["source"] == "local"
+    assert results["total_found"] == 1
+    assert results["critical_count"] == 1
+
+    cve = search_cve_by_id("CVE-2021-41773")
+    assert cve["vulnerabilities"][0]["cve"]["id"] == "CVE-2021-41773"
+    mock_get.assert_not_called()
+
+
+def test_scan_for_cves_without_store_or_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CVE_DB_PATH", str(tmp_path / "missing.db"))
+    results = scan_for_cves("apache", live_fallback=False)
+    assert results["total_found"] == 0
+    assert "error" in results
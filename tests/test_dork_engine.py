@@ -0,0 +1,119 @@
+import dataclasses
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from redcalibur.config import Config
+from redcalibur.osint.search_engine_data_mining import dork_engine
+from redcalibur.osint.search_engine_data_mining.dork_engine import (
+    DorkError, normalize_query, parse_results, run_dorks, search
+)
+from redcalibur.osint.search_engine_data_mining.google_dorking import perform_google_dorking
+
+GOOGLE_PAGE = """<html><body>
+<a href="https://accounts.google.com/ServiceLogin">Sign in</a>
+<div class="g"><a href="/url?q=https://example.com/files/report.pdf&amp;sa=U&amp;ved=1"><h3>Report</h3></a></div>
+<div class="g"><a data-ved="2" href="https://example.com/login">Login</a></div>
+<div class="g"><a href="/url?q=https://example.com/files/report.pdf&amp;sa=U">Duplicate</a></div>
+<a href="/search?q=related">Related</a>
+</body></html>"""
+
+DDG_PAGE = """<html><body>
+<div class="result"><a rel="nofollow" class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fexample.com%2Findex%2F&amp;rut=abc">Index of /</a></div>
+<div class="result"><a rel="nofollow" class="result__a" href="https://duckduckgo.com/y.js?ad_domain=ads.example">Ad</a></div>
+</body></html>"""
+
+
+class FakeSearchHandler(BaseHTTPRequestHandler):
+    """Serves canned result pages; /google?q=blocked returns a captcha page"""
+    queries = []
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query).get("q", [""])[0]
+        type(self).queries.append((parsed.path, query))
+        if query == "blocked" and parsed.path == "/google":
+            body = "<form action='/sorry/index'>Our systems have detected unusual traffic from your computer</form>"
+        else:
+            body = GOOGLE_PAGE if parsed.path == "/google" else DDG_PAGE
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_engines(tmp_path, monkeypatch):
+    FakeSearchHandler.queries = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSearchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(dork_engine, "ENGINES", {
+        "google": dataclasses.replace(dork_engine.ENGINES["google"], search_url=base + "/google?q={query}&num={num}",
+                                      requests_per_minute=100),
+        "duckduckgo": dataclasses.replace(dork_engine.ENGINES["duckduckgo"], search_url=base + "/ddg?q={query}",
+                                          requests_per_minute=100),
+    })
+    monkeypatch.setattr(dork_engine, "_limiters", {})
+    monkeypatch.setattr(Config, "CACHE_DB_PATH", str(tmp_path / "cache.db"))
+    yield FakeSearchHandler
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_results_decodes_redirects_and_skips_engine_links():
+    google = dork_engine.ENGINES["google"]
+    assert parse_results(google, GOOGLE_PAGE) == [
+        "https://example.com/files/report.pdf", "https://example.com/login"
+    ]
+    assert parse_results(google, GOOGLE_PAGE, limit=1) == ["https://example.com/files/report.pdf"]
+    assert parse_results(dork_engine.ENGINES["duckduckgo"], DDG_PAGE) == ["https://example.com/index/"]
+
+    bing_link = '<h2><a href="https://www.bing.com/ck/a?!&amp;&amp;p=x&amp;u=a1aHR0cHM6Ly9leGFtcGxlLmNvbS9h&amp;ntb=1">A</a></h2>'
+    assert parse_results(dork_engine.ENGINES["bing"], bing_link) == ["https://example.com/a"]
+
+
+def test_results_cached_by_normalized_query(fake_engines):
+    first = search('site:example.com  filetype:PDF OR inurl:login')
+    assert first[0] == "https://example.com/files/report.pdf"
+
+    assert normalize_query(' SITE:example.com filetype:pdf   OR inurl:Login ') == \
+        normalize_query('site:example.com  filetype:PDF OR inurl:login')
+    assert search(' SITE:example.com filetype:pdf   OR inurl:Login ') == first
+    assert len(fake_engines.queries) == 1
+
+    with pytest.raises(DorkError):
+        search("blocked")
+    # Blocked answers are not cached
+    with pytest.raises(DorkError):
+        search("blocked")
+    assert len(fake_engines.queries) == 3
+
+
+def test_run_dorks_across_engines(fake_engines):
+    results = run_dorks(['site:example.com intitle:"index of"', "blocked"], engines=("google", "duckduckgo", "yandex"))
+
+    assert results['site:example.com intitle:"index of"']["duckduckgo"] == ["https://example.com/index/"]
+    assert results['site:example.com intitle:"index of"']["google"][1] == "https://example.com/login"
+    assert "error" in results["blocked"]["google"]
+    assert results["blocked"]["duckduckgo"] == ["https://example.com/index/"]
+    assert results["blocked"]["yandex"] == {"error": "Unsupported search engine: yandex"}
+    assert ("/google", 'site:example.com intitle:"index of"') in fake_engines.queries
+
+
+def test_perform_google_dorking_returns_error_dicts(fake_engines, monkeypatch):
+    assert perform_google_dorking("site:example.com", num_results=1) == ["https://example.com/files/report.pdf"]
+    assert "error" in perform_google_dorking("blocked")
+
+    def broken(*args, **kwargs):
+        raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+    monkeypatch.setattr("redcalibur.osint.search_engine_data_mining.google_dorking.search", broken)
+    assert "invalid start byte" in perform_google_dorking("anything")["error"]
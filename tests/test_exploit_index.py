@@ -0,0 +1,58 @@
+import pytest
+
+from redcalibur.config import Config
+from redcalibur.vulnerability_scanning.exploit_finder import find_exploits, find_exploits_many
+from redcalibur.vulnerability_scanning.exploit_index import ExploitIndex, exploit_product
+
+CSV = """id,file,description,date_published,author,type,platform,port,date_added,date_updated,verified,codes,tags,aliases,screenshot_url,application_url,source_url
+45233,exploits/linux/remote/45233.py,OpenSSH 2.3 < 7.7 - Username Enumeration,2018-08-20,Justin Gardner,remote,linux,22,2018-08-20,2018-08-20,1,CVE-2018-15473,,,,,
+50383,exploits/multiple/webapps/50383.sh,Apache HTTP Server 2.4.49 - Path Traversal & Remote Code Execution (RCE),2021-10-06,Lucas Souza,webapps,multiple,,2021-10-06,2021-10-06,0,CVE-2021-41773;CVE-2021-42013,,,,,
+50406,exploits/multiple/webapps/50406.sh,Apache HTTP Server 2.4.50 - Remote Code Execution (RCE) (2),2021-10-11,Valentin Lobstein,webapps,multiple,,2021-10-11,2021-10-11,0,CVE-2021-42013,,,,,
+"""
+
+
+@pytest.fixture
+def index_path(tmp_path, monkeypatch):
+    checkout = tmp_path / "exploitdb"
+    checkout.mkdir()
+    (checkout / "files_exploits.csv").write_text(CSV)
+    db_path = str(tmp_path / "exploitdb.db")
+
+    index = ExploitIndex(db_path)
+    assert index.import_csv(str(checkout)) == 3
+    index.close()
+
+    monkeypatch.setattr(Config, "EXPLOIT_DB_PATH", db_path)
+    return db_path
+
+
+def test_exploit_product_from_title():
+    assert exploit_product("OpenSSH 2.3 < 7.7 - Username Enumeration") == "openssh"
+    assert exploit_product("Apache HTTP Server 2.4.49 - Path Traversal") == "apache http server"
+
+
+def test_find_exploits_by_cve_and_product(index_path):
+    result = find_exploits(cve_id="CVE-2018-15473")
+    assert result["source"] == "local"
+    assert result["exploits"][0]["edb_id"] == 45233
+    assert result["exploits"][0]["verified"] is True
+
+    result = find_exploits(software="apache_http_server")
+    assert sorted(e["edb_id"] for e in result["exploits"]) == [50383, 50406]
+    assert find_exploits(software="openssh", platform="windows")["total_found"] == 0
+
+
+def test_find_exploits_many_joins_scan_output(index_path):
+    result = find_exploits_many(["CVE-2021-42013", "cve-2021-41773", "CVE-2023-0001"])
+    assert result["queried"] == 3
+    assert result["cves_with_exploits"] == 2
+    assert sorted(e["edb_id"] for e in result["exploits"]["CVE-2021-42013"]) == [50383, 50406]
+    assert "CVE-2023-0001" not in result["exploits"]
+
+
+def test_find_exploits_without_index_returns_references(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "EXPLOIT_DB_PATH", str(tmp_path / "missing.db"))
+    result = find_exploits(cve_id="CVE-2021-44228")
+    assert result["total_found"] == 2
+    assert "source" not in result
+    assert "error" in find_exploits_many(["CVE-2021-44228"])
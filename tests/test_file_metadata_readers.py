@@ -0,0 +1,147 @@
+import io
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+from PyPDF2 import PdfWriter
+
+from redcalibur.osint.image_file_osint.document_metadata_extraction import extract_document_metadata
+from redcalibur.osint.image_file_osint.exif_metadata_extraction import extract_exif_metadata
+from redcalibur.osint.image_file_osint.pdf_metadata_reader import PdfStructureError, read_pdf_metadata
+
+XMP = b"""<?xpacket begin="" id="W5M0MpCehiHzreSzNTczkc9d"?>
+<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+<rdf:Description rdf:about="" xmlns:xmp="http://ns.adobe.com/xap/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/"
+ xmp:CreatorTool="Writer 7">
+<dc:creator><rdf:Seq><rdf:li>Alice Example</rdf:li></rdf:Seq></dc:creator>
+</rdf:Description></rdf:RDF></x:xmpmeta>
+<?xpacket end="r"?>"""
+
+
+def build_compressed_pdf(padding=0):
+    """PDF 1.5 with an xref stream, the Info dictionary inside an object stream, and XMP"""
+    out = bytearray(b"%PDF-1.5\n")
+    offsets = {}
+
+    def add(num, body):
+        offsets[num] = len(out)
+        out.extend(b"%d 0 obj\n" % num + body + b"\nendobj\n")
+
+    add(1, b"<< /Type /Catalog /Pages 2 0 R /Metadata 4 0 R >>")
+    add(2, b"<< /Type /Pages /Kids [] /Count 0 >>")
+    add(4, b"<< /Type /Metadata /Subtype /XML /Length %d >>\nstream\n" % len(XMP) + XMP + b"\nendstream")
+    out.extend(b"%" + b"x" * padding + b"\n")  # stands in for page content
+
+    info = b"<< /Author (Alice \\(ops\\)) /Title <FEFF00520065> /Producer (Tool\\0561) /Trapped /False >>"
+    header = b"3 0 "
+    objstm = zlib.compress(header + info)
+    add(5, b"<< /Type /ObjStm /N 1 /First %d /Filter /FlateDecode /Length %d >>\nstream\n"
+        % (len(header), len(objstm)) + objstm + b"\nendstream")
+
+    xref_at = len(out)
+    rows = [(0, 0, 65535), (1, offsets[1], 0), (1, offsets[2], 0), (2, 5, 0), (1, offsets[4], 0),
+            (1, offsets[5], 0), (1, xref_at, 0)]
+    raw = b"".join(struct.pack(">BIH", *row) for row in rows)
+    # PNG Up predictor, as most writers emit
+    previous = bytes(7)
+    encoded = bytearray()
+    for i in range(0, len(raw), 7):
+        row = raw[i:i + 7]
+        encoded += b"\x02" + bytes((a - b) & 0xFF for a, b in zip(row, previous))
+        previous = row
+    data = zlib.compress(bytes(encoded))
+    add(6, b"<< /Type /XRef /Size 7 /W [1 4 2] /Root 1 0 R /Info 3 0 R /Filter /FlateDecode "
+        b"/DecodeParms << /Columns 7 /Predictor 12 >> /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+    out.extend(b"startxref\n%d\n%%%%EOF\n" % xref_at)
+    return bytes(out)
+
+
+def append_update(pdf, author):
+    """Incremental update replacing the Info dictionary via a classic xref table"""
+    out = bytearray(pdf)
+    prev = int(pdf.rsplit(b"startxref", 1)[1].split()[0])
+    info_at = len(out)
+    out.extend(b"8 0 obj\n<< /Author (%s) >>\nendobj\n" % author)
+    xref_at = len(out)
+    out.extend(b"xref\n8 1\n%010d 00000 n \ntrailer\n<< /Size 9 /Root 1 0 R /Info 8 0 R /Prev %d >>\n"
+               b"startxref\n%d\n%%%%EOF\n" % (info_at, prev, xref_at))
+    return bytes(out)
+
+
+def test_pdf_metadata_from_xref_stream_and_object_stream(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(build_compressed_pdf(padding=1024 * 1024))
+
+    metadata = extract_document_metadata(str(path))
+    assert metadata["/Author"] == "Alice (ops)"
+    assert metadata["/Title"] == "Re"
+    assert metadata["/Producer"] == "Tool.1"
+    assert metadata["/Trapped"] == "/False"
+    assert metadata["xmp"] == {"xmp:CreatorTool": "Writer 7", "dc:creator": "Alice Example"}
+
+    # Incremental updates: the newest Info wins, older objects stay reachable
+    updated = extract_document_metadata(io.BytesIO(append_update(path.read_bytes(), b"Mallory")))
+    assert updated["/Author"] == "Mallory"
+    assert updated["xmp"]["dc:creator"] == "Alice Example"
+
+
+def test_pdf_falls_back_and_reports_errors(tmp_path):
+    # Broken startxref pointer: the full reader still recovers the Info dictionary
+    writer = PdfWriter()
+    writer.add_blank_page(width=72, height=72)
+    writer.add_metadata({"/Author": "alice"})
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    pdf = buffer.getvalue().replace(b"startxref\n", b"startxref\n9")
+    assert extract_document_metadata(io.BytesIO(pdf))["/Author"] == "alice"
+
+    # Corrupt compressed xref stream in an update: raised as a structure
+    # error, so the full reader takes over instead of reporting an error
+    pdf = bytearray(buffer.getvalue())
+    prev = int(bytes(pdf).rsplit(b"startxref", 1)[1].split()[0])
+    xref_at = len(pdf)
+    garbage = b"x\x9c\xff\xfe not deflate data"
+    pdf.extend(b"9 0 obj\n<< /Type /XRef /Size 10 /W [1 4 2] /Prev %d /Root 1 0 R /Filter /FlateDecode "
+               b"/Length %d >>\nstream\n" % (prev, len(garbage)) + garbage
+               + b"\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n" % xref_at)
+    with pytest.raises(PdfStructureError, match="Undecodable stream"):
+        read_pdf_metadata(io.BytesIO(bytes(pdf)))
+    assert extract_document_metadata(io.BytesIO(bytes(pdf)))["/Author"] == "alice"
+
+    assert "error" in extract_document_metadata(io.BytesIO(b"%PDF-1.4 truncated"))
+    empty = tmp_path / "empty.pdf"
+    empty.write_bytes(b"")
+    assert "error" in extract_document_metadata(str(empty))
+
+
+def make_image(fmt):
+    exif = Image.Exif()
+    exif[0x010F] = "Canon"  # Make
+    exif.get_ifd(0x8769)[0x829A] = 0.004  # ExposureTime
+    gps = exif.get_ifd(0x8825)
+    gps[1] = "N"  # GPSLatitudeRef
+    gps[2] = (51.0, 30.0, 12.5)  # GPSLatitude
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), "blue").save(buffer, fmt, exif=exif)
+    return buffer.getvalue()
+
+
+def test_exif_read_from_metadata_block_only(tmp_path):
+    for fmt in ("JPEG", "PNG", "WEBP"):
+        metadata = extract_exif_metadata(io.BytesIO(make_image(fmt)))
+        assert metadata["Make"] == "Canon"
+        assert metadata["ExposureTime"] == 0.004
+        assert metadata["GPSInfo"] == {"GPSLatitudeRef": "N", "GPSLatitude": (51.0, 30.0, 12.5)}
+
+    # Scan data after the EXIF segment is never parsed
+    path = tmp_path / "photo.jpg"
+    jpeg = make_image("JPEG")
+    scan = jpeg.index(b"\xff\xda")
+    path.write_bytes(jpeg[:scan] + b"\xff\xda" + b"\x00" * 1024 * 1024)
+    assert extract_exif_metadata(str(path))["Make"] == "Canon"
+
+    plain = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(plain, "JPEG")
+    assert extract_exif_metadata(io.BytesIO(plain.getvalue())) == {"error": "No EXIF metadata found."}
+    assert extract_exif_metadata(io.BytesIO(b"GIF89a")) == {"error": "Unsupported image format"}
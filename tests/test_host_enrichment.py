@@ -0,0 +1,81 @@
+import asyncio
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from redcalibur.config import Config
+from redcalibur.phishing_detection import FEATURE_NAMES, URLFeatureExtractor
+from redcalibur.phishing_detection.host_enrichment import (
+    UNREACHABLE, enrich_origins, enrich_origins_async, url_origin
+)
+
+
+class RedirectingHandler(BaseHTTPRequestHandler):
+    """/ redirects to /home, which answers 200"""
+    requests = []
+
+    def do_HEAD(self):
+        type(self).requests.append(self.path)
+        if self.path == "/":
+            self.send_response(302)
+            self.send_header("Location", "/home")
+        else:
+            self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def origin(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "CACHE_DB_PATH", str(tmp_path / "cache.db"))
+    RedirectingHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RedirectingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def closed_port_origin():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def test_url_origin():
+    assert url_origin("HTTPS://Example.COM:8443/a?b#c") == "https://example.com:8443"
+    assert url_origin("example.com/no-scheme") is None
+    assert url_origin("ftp://example.com/file") is None
+    assert url_origin("") is None
+
+
+def test_each_origin_probed_once_and_cached(origin):
+    urls = [f"{origin}/page/{i}?q={i}" for i in range(50)] + ["not a url"]
+    matrix = URLFeatureExtractor().extract_feature_matrix(urls)
+
+    assert RedirectingHandler.requests == ["/", "/home"]
+    assert (matrix[:50, FEATURE_NAMES.index("ssl_cert_valid")] == 1).all()
+    assert (matrix[:50, FEATURE_NAMES.index("redirect_count")] == 1).all()
+    assert matrix[50, FEATURE_NAMES.index("ssl_cert_valid")] == 0
+
+    # A later batch on the same host is answered from the cache
+    features = URLFeatureExtractor().extract_features(origin + "/other")
+    assert (features.ssl_cert_valid, features.redirect_count) == (True, 1)
+    assert len(RedirectingHandler.requests) == 2
+
+
+def test_unreachable_origin(origin):
+    dead = closed_port_origin()
+    results = enrich_origins([dead, origin], timeout=2)
+    assert results[dead] == UNREACHABLE
+    assert results[origin]["reachable"]
+
+    # Callable from inside a running event loop
+    async def nested():
+        return enrich_origins([origin]), await enrich_origins_async([dead], use_cache=False)
+    inner, awaited = asyncio.run(nested())
+    assert inner[origin] == results[origin]
+    assert awaited[dead] == UNREACHABLE
@@ -0,0 +1,76 @@
+import io
+import random
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from redcalibur.config import Config
+from redcalibur.osint.image_file_osint.image_index import BKTree, ImageHashIndex
+from redcalibur.osint.image_file_osint.perceptual_hash import hamming_distance, image_hashes
+from redcalibur.osint.image_file_osint.reverse_image_search import perform_reverse_image_search
+
+
+def make_image(seed, size=(320, 240)):
+    """Smooth random pattern, distinct per seed"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)
+    return Image.fromarray(coarse).resize(size, Image.BICUBIC)
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "IMAGE_INDEX_PATH", str(tmp_path / "index.db"))
+    root = tmp_path / "collected"
+    root.mkdir()
+    for seed in range(12):
+        make_image(seed).save(root / f"img{seed}.png")
+    (root / "broken.jpg").write_bytes(b"\xff\xd8 not really")
+    return root
+
+
+def test_bk_tree_matches_brute_force():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(2000)]
+    # Near-duplicates of the first value
+    values += [values[0] ^ (1 << rng.randrange(64)) for _ in range(5)]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+
+    for query in values[:20] + [rng.getrandbits(64)]:
+        expected = sorted((hamming_distance(query, v), i) for i, v in enumerate(values)
+                          if hamming_distance(query, v) <= 12)
+        assert sorted(tree.search(query, 12)) == expected
+    assert [d for d, _ in tree.search(values[0], 1)][:1] == [0]
+    assert len(tree.search(values[0], 1)) >= 6
+
+
+def test_index_finds_edited_copies(corpus, tmp_path):
+    index = ImageHashIndex()
+    counts = index.index_tree(str(corpus), workers=1)
+    assert counts == {"indexed": 12, "errors": 1}
+
+    # A downscaled, recompressed copy still matches its original first
+    edited = io.BytesIO()
+    make_image(3).resize((160, 120)).save(edited, "JPEG", quality=70)
+    matches = index.search(io.BytesIO(edited.getvalue()), max_distance=10)
+    assert matches[0]["source"] == str(corpus / "img3.png")
+    assert matches[0]["distance"] <= 6
+    assert set(matches[0]["distances"]) == {"ahash", "dhash", "phash"}
+
+    assert index.search(make_image(99), max_distance=4) == []
+
+    # Re-indexing a source replaces its hashes
+    index.add_image(io.BytesIO(edited.getvalue()), source=str(corpus / "img5.png"))
+    assert index.count() == 12
+    top = index.search(image_hashes(io.BytesIO(edited.getvalue())), max_distance=0)
+    assert str(corpus / "img5.png") in {m["source"] for m in top}
+
+
+def test_perform_reverse_image_search_uses_local_index(corpus, tmp_path):
+    ImageHashIndex().index_tree(str(corpus), workers=1)
+    query = tmp_path / "query.png"
+    make_image(7, size=(640, 480)).save(query)
+
+    assert perform_reverse_image_search(str(query))[0] == str(corpus / "img7.png")
@@ -0,0 +1,131 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from redcalibur.config import Config
+from redcalibur.ratelimit import SlidingWindowLimiter
+from redcalibur.vulnerability_scanning import cve_scanner
+from redcalibur.vulnerability_scanning.cve_store import CVEStore
+from redcalibur.vulnerability_scanning.nvd_sync import sync_nvd, split_windows, _parse_timestamp
+
+
+def make_cve(cve_id, last_modified):
+    return {
+        "id": cve_id,
+        "published": "2024-01-01T00:00:00.000",
+        "lastModified": last_modified,
+        "descriptions": [{"lang": "en", "value": f"Test vulnerability {cve_id}"}],
+        "metrics": {"cvssMetricV31": [{"cvssData": {"baseScore": 5.0, "baseSeverity": "MEDIUM"}}]},
+    }
+
+
+CHANGED_CVES = [make_cve(f"CVE-2024-000{i}", f"2024-03-0{i}T00:00:00.000") for i in range(1, 6)]
+
+
+class FakeNVDHandler(BaseHTTPRequestHandler):
+    """Serves CHANGED_CVES filtered by lastMod window and paged by startIndex"""
+    requests_seen = []
+    fail_at_index = None
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        type(self).requests_seen.append(query)
+        start = int(query.get("startIndex", 0))
+        if type(self).fail_at_index is not None and start >= type(self).fail_at_index:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        matches = CHANGED_CVES
+        if "lastModStartDate" in query:
+            lo = _parse_timestamp(query["lastModStartDate"])
+            hi = _parse_timestamp(query["lastModEndDate"])
+            matches = [c for c in CHANGED_CVES if lo <= _parse_timestamp(c["lastModified"]) <= hi]
+        page = matches[start:start + int(query.get("resultsPerPage", 2000))]
+
+        body = json.dumps({
+            "totalResults": len(matches),
+            "startIndex": start,
+            "vulnerabilities": [{"cve": c} for c in page],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def nvd_server():
+    FakeNVDHandler.requests_seen = []
+    FakeNVDHandler.fail_at_index = None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeNVDHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/rest/json/cves/2.0"
+    server.shutdown()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CVEStore(str(tmp_path / "nvd.db"))
+    store.upsert_cves([make_cve("CVE-2023-9999", "2024-02-01T00:00:00.000")])
+    yield store
+    store.close()
+
+
+def test_split_windows_respects_nvd_limit():
+    windows = split_windows(_parse_timestamp("2024-01-01T00:00:00"), _parse_timestamp("2024-12-31T00:00:00"))
+    assert len(windows) == 4
+    assert all((end - start).days <= 120 for start, end in windows)
+
+
+def test_incremental_sync_pages_from_last_modified(store, nvd_server):
+    summary = sync_nvd(store, until="2024-04-01T00:00:00", base_url=nvd_server,
+                       page_size=2, limiter=SlidingWindowLimiter(100, 30), api_key="")
+    assert summary["completed"]
+    assert summary["cves_updated"] == 5
+    assert summary["pages"] == 3
+    assert store.count() == 6
+    assert FakeNVDHandler.requests_seen[0]["lastModStartDate"].startswith("2024-02-01T00:00:00")
+
+    # Nothing changed since the recorded sync time -> no CVEs downloaded
+    summary = sync_nvd(store, until="2024-04-02T00:00:00", base_url=nvd_server,
+                       limiter=SlidingWindowLimiter(100, 30), api_key="")
+    assert summary["completed"]
+    assert summary["cves_updated"] == 0
+
+
+def test_interrupted_sync_resumes_from_cursor(store, nvd_server, monkeypatch):
+    monkeypatch.setattr("redcalibur.vulnerability_scanning.nvd_sync.time.sleep", lambda s: None)
+    FakeNVDHandler.fail_at_index = 2
+    summary = sync_nvd(store, until="2024-04-01T00:00:00", base_url=nvd_server,
+                       page_size=2, limiter=SlidingWindowLimiter(100, 30), api_key="")
+    assert not summary["completed"]
+    assert "error" in summary
+    assert summary["cves_updated"] == 2
+
+    FakeNVDHandler.fail_at_index = None
+    FakeNVDHandler.requests_seen = []
+    summary = sync_nvd(store, base_url=nvd_server, page_size=2, limiter=SlidingWindowLimiter(100, 30), api_key="")
+    assert summary["resumed"]
+    assert summary["completed"]
+    assert summary["cves_updated"] == 3
+    assert FakeNVDHandler.requests_seen[0]["startIndex"] == "2"
+    assert store.count() == 6
+
+
+def test_sync_draws_from_shared_nvd_limiter(store, nvd_server, monkeypatch):
+    monkeypatch.setattr(cve_scanner, "_limiters", {})
+    monkeypatch.setattr(Config, "NVD_API_KEY", "key")
+    shared = cve_scanner.nvd_limiter()
+
+    summary = sync_nvd(store, until="2024-04-01T00:00:00", base_url=nvd_server, page_size=2)
+    assert summary["completed"]
+    assert len(shared._slots) == len(FakeNVDHandler.requests_seen) == 3
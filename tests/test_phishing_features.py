@@ -0,0 +1,112 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+import torch
+
+from redcalibur import phishing_detection
+from redcalibur.phishing_detection import (
+    FEATURE_NAMES, AIPhishingDetector, URLFeatureExtractor, create_sample_dataset
+)
+
+URLS = [
+    "https://www.google.com",
+    "http://192.168.1.1/amazon-login",
+    "https://paypa1-security.com/update?session=a%20b&x=1",
+    "http://user:pw@login.secure.bank.example.co.uk:8080/verify#top",
+    "example.com/no-scheme/path",
+    "https://cdn.example.com/mirror/10.0.0.1/file",
+    "//10.0.0.1:8443/login",
+    "",
+    "https://bücher.example/straße?q=€uro",
+    "https://" + "a" * 300 + ".example.com/" + "x/" * 200,
+    "https://www.google.com",
+]
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    extractor = URLFeatureExtractor()
+    calls = []
+
+    def fake_enrich(origins):
+        origins = list(origins)
+        calls.extend(origins)
+        return {o: {"ssl_cert_valid": o.startswith("https://"), "redirect_count": len(o) % 3, "reachable": True}
+                for o in origins if o}
+
+    monkeypatch.setattr(phishing_detection, "enrich_origins", fake_enrich)
+    extractor.probed = calls
+    return extractor
+
+
+def test_feature_matrix_matches_single_url_extraction(extractor):
+    extractor.BATCH_ROWS = 4  # exercise several blocks
+    matrix = extractor.extract_feature_matrix(URLS)
+    # Network features are looked up in one call per batch
+    assert extractor.probed.count("https://www.google.com") == 2
+    assert matrix[0, FEATURE_NAMES.index("ssl_cert_valid")] == 1
+    assert matrix[1, FEATURE_NAMES.index("ssl_cert_valid")] == 0
+
+    assert matrix.shape == (len(URLS), len(FEATURE_NAMES))
+    expected = np.array([extractor.features_to_vector(extractor.extract_features(url)) for url in URLS], dtype=float)
+    np.testing.assert_allclose(matrix, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_lexical_only_matrix_skips_network(extractor):
+    matrix = extractor.extract_feature_matrix(URLS, network=False)
+
+    assert extractor.probed == []
+    assert not matrix[:, FEATURE_NAMES.index("ssl_cert_valid")].any()
+    assert matrix[1, FEATURE_NAMES.index("has_ip")] == 1
+    assert matrix[3, FEATURE_NAMES.index("num_subdomains")] == 3
+    assert matrix[5, FEATURE_NAMES.index("has_ip")] == 0
+    assert matrix[6, FEATURE_NAMES.index("has_ip")] == 1
+    assert matrix[7].sum() == 0
+    assert extractor.extract_feature_matrix([]).shape == (0, len(FEATURE_NAMES))
+
+
+def test_batched_predictions_match_single_rows(extractor):
+    torch.manual_seed(0)
+    detector = AIPhishingDetector()
+    detector.feature_extractor = extractor
+    urls, labels = create_sample_dataset()
+    detector.train_neural_network(urls, labels, epochs=5)
+
+    results = detector.predict_urls(URLS, batch_size=4)
+    assert [r["url"] for r in results] == URLS
+
+    matrix = extractor.extract_feature_matrix(URLS)
+    detector.neural_net.eval()
+    for row, result in zip(matrix, results):
+        normalized = (row - detector.feature_mean) / detector.feature_scale
+        with torch.no_grad():
+            probs = torch.softmax(detector.neural_net(torch.FloatTensor(normalized).unsqueeze(0)), dim=1)[0]
+        nn = result["predictions"]["neural_network"]
+        np.testing.assert_allclose(nn["probabilities"], probs.numpy(), rtol=1e-5)
+        assert nn["prediction"] == int(probs.argmax())
+        ensemble = result["predictions"]["ensemble"]
+        assert ensemble["prediction"] == detector.ensemble_model.predict([row])[0]
+        np.testing.assert_allclose(ensemble["probabilities"], detector.ensemble_model.predict_proba([row])[0])
+        assert extractor.features_to_vector(result["features"]).tolist() == row.tolist()
+
+    single = detector.predict_url(URLS[2])
+    assert single["final_prediction"] == results[2]["final_prediction"]
+    assert detector.predict_urls([]) == []
+
+
+def test_long_urls_keep_block_memory_bounded(extractor):
+    extractor.BATCH_CELLS = 4096  # force blocks smaller than BATCH_ROWS
+    urls = [f"https://h{i % 7}.example.com/p?q={i}&pad=" + "z" * (i % 300) for i in range(400)]
+    urls += ["https://tracker.example.com/?d=" + "a" * 32768, "https://x.example/" + "é" * 3000]
+    expected = np.array([extractor.features_to_vector(extractor.extract_features(url, network=False))
+                         for url in urls], dtype=float)
+
+    tracemalloc.start()
+    try:
+        matrix = extractor.extract_feature_matrix(urls, network=False)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    np.testing.assert_allclose(matrix, expected, rtol=1e-12, atol=1e-12)
+    assert peak < 8 * 1024 * 1024
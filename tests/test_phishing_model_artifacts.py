@@ -0,0 +1,93 @@
+import json
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from redcalibur import phishing_detection
+from redcalibur.config import Config
+from redcalibur.phishing_detection import AIPhishingDetector, create_sample_dataset
+from redcalibur.phishing_detection.model_artifacts import ModelArtifactError, get_default_detector
+
+URLS = [
+    "https://www.google.com",
+    "http://192.168.1.1/amazon-login",
+    "https://paypa1-security.com/update",
+    "http://github-security-alert.com/verify/account",
+]
+
+
+@pytest.fixture
+def trained(monkeypatch, tmp_path):
+    monkeypatch.setattr(phishing_detection, "enrich_origins", lambda origins: {})
+    monkeypatch.setattr(Config, "PHISHING_MODEL_PATH", str(tmp_path / "model"))
+    torch.manual_seed(0)
+    detector = AIPhishingDetector()
+    detector.train_neural_network(*create_sample_dataset(), epochs=5)
+    return detector
+
+
+def probabilities(results):
+    return [(r["predictions"]["neural_network"]["probabilities"], r["predictions"]["ensemble"]["probabilities"])
+            for r in results]
+
+
+def test_saved_model_predicts_identically(trained):
+    trained.save()
+    loaded = AIPhishingDetector.load()
+
+    np.testing.assert_allclose(probabilities(loaded.predict_urls(URLS)), probabilities(trained.predict_urls(URLS)),
+                               rtol=1e-6)
+    assert isinstance(loaded.feature_scale, np.memmap)
+    assert not np.array_equal(loaded.feature_mean, np.zeros(len(phishing_detection.FEATURE_NAMES)))
+
+    # Saving again replaces the artifact in place
+    trained.save()
+    assert sorted(os.listdir(os.path.dirname(Config.PHISHING_MODEL_PATH))) == ["model"]
+
+
+def test_incompatible_or_missing_artifacts(trained, monkeypatch):
+    with pytest.raises(ModelArtifactError):
+        AIPhishingDetector.load()
+    assert get_default_detector() is None
+    with pytest.raises(ValueError):
+        AIPhishingDetector().save()
+
+    trained.save()
+    assert get_default_detector() is get_default_detector()
+
+    manifest_path = os.path.join(Config.PHISHING_MODEL_PATH, "manifest.json")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest["version"] += 1
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    with pytest.raises(ModelArtifactError, match="version"):
+        AIPhishingDetector.load()
+
+    # The shared detector is dropped, and the failed load is not retried per call
+    loads = []
+    original_load = AIPhishingDetector.load.__func__
+    monkeypatch.setattr(AIPhishingDetector, "load",
+                        classmethod(lambda cls, path=None: loads.append(path) or original_load(cls, path)))
+    assert get_default_detector() is None
+    assert get_default_detector() is None
+    assert len(loads) == 1
+
+
+def test_corrupt_artifacts_are_rejected(trained):
+    trained.save()
+    ensemble_path = os.path.join(Config.PHISHING_MODEL_PATH, "ensemble.joblib")
+    with open(ensemble_path, "r+b") as f:
+        f.truncate(os.path.getsize(ensemble_path) // 2)
+    with pytest.raises(ModelArtifactError, match="corrupt"):
+        AIPhishingDetector.load()
+    assert get_default_detector() is None
+
+    # Tensors that do not fit the network are rejected the same way
+    trained.save()
+    tensor_path = os.path.join(Config.PHISHING_MODEL_PATH, "network", "classifier.0.weight.npy")
+    np.save(tensor_path, np.zeros((3, 3), dtype=np.float32))
+    with pytest.raises(ModelArtifactError):
+        AIPhishingDetector.load()
@@ -0,0 +1,143 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from redcalibur.config import Config
+from redcalibur.vulnerability_scanning.cve_store import CVEStore
+from redcalibur.vulnerability_scanning.exploit_index import ExploitIndex
+from redcalibur.vulnerability_scanning.prioritizer import (
+    prioritize_findings, priority_scores, refresh_priorities, summarize_risk
+)
+
+EXPLOITS_CSV = """id,file,description,date_published,author,type,platform,port,date_added,date_updated,verified,codes,tags,aliases,screenshot_url,application_url,source_url
+45233,exploits/linux/remote/45233.py,OpenSSH 2.3 < 7.7 - Username Enumeration,2018-08-20,Justin Gardner,remote,linux,22,2018-08-20,2018-08-20,1,CVE-2018-15473,,,,,
+"""
+
+EPSS_CSV = """#model_version:v2023.03.01,score_date:2024-05-01T00:00:00+0000
+cve,epss,percentile
+CVE-2018-15473,0.9,0.99
+CVE-2023-0002,0.01,0.20
+"""
+
+
+def make_cve(cve_id, score):
+    return {
+        "id": cve_id,
+        "published": "2023-01-01T00:00:00.000",
+        "lastModified": "2023-01-01T00:00:00.000",
+        "descriptions": [{"lang": "en", "value": f"Issue {cve_id}"}],
+        "metrics": {"cvssMetricV31": [{"cvssData": {"baseScore": score, "baseSeverity": "HIGH"}}]},
+    }
+
+
+@pytest.fixture
+def databases(tmp_path):
+    store = CVEStore(str(tmp_path / "nvd.db"))
+    store.upsert_cves([make_cve("CVE-2018-15473", 5.3), make_cve("CVE-2023-0002", 9.8)])
+    epss_path = tmp_path / "epss.csv.gz"
+    with gzip.open(epss_path, "wt") as fh:
+        fh.write(EPSS_CSV)
+    assert store.ingest_epss(str(epss_path)) == 2
+
+    csv_path = tmp_path / "files_exploits.csv"
+    csv_path.write_text(EXPLOITS_CSV)
+    index = ExploitIndex(str(tmp_path / "exploitdb.db"))
+    index.import_csv(str(csv_path))
+    yield store, index
+    store.close()
+    index.close()
+
+
+def test_refresh_is_incremental(databases):
+    store, index = databases
+    assert refresh_priorities(store, index) == 2
+    assert refresh_priorities(store, index) == 0
+
+    store.upsert_cves([make_cve("CVE-2023-0002", 4.0)])
+    assert refresh_priorities(store, index) == 1
+
+    # A new Exploit-DB import recomputes every CVE once
+    index.import_csv(str(index.db_path).replace("exploitdb.db", "files_exploits.csv"))
+    assert refresh_priorities(store, index) == 2
+
+
+def test_exploitable_finding_outranks_higher_cvss(databases):
+    store, index = databases
+    services = [
+        {"port": 22, "service": "SSH", "vulnerabilities": [
+            {"cve_id": "CVE-2023-0002", "cvss_score": 9.8, "severity": "CRITICAL"},
+            {"cve_id": "CVE-2018-15473", "cvss_score": 5.3, "severity": "MEDIUM"},
+        ]},
+        # Not in the local mirror: scored from its own CVSS
+        {"port": 80, "service": "HTTP", "vulnerabilities": [
+            {"cve_id": "CVE-2024-9999", "cvss_score": "N/A", "severity": "UNKNOWN"},
+        ]},
+    ]
+
+    ranked = prioritize_findings(services, store=store, exploit_index=index)
+    assert [f["cve_id"] for f in ranked] == ["CVE-2018-15473", "CVE-2023-0002", "CVE-2024-9999"]
+    assert ranked[0]["exploit_available"] and ranked[0]["epss"] == 0.9
+    assert ranked[2]["cvss_score"] is None and ranked[2]["priority"] == 0.0
+
+    summary = summarize_risk(ranked)
+    assert summary["risk_level"] == "HIGH"
+    assert summary["exploitable_findings"] == 1
+    assert summarize_risk([])["risk_level"] == "LOW"
+
+
+def test_risk_falls_back_to_severity_without_enrichment(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "EXPLOIT_DB_PATH", str(tmp_path / "missing-exploitdb.db"))
+    store = CVEStore(str(tmp_path / "bare.db"))
+    store.upsert_cves([make_cve(f"CVE-2024-{i:04d}", 9.8) for i in range(40)]
+                      + [make_cve(f"CVE-2024-1{i:03d}", 7.5) for i in range(11)]
+                      + [make_cve("CVE-2024-2000", 5.0)])
+    try:
+        def ranked(ids):
+            services = [{"port": 443, "service": "HTTPS",
+                         "vulnerabilities": [{"cve_id": cve_id} for cve_id in ids]}]
+            return prioritize_findings(services, store=store, exploit_index=None)
+
+        critical = ranked([f"CVE-2024-{i:04d}" for i in range(40)])
+        assert critical[0]["priority"] < 0.7 and critical[0]["epss"] is None
+        assert summarize_risk(critical)["risk_level"] == "HIGH"
+        assert summarize_risk(ranked([f"CVE-2024-1{i:03d}" for i in range(11)]))["risk_level"] == "HIGH"
+        assert summarize_risk(ranked([f"CVE-2024-1{i:03d}" for i in range(10)]))["risk_level"] == "MEDIUM"
+        assert summarize_risk(ranked(["CVE-2024-2000"]))["risk_level"] == "MEDIUM"
+    finally:
+        store.close()
+
+
+def test_low_epss_does_not_lower_severity_floor():
+    def finding(cvss, epss):
+        return {"cve_id": "CVE-2024-0001", "cvss_score": cvss, "epss": epss, "exploit_available": False,
+                "exploit_count": 0, "priority": priority_scores(np.array([cvss]), np.array([epss]),
+                                                                np.array([0]), np.array([0]))[0]}
+
+    critical = finding(10.0, 0.05)
+    assert critical["priority"] < 0.7
+    assert summarize_risk([critical])["risk_level"] == "HIGH"
+    assert summarize_risk([finding(7.5, 0.05)] * 11)["risk_level"] == "HIGH"
+    assert summarize_risk([finding(7.5, 0.05)] * 10)["risk_level"] == "MEDIUM"
+
+
+def test_reupserting_a_queued_cve_keeps_one_queue_entry(tmp_path):
+    store = CVEStore(str(tmp_path / "queue.db"))
+    try:
+        store.upsert_cves([make_cve("CVE-2023-0002", 9.8)])
+        # Still queued: the update trigger must not collide with the pending row
+        store.upsert_cves([make_cve("CVE-2023-0002", 4.0)])
+        pending = store.conn.execute("SELECT cve_id FROM priority_pending").fetchall()
+        assert [row[0] for row in pending] == ["CVE-2023-0002"]
+
+        assert refresh_priorities(store) == 1
+        row = store.conn.execute("SELECT cvss_score FROM cve_priority WHERE cve_id = 'CVE-2023-0002'").fetchone()
+        assert row[0] == 4.0
+    finally:
+        store.close()
+
+
+def test_priority_scores_vectorized():
+    scores = priority_scores(np.array([10.0, np.nan]), np.array([1.0, np.nan]),
+                             np.array([2, 0]), np.array([1, 0]))
+    assert scores.tolist() == [1.0, 0.0]
@@ -1,11 +1,21 @@
+import json
 import pytest
 import os
+import shodan
 from unittest.mock import patch, MagicMock
-from redcalibur.osint.shodan_integration import search_shodan, get_host_info
+from redcalibur.config import Config
+from redcalibur.osint import shodan_integration
+from redcalibur.osint.shodan_integration import search_shodan, get_host_info, get_hosts_info
 from dotenv import load_dotenv
 
 load_dotenv()
 
+@pytest.fixture(autouse=True)
+def isolated_client(tmp_path, monkeypatch):
+    """Fresh client pool and host cache per test"""
+    monkeypatch.setattr(shodan_integration, "_clients", {})
+    monkeypatch.setattr(Config, "CACHE_DB_PATH", str(tmp_path / "cache.db"))
+
 # Fixture to get the real API key from .env
 @pytest.fixture
 def shodan_api_key():
@@ -35,6 +45,33 @@ def test_get_host_info_mocked(mock_shodan, shodan_api_key):
     assert host_info['os'] == 'Linux'
     mock_api.host.assert_called_with("8.8.8.8")
 
+@patch('shodan.Shodan')
+def test_get_hosts_info_uses_cache(mock_shodan, monkeypatch):
+    """Bulk lookups query each new IP once and serve repeats from the cache."""
+    monkeypatch.setattr(Config, "SHODAN_REQUESTS_PER_SECOND", 100)
+    mock_api = MagicMock()
+
+    def host(ip):
+        if ip == "10.0.0.3":
+            raise shodan.APIError(shodan_integration.NOT_FOUND_MESSAGE)
+        return {'ip_str': ip, 'ports': [22]}
+
+    mock_api.host.side_effect = host
+    mock_shodan.return_value = mock_api
+
+    ips = ["10.0.0.1", "10.0.0.2", "10.0.0.1", "not-an-ip", "10.0.0.3"]
+    results = get_hosts_info("key", ips)
+    assert list(results) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert results["10.0.0.2"]["ports"] == [22]
+    assert results["10.0.0.3"] == {"error": shodan_integration.NOT_FOUND_MESSAGE}
+    assert mock_api.host.call_count == 3
+    mock_shodan.assert_called_once_with("key")
+
+    # Found and not-found hosts are both cached
+    assert get_hosts_info("key", ips) == results
+    assert get_host_info("key", "10.0.0.1")["ip_str"] == "10.0.0.1"
+    assert mock_api.host.call_count == 3
+
 @pytest.mark.integration
 def test_search_shodan_live(shodan_api_key):
     """Test Shodan search with a live API key (integration test)."""
@@ -54,3 +91,30 @@ def test_get_host_info_live(shodan_api_key):
     host_info = get_host_info(shodan_api_key, "8.8.8.8")
     assert host_info is not None
     assert "ip_str" in host_info
+
+@patch('shodan.Shodan')
+def test_search_to_ndjson_resumes_from_cursor(mock_shodan, monkeypatch, tmp_path):
+    """Search export writes pages incrementally and continues from its cursor."""
+    monkeypatch.setattr(Config, "SHODAN_REQUESTS_PER_SECOND", 100)
+    mock_api = MagicMock()
+    mock_api.search.side_effect = lambda query, page=1: {
+        'total': 250,
+        'matches': [{'ip_str': f'10.0.{page}.{i}'} for i in range(100 if page < 3 else 50)],
+    }
+    mock_shodan.return_value = mock_api
+    output = str(tmp_path / "matches.ndjson")
+
+    first = shodan_integration.search_to_ndjson("key", "apache", output, max_pages=2)
+    assert (first["pages"], first["written"], first["complete"]) == (2, 200, False)
+
+    second = shodan_integration.search_to_ndjson("key", "apache", output)
+    assert (second["pages"], second["written"], second["complete"]) == (1, 250, True)
+    assert [c.kwargs["page"] for c in mock_api.search.call_args_list] == [1, 2, 3]
+
+    with open(output) as fh:
+        lines = [json.loads(line) for line in fh]
+    assert len(lines) == 250 and lines[-1]['ip_str'] == '10.0.3.49'
+
+    # A completed export costs no further requests
+    assert shodan_integration.search_to_ndjson("key", "apache", output)["pages"] == 0
+    assert mock_api.search.call_count == 3
@@ -0,0 +1,179 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from redcalibur.config import Config
+from redcalibur.osint.user_identity import username_lookup
+from redcalibur.osint.user_identity.platform_signatures import (
+    BLOCKED, FOUND, NOT_FOUND, PlatformSignature, load_signatures
+)
+from redcalibur.osint.user_identity.username_lookup import lookup_username, lookup_usernames
+
+
+class FakeProfileHandler(BaseHTTPRequestHandler):
+    """Profiles under /<platform>/<username>; tracks concurrent requests per platform"""
+    existing = {"alice", "carol"}
+    lock = threading.Lock()
+    active = {}
+    peak = {}
+    methods = []
+
+    def do_HEAD(self):
+        type(self).methods.append("HEAD")
+        self.send_response(200 if self.path.rsplit("/", 1)[-1] in type(self).existing else 404)
+        self.end_headers()
+
+    def do_GET(self):
+        cls = type(self)
+        cls.methods.append("GET")
+        _, platform, username = self.path.split("/")
+        if platform == "walled":
+            # Answers 200 for everyone; only real profiles carry the marker
+            body = b'<div class="profile-header">' if username in cls.existing else b"<title>Sign in</title>"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        with cls.lock:
+            cls.active[platform] = cls.active.get(platform, 0) + 1
+            cls.peak[platform] = max(cls.peak.get(platform, 0), cls.active[platform])
+        try:
+            time.sleep(0.02)
+            if username in cls.existing:
+                # Large profile page; probes should not need all of it
+                body = b"<html>" + b"x" * 512 * 1024
+                self.send_response(200)
+            else:
+                body = b"not found"
+                self.send_response(404)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with cls.lock:
+                cls.active[platform] -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_platforms(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "CACHE_DB_PATH", str(tmp_path / "cache.db"))
+    FakeProfileHandler.active = {}
+    FakeProfileHandler.peak = {}
+    FakeProfileHandler.methods = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeProfileHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    signatures = {
+        "alpha": PlatformSignature.from_dict("alpha", {"url": base + "/alpha/{username}"}),
+        "beta": PlatformSignature.from_dict("beta", {"url": base + "/beta/{username}"}),
+        "headonly": PlatformSignature.from_dict("headonly", {
+            "url": base + "/headonly/{username}", "method": "HEAD", "username_pattern": "^[a-z]+$"
+        }),
+        "walled": PlatformSignature.from_dict("walled", {
+            "url": base + "/walled/{username}", "found_markers": ["profile-header"],
+            "not_found_markers": ["<title>Sign in"]
+        }),
+        # Same pages, but a 404 is read as the platform refusing to answer
+        "flaky": PlatformSignature.from_dict("flaky", {
+            "url": base + "/alpha/{username}", "not_found_status": [], "blocked_status": [404]
+        }),
+    }
+    monkeypatch.setattr(username_lookup, "get_signatures", lambda: signatures)
+    yield base
+    server.shutdown()
+    server.server_close()
+
+
+def test_bulk_lookup_respects_per_platform_cap(fake_platforms):
+    usernames = ["alice", "bob", "carol"] + [f"user{i}" for i in range(17)]
+    results = lookup_usernames(usernames, ["alpha", "beta", "gamma"], per_platform=3)
+
+    assert list(results) == usernames
+    assert results["alice"] == {
+        "alpha": f"{fake_platforms}/alpha/alice",
+        "beta": f"{fake_platforms}/beta/alice",
+        "gamma": "unsupported platform",
+    }
+    assert results["bob"]["alpha"] == "not found"
+    assert sum(r["beta"] != "not found" for r in results.values()) == 2
+    assert max(FakeProfileHandler.peak.values()) <= 3
+
+
+def test_single_lookup_keeps_result_shape(fake_platforms):
+    assert lookup_username("carol", ["beta", "alpha"]) == {
+        "beta": f"{fake_platforms}/beta/carol",
+        "alpha": f"{fake_platforms}/alpha/carol",
+    }
+
+
+def test_signatures_avoid_false_positives(fake_platforms):
+    results = lookup_usernames(["alice", "bob", "bad_name"], ["walled", "headonly"])
+
+    # A 200 login wall is not a profile
+    assert results["alice"]["walled"] == f"{fake_platforms}/walled/alice"
+    assert results["bob"]["walled"] == "not found"
+    # HEAD signatures never download a body; invalid usernames cost no request
+    assert results["alice"]["headonly"] == f"{fake_platforms}/headonly/alice"
+    assert results["bad_name"]["headonly"] == "not found"
+    assert FakeProfileHandler.methods.count("HEAD") == 2
+
+    # The threaded fallback applies the same signatures
+    assert username_lookup._lookup_username_threaded("bob", ["walled", "headonly"]) == {
+        "walled": "not found", "headonly": "not found"
+    }
+
+
+def test_signature_rules_and_overlay(tmp_path):
+    overlay = tmp_path / "signatures.json"
+    overlay.write_text('{"GitHub": {"url": "https://gh.example/{username}", "method": "HEAD"}, '
+                       '"example": {"url": "https://example.com/u/{username}", "ranged": true, '
+                       '"blocked_redirect": "/login", "blocked_status": [999]}}')
+    signatures = load_signatures(str(overlay))
+
+    assert signatures["github"].profile_url("octocat") == "https://gh.example/octocat"
+    assert "linkedin" in signatures and "instagram" in signatures
+    example = signatures["example"]
+    assert example.request_headers()["Range"].startswith("bytes=0-")
+    assert example.classify(206, "https://example.com/u/alice") == FOUND
+    assert example.classify(200, "https://example.com/login?next=/u/alice") == BLOCKED
+    assert example.classify(999) == BLOCKED
+    assert example.classify(404) == NOT_FOUND
+
+    with pytest.raises(ValueError):
+        PlatformSignature.from_dict("broken", {"url": "https://x.example/{username}", "method": "HEAD",
+                                               "found_markers": ["profile"]})
+
+
+def test_probe_outcomes_cached_with_separate_ttls(fake_platforms, monkeypatch):
+    first = lookup_usernames(["alice", "bob"], ["alpha", "flaky"])
+    assert first["bob"] == {"alpha": "not found", "flaky": "blocked"}
+    assert len(FakeProfileHandler.methods) == 4
+
+    # Repeat checks are answered from the cache
+    assert lookup_usernames(["alice", "bob"], ["alpha", "flaky"]) == first
+    assert len(FakeProfileHandler.methods) == 4
+
+    # Blocked outcomes expire on their own, shorter TTL
+    monkeypatch.setattr(Config, "USERNAME_BLOCKED_TTL", 0)
+    assert lookup_usernames(["alice", "bob"], ["alpha", "flaky"]) == first
+    assert len(FakeProfileHandler.methods) == 5
+
+    lookup_username("alice", ["alpha"], use_cache=False)
+    assert len(FakeProfileHandler.methods) == 6
+
+
+def test_concurrent_lookups_share_one_probe(fake_platforms):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: lookup_username("carol", ["alpha"]), range(4)))
+
+    assert all(r == {"alpha": f"{fake_platforms}/alpha/carol"} for r in results)
+    assert FakeProfileHandler.methods == ["GET"]
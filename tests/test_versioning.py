@@ -0,0 +1,42 @@
+import numpy as np
+
+from redcalibur.enumeration.service_detector import identify_service_from_banner
+from redcalibur.versioning import (
+    compare_versions, extract_version, normalize_version, sort_versions, version_key, versions_in_range
+)
+
+
+def test_vendor_suffix_ordering():
+    assert version_key("8.9") < version_key("8.9p1") < version_key("8.10")
+    assert version_key("1.0.2") < version_key("1.0.2k") < version_key("1.0.3")
+    assert version_key("1.0.0-rc1") < version_key("1.0.0") < version_key("1:0.9")
+    assert version_key("2.4.41-ubuntu") == version_key("2.4.41") == version_key("2.4.41.0")
+    assert version_key("*") is None and version_key("-") is None
+    assert compare_versions("9.3p2", "9.3p10") == -1
+
+
+def test_normalize_version():
+    assert normalize_version("v2.4.41-ubuntu") == "2.4.41"
+    assert normalize_version("1.0.0-RC1") == "1.0.0rc1"
+    assert normalize_version("5.7.33-0ubuntu0.18.04.1") == "5.7.33"
+    assert normalize_version("unknown") is None
+
+
+def test_extract_version_skips_protocol_versions():
+    assert extract_version("SSH-2.0-OpenSSH_8.9p1 Ubuntu-3ubuntu0.1", "openssh") == "8.9p1"
+    assert extract_version("HTTP/1.1 200 OK\r\nServer: Apache/2.4.41 (Ubuntu)") == "2.4.41"
+    assert extract_version("redis_version:6.0.9", "redis") == "6.0.9"
+    assert extract_version("OpenSSL 1.0.2k-fips") == "1.0.2k"
+    assert identify_service_from_banner(b"SSH-2.0-OpenSSH_8.9p1 Ubuntu") == ("SSH", "OpenSSH 8.9p1")
+
+
+def test_vectorized_range_check():
+    versions = ["8.7", "8.9", "8.9p1", "9.3p2", "garbage", "9.3p1"]
+    mask = versions_in_range(versions, start_including="8.5", end_excluding="9.3p2")
+    assert mask.tolist() == [True, True, True, False, False, True]
+    assert sort_versions(["8.10", "8.9p1", "8.9", "x"]) == ["x", "8.9", "8.9p1", "8.10"]
+
+    rng = np.random.default_rng(0)
+    inventory = [f"{a}.{b}.{c}" for a, b, c in rng.integers(0, 12, size=(500, 3))]
+    expected = [version_key("2.4.0") <= version_key(v) <= version_key("7.1.3") for v in inventory]
+    assert versions_in_range(inventory, start_including="2.4", end_including="7.1.3").tolist() == expected
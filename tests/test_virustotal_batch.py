@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from redcalibur.config import Config
+from redcalibur.osint import virustotal_batch, virustotal_integration
+from redcalibur.osint.virustotal_batch import VTQuota, scan_urls
+from redcalibur.osint.virustotal_integration import scan_url_full, url_to_vt_id
+
+
+class FakeVTHandler(BaseHTTPRequestHandler):
+    """Accepts URL submissions; each analysis completes on its second poll"""
+    requests_seen = []
+    polls = {}
+    known_reports = {}
+
+    def _send(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        cls = type(self)
+        length = int(self.headers.get("Content-Length", 0))
+        url = self.rfile.read(length).decode()
+        cls.requests_seen.append(("POST", self.path))
+        if "broken" in url:
+            self._send({"data": None})
+            return
+        self._send({"data": {"type": "analysis", "id": f"analysis-{abs(hash(url))}"}})
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests_seen.append(("GET", self.path))
+        if "/urls/" in self.path:
+            url_id = self.path.rsplit("/", 1)[-1]
+            if url_id not in cls.known_reports:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self._send({"data": {"attributes": cls.known_reports[url_id]}})
+            return
+        analysis_id = self.path.rsplit("/", 1)[-1]
+        cls.polls[analysis_id] = cls.polls.get(analysis_id, 0) + 1
+        if cls.polls[analysis_id] < 2:
+            self._send({"data": {"attributes": {"status": "queued"}}})
+            return
+        self._send({"data": {"attributes": {
+            "status": "completed",
+            "stats": {"harmless": 60, "malicious": 1, "suspicious": 0, "undetected": 9},
+            "results": {"EngineA": {"category": "malicious"}, "EngineB": {"category": "harmless"}},
+        }}})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_vt(tmp_path, monkeypatch):
+    FakeVTHandler.requests_seen = []
+    FakeVTHandler.polls = {}
+    FakeVTHandler.known_reports = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeVTHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(virustotal_integration, "VT_API_URL", f"http://127.0.0.1:{server.server_port}/api/v3")
+    monkeypatch.setattr(Config, "CACHE_DB_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(virustotal_batch, "_quotas", {})
+    monkeypatch.setattr(virustotal_integration, "_pending_analyses", {})
+    monkeypatch.setattr(virustotal_integration, "_poll_owners", {})
+    monkeypatch.setattr(virustotal_integration, "_completed_analyses", {})
+    yield FakeVTHandler
+    server.shutdown()
+    server.server_close()
+
+
+def test_batch_scan_polls_pending_analyses_together(fake_vt):
+    urls = ["http://a.example", "http://b.example", "http://a.example", "http://c.example"]
+    quota = VTQuota("key", per_minute=100, per_day=100)
+
+    results = scan_urls("key", urls, poll_interval=0.05, quota=quota)
+
+    assert [r["url"] for r in results] == urls
+    assert all(r["report"]["last_analysis_stats"]["malicious"] == 1 for r in results)
+    assert results[0]["report"]["malicious_vendors"] == [{"engine": "EngineA", "category": "malicious"}]
+    # 3 report checks + 3 submissions + 2 polling rounds of 3 analyses
+    assert len(fake_vt.requests_seen) == 12
+    assert quota.used_today() == 12
+
+    # Repeat checks are answered from the report cache without any request
+    again = scan_urls("key", urls, poll_interval=0.05, quota=quota)
+    assert all(r["cached"] for r in again)
+    assert again[0]["report"] == results[0]["report"]
+    assert len(fake_vt.requests_seen) == 12
+
+
+def test_daily_quota_stops_batch(fake_vt):
+    quota = VTQuota("key", per_minute=100, per_day=1)
+    results = scan_urls("key", ["http://a.example", "http://b.example"], poll_interval=0.05, quota=quota)
+
+    assert [r.get("error") for r in results].count("quota_exceeded") == 2
+    assert len(fake_vt.requests_seen) == 1
+    assert quota.remaining_today() == 0
+
+
+def test_failed_submission_is_reported(fake_vt):
+    quota = VTQuota("key", per_minute=100, per_day=100)
+    urls = ["http://a.example", "http://broken.example"]
+    results = scan_urls("key", urls, poll_interval=0.05, quota=quota, use_cache=False)
+
+    assert [r["url"] for r in results] == urls
+    assert "error" not in results[0]
+    assert results[1]["error"]
+
+
+def test_fresh_vt_report_is_not_resubmitted(fake_vt):
+    fake_vt.known_reports[url_to_vt_id("http://known.example")] = {
+        "last_analysis_date": time.time() - 60,
+        "last_analysis_stats": {"harmless": 70, "malicious": 0},
+        "last_analysis_results": {},
+        "reputation": 5,
+    }
+
+    result = scan_url_full("key", "http://known.example")
+    assert result["cached"] and result["report"]["reputation"] == 5
+    assert fake_vt.requests_seen == [("GET", f"/api/v3/urls/{url_to_vt_id('http://known.example')}")]
+
+    # Served from the local cache next time; a zero freshness window forces a rescan
+    assert scan_url_full("key", "http://known.example")["cached"]
+    assert len(fake_vt.requests_seen) == 1
+    scan_url_full("key", "http://known.example", max_age=0, overall_timeout=0)
+    assert ("POST", "/api/v3/urls") in fake_vt.requests_seen
+
+
+def test_concurrent_scans_share_one_poll_loop(fake_vt):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(
+            lambda _: scan_url_full("key", "http://shared.example", poll_interval=0.05, use_cache=False),
+            range(4)
+        ))
+
+    assert all(r["report"]["last_analysis_stats"]["malicious"] == 1 for r in results)
+    # One submission and two polls; the completed analysis replaces a report fetch
+    assert fake_vt.requests_seen.count(("POST", "/api/v3/urls")) == 1
+    assert len(fake_vt.requests_seen) == 3
+
+
+def test_timed_out_analysis_is_resumed(fake_vt):
+    first = scan_url_full("key", "http://slow.example", overall_timeout=0.05, poll_interval=0.2, use_cache=False)
+    assert first["note"] == "analysis_pending_or_insufficient_time"
+    assert len(fake_vt.polls) == 1 and list(fake_vt.polls.values()) == [1]
+
+    # The batch scanner picks up the same analysis instead of resubmitting
+    results = scan_urls("key", ["http://slow.example"], poll_interval=0.05, use_cache=False,
+                        quota=VTQuota("key", per_minute=100, per_day=100))
+    assert results[0]["report"]["last_analysis_stats"]["malicious"] == 1
+    assert fake_vt.requests_seen.count(("POST", "/api/v3/urls")) == 1
+    assert virustotal_integration.pending_analysis(url_to_vt_id("http://slow.example")) is None
+
+
+def test_concurrent_batches_poll_each_analysis_once(fake_vt):
+    quota = VTQuota("key", per_minute=1000, per_day=1000)
+
+    def batch(_):
+        return scan_urls("key", ["http://shared.example", "http://other.example"], poll_interval=0.05,
+                         use_cache=False, quota=quota)
+
+    def single(_):
+        return [scan_url_full("key", "http://shared.example", poll_interval=0.05, use_cache=False)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        runs = list(pool.map(lambda f: f(None), [batch, batch, batch, single]))
+
+    assert all(r["report"]["last_analysis_stats"]["malicious"] == 1 for run in runs for r in run)
+    # Each analysis completes on its second poll; no other loop polled it again
+    assert sorted(fake_vt.polls.values()) == [2, 2]
+    assert virustotal_integration._poll_owners == {}